@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput and ratio of streaming compression of the feed file.
+
+Usage::
+
+    python benchmarks/compression.py [--items 2000] [--compression none gzip bz2 xz] [--levels 1 6 9]
+                                     [--flush-items 0] [--repeat 3]
+
+The feed is exported to a temporary file through the same chain of writers as the pipeline uses,
+the compressed file is decompressed and compared with the uncompressed feed for each run.
+"""
+from __future__ import print_function
+
+import argparse
+import bz2
+from datetime import datetime
+import gzip
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.utils import get_tzlocal
+from scrapy_rss.writers import CoalescingWriter, CompressingWriter, COMPRESSIONS, COMPRESSION_NONE, lzma
+
+from serialization_pools import EXPORTER_ARGS, make_items
+
+
+DECOMPRESSORS = {
+    'gzip': lambda path: gzip.open(path, 'rb'),
+    'bz2': lambda path: bz2.BZ2File(path, 'rb'),
+    'xz': lambda path: lzma.open(path, 'rb'),
+}
+
+
+def export(items, path, compression, level, flush_items):
+    start = time.time()
+    file = open(path, 'wb', 0 if compression != COMPRESSION_NONE or flush_items else -1)
+    if compression != COMPRESSION_NONE:
+        file = CompressingWriter(file, compression, level=level)
+        if not flush_items:
+            file = io.BufferedWriter(file)
+    if flush_items:
+        file = CoalescingWriter(file, flush_items=flush_items)
+    exporter = FeedItemExporter(file, *EXPORTER_ARGS, last_build_date=datetime(2020, 1, 1, tzinfo=get_tzlocal()))
+    exporter.start_exporting()
+    for item in items:
+        exporter.export_item(item)
+        if flush_items:
+            file.end_item()
+    exporter.finish_exporting()
+    file.close()
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--compression', nargs='+', choices=[COMPRESSION_NONE] + sorted(COMPRESSIONS),
+                        default=[COMPRESSION_NONE, 'gzip', 'bz2', 'xz'])
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6, 9])
+    parser.add_argument('--flush-items', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, 'feed.rss')
+        export(items, path, COMPRESSION_NONE, None, 0)
+        with open(path, 'rb') as f:
+            expected = f.read()
+        print('items: {}, feed size: {:.1f} MB'.format(args.items, len(expected) / 1e6))
+        print('{:<6} {:>5} {:>10} {:>10} {:>10} {:>8}'.format('codec', 'level', 'time, ms', 'MB/s', 'size, KB', 'ratio'))
+        for compression in args.compression:
+            if compression == 'xz' and lzma is None:
+                continue
+            for level in args.levels if compression != COMPRESSION_NONE else [None]:
+                if level is not None and level not in COMPRESSIONS[compression][1]:
+                    continue
+                elapsed = min(export(items, path, compression, level, args.flush_items)
+                              for _ in range(args.repeat))
+                if compression != COMPRESSION_NONE:
+                    with DECOMPRESSORS[compression](path) as f:
+                        if f.read() != expected:
+                            raise AssertionError('Decompressed {} feed differs from the uncompressed feed'
+                                                 .format(compression))
+                size = os.path.getsize(path)
+                print('{:<6} {:>5} {:>10.0f} {:>10.1f} {:>10.0f} {:>8.1f}'.format(
+                    compression, '-' if level is None else level, elapsed * 1000,
+                    len(expected) / elapsed / 1e6, size / 1e3, len(expected) / float(size)))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of item serialization against the number of workers of serialization pools.
+
+Usage::
+
+    python benchmarks/serialization_pools.py [--items 2000] [--workers 1 2 4 8] [--pool thread process]
+                                             [--engine sax] [--repeat 3]
+
+Zero workers means serial export by :meth:`FeedItemExporter.export_item`.
+Each pool writes the same feed as serial export, it's checked for each run.
+"""
+from __future__ import print_function
+
+import argparse
+from datetime import datetime
+from io import BytesIO
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.items import RssItem
+from scrapy_rss.parallel import POOLS
+from scrapy_rss.utils import get_tzlocal
+
+
+EXPORTER_ARGS = ('Benchmark', 'http://example.com/feed', 'Items with long descriptions')
+
+
+def make_items(number):
+    description = ''.join('<p>Paragraph {} of the description with <b>markup</b> & entities</p>\n'.format(i)
+                          for i in range(40))
+    return [RssItem(title='Item #{}'.format(i),
+                    link='http://example.com/items/{}'.format(i),
+                    description=description,
+                    author='author{}@example.com (Author {})'.format(i % 10, i % 10),
+                    category=['category {}'.format(j) for j in range(i % 7 + 3)],
+                    guid={'value': 'item-{}'.format(i), 'isPermaLink': False},
+                    pubDate=datetime(2020, 1, 1, 12, i % 60, tzinfo=get_tzlocal()))
+            for i in range(number)]
+
+
+def export(items, pool_cls, workers, engine):
+    output = BytesIO()
+    kwargs = {'engine': engine, 'last_build_date': datetime(2020, 1, 1, tzinfo=get_tzlocal())}
+    exporter = FeedItemExporter(output, *EXPORTER_ARGS, **kwargs)
+    exporter.start_exporting()
+    pool = pool_cls(exporter, workers, exporter_args=EXPORTER_ARGS, exporter_kwargs=kwargs) if workers else None
+    start = time.time()
+    if pool is not None:
+        try:
+            for item in items:
+                pool.submit(item)
+            pool.drain()
+        finally:
+            pool.close()
+    else:
+        for item in items:
+            exporter.export_item(item)
+    elapsed = time.time() - start
+    exporter.finish_exporting()
+    return elapsed, output.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--pool', nargs='+', choices=sorted(POOLS), default=sorted(POOLS, reverse=True))
+    parser.add_argument('--engine', choices=('sax', 'template'), default='sax')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    items = make_items(args.items)
+    serial_time, expected = min(export(items, None, 0, args.engine) for _ in range(args.repeat))
+    print('CPUs: {}, items: {}, engine: {}'.format(os.cpu_count() if hasattr(os, 'cpu_count') else '?',
+                                                  args.items, args.engine))
+    print('{:<8} {:>7} {:>10} {:>12} {:>8}'.format('pool', 'workers', 'time, ms', 'items/s', 'speedup'))
+    print('{:<8} {:>7} {:>10.0f} {:>12.0f} {:>8.2f}'.format('serial', 0, serial_time * 1000,
+                                                          args.items / serial_time, 1))
+    for pool_name in args.pool:
+        for workers in args.workers:
+            elapsed = float('inf')
+            for _ in range(args.repeat):
+                run_time, output = export(items, POOLS[pool_name], workers, args.engine)
+                if output != expected:
+                    raise AssertionError('Output of {} pool differs from serial export'.format(pool_name))
+                elapsed = min(elapsed, run_time)
+            print('{:<8} {:>7} {:>10.0f} {:>12.0f} {:>8.2f}'.format(pool_name, workers, elapsed * 1000,
+                                                                  args.items / elapsed, serial_time / elapsed))
+
+
+if __name__ == '__main__':
+    main()
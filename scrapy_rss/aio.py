@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Asyncio variants of the feed exporter and the pipeline.
+
+The module requires Python 3.7+ and a running asyncio event loop
+(Scrapy with ``TWISTED_REACTOR = 'twisted.internet.asyncioreactor.AsyncioSelectorReactor'``),
+so it isn't imported by the package.
+"""
+
+import asyncio
+import io
+
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.defer import Deferred
+
+from .exporters import FeedItemExporter
+from .pipelines import FeedExportPipeline
+
+
+async def wait_for_pool(pool, then=None):
+    """
+    Wait until the number of items in flight of the serialization pool doesn't exceed its maximum.
+    Serialized items are waited for by the default executor of the event loop, so the loop isn't blocked
+
+    Parameters
+    ----------
+    pool : scrapy_rss.parallel.SerializationPool
+    then : callable or None
+        Function that's called after waiting, its result is returned (Deferred results are awaited)
+
+    Returns
+    -------
+    Any
+        Result of ``then`` or None
+    """
+    waiter = pool.get_waiter()
+    while waiter is not None:
+        await asyncio.get_running_loop().run_in_executor(None, waiter)
+        pool.merge_ready()
+        waiter = pool.get_waiter()
+    if then is None:
+        return None
+    result = then()
+    if isinstance(result, Deferred):
+        result = await maybe_deferred_to_future(result)
+    return result
+
+
+class AsyncFeedItemExporter(FeedItemExporter):
+    def __init__(self, file, *args, **kwargs):
+        """
+        Exporter that serializes items in the event loop
+        and writes them to the file by the executor of the loop,
+        so file operations never block the event loop.
+
+        Data of items that are exported while the previous data is written
+        are collected in memory and written by the next single call of the executor.
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file that's written by the executor only.
+            If the file has method ``end_item()`` then it's called by the executor after each item
+        max_buffer_size : int
+            Number of collected bytes after which :meth:`export_item` waits for the current write
+            (default: 1 MiB)
+        executor : concurrent.futures.Executor or None
+            Executor of file operations (default: the default executor of the event loop)
+
+        Other parameters are the same as parameters of :class:`FeedItemExporter`
+        """
+        max_buffer_size = kwargs.pop('max_buffer_size', 1 << 20)
+        executor = kwargs.pop('executor', None)
+        if max_buffer_size < 1:
+            raise ValueError('Maximum buffer size must be positive, not {!r}'.format(max_buffer_size))
+        self._buffer = io.BytesIO()
+        super(AsyncFeedItemExporter, self).__init__(self._buffer, *args, **kwargs)
+        self.target_file = file
+        self.max_buffer_size = max_buffer_size
+        self.executor = executor
+        self._chunks = []
+        self._pending_size = 0
+        self._writing = None
+        self._error = None
+
+    async def export_item(self, item):
+        """
+        Serialize the item and schedule its writing
+
+        Parameters
+        ----------
+        item : FeedItem or scrapy.Item
+            Feed item or an item with 'rss' field
+        """
+        super(AsyncFeedItemExporter, self).export_item(item)
+        self.end_item()
+        await self.wait_for_space()
+
+    def end_item(self):
+        """
+        Mark the end of the item data and schedule its writing
+
+        Raises
+        ------
+        Exception
+            If the previous write has failed
+        """
+        if self._error is not None:
+            raise self._error
+        if self._buffer.tell():
+            data = self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+            self._chunks.append(data)
+            self._pending_size += len(data)
+        if self._writing is None and self._chunks:
+            self._start_write()
+
+    async def wait_for_space(self):
+        """
+        Wait until the size of the collected data is less than ``max_buffer_size``
+
+        Raises
+        ------
+        Exception
+            If the write has failed
+        """
+        while self._writing is not None and self._pending_size >= self.max_buffer_size:
+            self._inc_stats('feed/async/stalls')
+            await self._wait_for_write()
+        if self._error is not None:
+            raise self._error
+
+    async def _wait_for_write(self):
+        # unlike awaiting the future itself, it resumes after the done callback of the write
+        # and doesn't cancel the write when the waiting coroutine is cancelled
+        await asyncio.wait([self._writing])
+
+    def _start_write(self):
+        chunks = self._chunks
+        self._chunks = []
+        self._pending_size = 0
+        self._inc_stats('feed/async/writes')
+        # writes are started by coroutines and callbacks of the loop only
+        loop = asyncio.get_running_loop()
+        self._writing = loop.run_in_executor(self.executor, self._write_chunks, chunks)
+        self._writing.add_done_callback(self._write_done)
+
+    def _write_chunks(self, chunks):
+        end_item = getattr(self.target_file, 'end_item', None)
+        if end_item is None:
+            self.target_file.write(b''.join(chunks))
+            return
+        for chunk in chunks:
+            self.target_file.write(chunk)
+            end_item()
+
+    def _write_done(self, future):
+        if future.cancelled():
+            self._error = asyncio.CancelledError()
+        elif future.exception() is not None:
+            # the next data is discarded, the error is raised by the next item
+            self._error = future.exception()
+        if self._error is None and self._chunks:
+            self._start_write()
+        else:
+            self._writing = None
+
+    async def flush(self):
+        """
+        Write all exported data to the file
+
+        Raises
+        ------
+        Exception
+            If the write has failed
+        """
+        self.end_item()
+        while self._writing is not None:
+            await self._wait_for_write()
+        if self._error is not None:
+            raise self._error
+
+    async def finish_exporting(self):
+        for _ in self.iter_retained_items():
+            self.end_item()
+            await self.wait_for_space()
+        await self.flush()
+        super(AsyncFeedItemExporter, self).finish_exporting()
+        # the footer isn't an item, so method end_item() of the file isn't called
+        footer = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.target_file.write, footer)
+
+
+class AsyncFeedExportPipeline(FeedExportPipeline):
+    """
+    Pipeline with coroutine :meth:`process_item` that exports items by :class:`AsyncFeedItemExporter`.
+    FEED_EXPORTER must be subclass of :class:`AsyncFeedItemExporter`
+    """
+    exporter_cls = AsyncFeedItemExporter
+
+    def spider_opened(self, spider=None):
+        spider = self._get_spider(spider)
+        if spider.settings.getbool('FEED_WRITER_THREAD', False):
+            raise NotConfigured('FEED_WRITER_THREAD is not supported by {}, the exporter writes by the executor'
+                             .format(self.__class__.__name__))
+        if spider.settings.getdict('FEED_FORMATS'):
+            raise NotConfigured('FEED_FORMATS is not supported by {}, files of formats are written synchronously'
+                             .format(self.__class__.__name__))
+        super(AsyncFeedExportPipeline, self).spider_opened(spider)
+        exporter = self.exporters[spider]
+        exporter.max_buffer_size = spider.settings.getint('FEED_ASYNC_BUFFER_SIZE', exporter.max_buffer_size)
+        # the exporter marks ends of items itself
+        self.writers.pop(spider, None)
+        pool = self.pools.get(spider)
+        if pool is not None:
+            pool.item_written = exporter.end_item
+
+    async def spider_closed(self, spider=None):
+        spider = self._get_spider(spider)
+        exporter = self.exporters[spider]
+        file = self.files[spider]
+        loop = asyncio.get_running_loop()
+        try:
+            pool = self.pools.pop(spider, None)
+            if pool is not None:
+                try:
+                    pool.drain()
+                finally:
+                    pool.close()
+            await exporter.finish_exporting()
+            await loop.run_in_executor(exporter.executor, file.close)
+        except Exception:
+            await loop.run_in_executor(exporter.executor, self._discard_file, spider, file)
+            raise
+        self.files.pop(spider)
+        await loop.run_in_executor(exporter.executor, self._publish_file, spider)
+
+    async def process_item(self, item, spider=None):
+        spider = self._get_spider(spider)
+        pool = self.pools.get(spider)
+        if pool is not None:
+            pool.submit(item)
+            await wait_for_pool(pool)
+            await self.exporters[spider].wait_for_space()
+        else:
+            await self.exporters[spider].export_item(item)
+        return item
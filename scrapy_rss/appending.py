@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import time
+from xml.parsers import expat
+from xml.sax.saxutils import quoteattr
+
+import six
+
+from .utils import get_timestamp
+from .writers import open_decompressed, COMPRESSION_NONE
+
+
+_TAIL_RE = re.compile(br'</channel>\s*</rss>\s*\Z')
+
+MERGE_KEY_GUID = 'guid'
+MERGE_KEY_LINK = 'link'
+MERGE_KEYS = (MERGE_KEY_GUID, MERGE_KEY_LINK)
+
+
+class _HeadScanned(Exception):
+    """
+    The channel header of the feed has been scanned
+    """
+
+
+class ExistingFeed(object):
+    def __init__(self, path, namespaces, last_build_date_span, tail_offset, tail):
+        """
+        Layout of an existing feed file that's found without parsing its items.
+        Use :meth:`scan` to create it
+
+        Parameters
+        ----------
+        path : str
+            Path of the feed file
+        namespaces : list of (str or None, str)
+            Namespaces (prefix, URI) that are declared by the root and the channel elements
+        last_build_date_span : (int, int) or None
+            Byte offsets of the beginning and the end of the content of the <lastBuildDate> channel element
+        tail_offset : int
+            Byte offset of the closing tag </channel>
+        tail : bytes
+            Closing tags and trailing whitespaces
+        """
+        self.path = path
+        self.namespaces = namespaces
+        self.last_build_date_span = last_build_date_span
+        self.tail_offset = tail_offset
+        self.tail = tail
+
+    @classmethod
+    def scan(cls, path, chunk_size=1 << 16, tail_size=1 << 12):
+        """
+        Scan the channel header before the first item and the closing tags of the feed
+
+        Parameters
+        ----------
+        path : str
+            Path of the feed file
+        chunk_size : int
+            Number of bytes that are parsed at once
+        tail_size : int
+            Number of bytes at the end of the file where the closing tags are searched
+
+        Returns
+        -------
+        ExistingFeed
+
+        Raises
+        ------
+        ValueError
+            If the file isn't an RSS feed with the channel element at the end
+        """
+        namespaces = []
+        elements = []
+        last_build_date = ['rss', 'channel', 'lastBuildDate']
+        # whether the channel is found, byte offsets of the content of <lastBuildDate> and whether it's being parsed
+        state = {'channel': False, 'start': None, 'end': None, 'inside': False}
+        parser = expat.ParserCreate(namespace_separator=' ')
+
+        def start_namespace(prefix, uri):
+            if len(elements) < 2:
+                namespaces.append((prefix, uri))
+
+        def start_element(name, attrs):
+            elements.append(name)
+            if elements == ['rss', 'channel']:
+                state['channel'] = True
+            elif elements == ['rss', 'channel', 'item']:
+                raise _HeadScanned()
+            elif elements == last_build_date and state['end'] is None:
+                state['inside'] = True
+
+        def characters(data):
+            if state['inside'] and state['start'] is None:
+                state['start'] = parser.CurrentByteIndex
+
+        def end_element(name):
+            if state['inside']:
+                state['inside'] = False
+                state['end'] = parser.CurrentByteIndex
+            elements.pop()
+            if len(elements) < 2:
+                raise _HeadScanned()
+
+        parser.StartNamespaceDeclHandler = start_namespace
+        parser.StartElementHandler = start_element
+        parser.CharacterDataHandler = characters
+        parser.EndElementHandler = end_element
+        with open(path, 'rb') as f:
+            try:
+                while True:
+                    data = f.read(chunk_size)
+                    parser.Parse(data, not data)
+                    if not data:
+                        break
+            except _HeadScanned:
+                pass
+            except expat.ExpatError as e:
+                raise ValueError('Feed {} cannot be parsed: {}'.format(path, e))
+            if not state['channel']:
+                raise ValueError('Feed {} has no <rss> root element with the <channel> element'.format(path))
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - tail_size))
+            tail = f.read()
+        match = _TAIL_RE.search(tail)
+        if match is None:
+            raise ValueError('Feed {} does not end with the closing tags </channel></rss>'.format(path))
+        last_build_date_span = (state['start'], state['end']) if state['start'] is not None else None
+        return cls(path, namespaces, last_build_date_span, size - len(tail) + match.start(), match.group())
+
+    def update_last_build_date(self, value):
+        """
+        Overwrite the content of the <lastBuildDate> channel element in place
+
+        Parameters
+        ----------
+        value : bytes
+            Encoded new content
+
+        Returns
+        -------
+        bool
+            Whether the content is overwritten,
+            it's not if the element doesn't exist or its content has a different length
+        """
+        if self.last_build_date_span is None:
+            return False
+        start, end = self.last_build_date_span
+        if end - start != len(value):
+            return False
+        with open(self.path, 'r+b') as f:
+            f.seek(start)
+            f.write(value)
+        return True
+
+    def copy(self, file, last_build_date=None, chunk_size=1 << 16):
+        """
+        Copy the feed without the closing tags to the file,
+        so new items are appended to the copy and the feed itself is kept untouched
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file
+        last_build_date : bytes or None
+            Encoded new content of the <lastBuildDate> channel element of any length,
+            None means the content is copied as it is
+        chunk_size : int
+            Number of bytes that are copied at once
+        """
+        replaced_span = self.last_build_date_span if last_build_date is not None else None
+        with open(self.path, 'rb') as f:
+            if replaced_span is not None:
+                _copy_bytes(f, file, replaced_span[0], chunk_size)
+                file.write(last_build_date)
+                f.seek(replaced_span[1])
+            _copy_bytes(f, file, self.tail_offset - f.tell(), chunk_size)
+
+    def restore(self):
+        """
+        Remove data written after the last item of the feed and restore the closing tags.
+        The feed is modified in place, so it has no closing tags if the process is killed before it
+        """
+        with open(self.path, 'r+b') as f:
+            f.seek(self.tail_offset)
+            f.write(self.tail)
+            f.truncate()
+
+
+def _copy_bytes(source, target, size, chunk_size):
+    while size > 0:
+        data = source.read(min(size, chunk_size))
+        if not data:
+            raise ValueError('Feed {} is truncated'.format(getattr(source, 'name', source)))
+        target.write(data)
+        size -= len(data)
+
+
+class _ChannelParsed(Exception):
+    """
+    The channel of the feed has been parsed
+    """
+
+
+class FeedMerger(object):
+    def __init__(self, path, key=MERGE_KEY_GUID, max_age=0, max_items=0, compression=COMPRESSION_NONE,
+                 chunk_size=1 << 16, clock=time.time, stats=None):
+        """
+        Merger of new items with items of the previous feed.
+        Identifiers of new items are collected in memory,
+        the previous feed is streamed after new items and its items are copied as they are
+        unless they are duplicates, expired or beyond the maximum number of items
+
+        Parameters
+        ----------
+        path : str
+            Path of the previous feed, it must not be overwritten before items are merged
+        key : str
+            Identifier of items:
+            'guid' is the content of <guid> or <link> if the item has no guid,
+            'link' is the content of <link>.
+            Items without the identifier are never duplicates
+        max_age : float
+            Number of seconds since pubDate after which previous items are dropped, 0 means no limit.
+            Items without valid pubDate are kept
+        max_items : int
+            Maximum number of new and previous items, 0 means no limit.
+            New items are never dropped, the rest of the previous feed isn't parsed after the limit is reached
+        compression : str
+            Compression of the previous feed
+        chunk_size : int
+            Number of bytes that are parsed at once
+        clock : callable
+            Source of time in seconds since the epoch
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the merge statistics
+        """
+        if key not in MERGE_KEYS:
+            raise ValueError('Merge key must be one of {}, not {!r}'.format(', '.join(map(repr, MERGE_KEYS)), key))
+        if max_age < 0 or max_items < 0:
+            raise ValueError('Maximum age and number of items must be non-negative numbers')
+        self.path = path
+        self.key = key
+        self.max_age = max_age
+        self.max_items = max_items
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.stats = stats
+        self._clock = clock
+        self._keys = set()
+        self._items = 0
+
+    def _get_key(self, guid, link):
+        if self.key == MERGE_KEY_GUID and guid:
+            return MERGE_KEY_GUID, guid
+        return (MERGE_KEY_LINK, link) if link else None
+
+    def add(self, item):
+        """
+        Register the new item
+
+        Parameters
+        ----------
+        item : FeedItem
+            Prepared item
+        """
+        self._items += 1
+        guid = getattr(getattr(item, 'guid', None), 'value', None)
+        link = getattr(getattr(item, 'link', None), 'value', None)
+        key = self._get_key(guid and six.text_type(guid).strip(), link and six.text_type(link).strip())
+        if key is not None:
+            self._keys.add(key)
+
+    def iter_items(self, root_namespaces=()):
+        """
+        Iterate over items of the previous feed that are kept
+
+        Parameters
+        ----------
+        root_namespaces : iterable of (str or None, str)
+            Namespaces that are declared by the root element of the new feed,
+            other namespaces of the root element of the previous feed are declared by the items
+
+        Returns
+        -------
+        iterator of str
+            XML fragments of items
+        """
+        if not os.path.exists(self.path):
+            return
+        root_namespaces = set(root_namespaces)
+        root_default_ns = any(not ns_prefix for ns_prefix, _ in root_namespaces)
+        min_timestamp = self._clock() - self.max_age if self.max_age else None
+        for raw_item, namespaces, guid, link, pub_date in self._parse():
+            if self.max_items and self._items >= self.max_items:
+                break
+            key = self._get_key(guid, link)
+            if key is not None and key in self._keys:
+                self._inc_stats('feed/merge/duplicates')
+                continue
+            if min_timestamp is not None and pub_date:
+                try:
+                    expired = get_timestamp(pub_date) < min_timestamp
+                except ValueError:
+                    expired = False
+                if expired:
+                    self._inc_stats('feed/merge/expired')
+                    continue
+            # unprefixed elements of the item keep the default namespace of the previous feed or its absence
+            default_ns_undeclared = root_default_ns and not any(not ns_prefix for ns_prefix, _ in namespaces)
+            if key is not None:
+                self._keys.add(key)
+            self._items += 1
+            self._inc_stats('feed/merge/previous_items')
+            declarations = ''.join(' xmlns{}={}'.format(':' + ns_prefix if ns_prefix else '', quoteattr(ns_uri))
+                                   for ns_prefix, ns_uri in namespaces
+                                   if (ns_prefix, ns_uri) not in root_namespaces)
+            if default_ns_undeclared:
+                declarations += ' xmlns=""'
+            # the start tag begins with '<item'
+            yield raw_item[:5] + declarations + raw_item[5:]
+
+    def _parse(self):
+        """
+        Stream the previous feed
+
+        Returns
+        -------
+        iterator of (str, list of (str or None, str), str, str, str)
+            Source text of each item, namespaces of the root and channel elements
+            and contents of <guid>, <link> and <pubDate> of the item
+        """
+        parser = expat.ParserCreate(namespace_separator=' ')
+        elements = []
+        namespaces = []
+        default_ns_uris = set()
+        encoding = ['utf-8']
+        # offset of the current item, texts of its elements and offset of the last reported event
+        item = {'start': None, 'texts': {}, 'last': 0}
+        completed_items = []
+        text_elements = {'guid', 'link', 'pubDate'}
+
+        def xml_declaration(version, xml_encoding, standalone):
+            if xml_encoding:
+                encoding[0] = xml_encoding
+
+        def start_namespace(prefix, uri):
+            if len(elements) < 2:
+                namespaces.append((prefix, uri))
+                if not prefix and uri:
+                    default_ns_uris.add(uri)
+
+        def start_element(name, attrs):
+            ns_uri, _, local_name = name.rpartition(' ')
+            # elements in the default namespace of the root and channel elements are matched by local names
+            if ns_uri in default_ns_uris:
+                name = local_name
+            elements.append(name)
+            item['last'] = parser.CurrentByteIndex
+            if len(elements) == 3 and elements[:2] == ['rss', 'channel'] and name == 'item':
+                item['start'] = parser.CurrentByteIndex
+                item['texts'] = {}
+
+        def characters(data):
+            if item['start'] is not None and len(elements) == 4 and elements[3] in text_elements:
+                texts = item['texts']
+                texts[elements[3]] = texts.get(elements[3], '') + data
+
+        def end_element(name):
+            elements.pop()
+            item['last'] = parser.CurrentByteIndex
+            if len(elements) == 2 and item['start'] is not None:
+                completed_items.append((item['start'], parser.CurrentByteIndex, item['texts']))
+                item['start'] = None
+            elif len(elements) < 2:
+                raise _ChannelParsed()
+
+        parser.XmlDeclHandler = xml_declaration
+        parser.StartNamespaceDeclHandler = start_namespace
+        parser.StartElementHandler = start_element
+        parser.CharacterDataHandler = characters
+        parser.EndElementHandler = end_element
+        buffer = b''
+        buffer_offset = 0
+        with open_decompressed(self.path, self.compression) as f:
+            finished = False
+            while not finished:
+                data = f.read(self.chunk_size)
+                buffer += data
+                try:
+                    parser.Parse(data, not data)
+                    finished = not data
+                except _ChannelParsed:
+                    finished = True
+                except expat.ExpatError:
+                    # items before the error are kept
+                    self._inc_stats('feed/merge/errors')
+                    finished = True
+                for start, end, texts in completed_items:
+                    end = buffer.index(b'>', end - buffer_offset) + 1
+                    raw_item = buffer[start - buffer_offset:end].decode(encoding[0])
+                    yield (raw_item, namespaces, texts.get('guid', '').strip(), texts.get('link', '').strip(),
+                           texts.get('pubDate', '').strip())
+                del completed_items[:]
+                # expat reports events with a delay, so bytes after the last reported event
+                # and the beginning of the unfinished item are kept
+                keep_from = item['start'] if item['start'] is not None else item['last']
+                buffer = buffer[keep_from - buffer_offset:]
+                buffer_offset = keep_from
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import math
+import sqlite3
+import struct
+
+import six
+
+from .meta.element import iter_element_tokens
+
+
+DEDUP_KEY_GUID = 'guid'
+DEDUP_KEY_LINK = 'link'
+DEDUP_KEY_CONTENT = 'content'
+DEDUP_KEYS = (DEDUP_KEY_GUID, DEDUP_KEY_LINK, DEDUP_KEY_CONTENT)
+
+DEDUP_MODE_MEMORY = 'memory'
+DEDUP_MODE_BLOOM = 'bloom'
+DEDUP_MODE_PERSISTENT = 'persistent'
+DEDUP_MODES = (DEDUP_MODE_MEMORY, DEDUP_MODE_BLOOM, DEDUP_MODE_PERSISTENT)
+
+
+def _get_content(item, name):
+    element = getattr(item, name, None)
+    value = getattr(element, 'value', None)
+    return six.text_type(value).strip() if value is not None else ''
+
+
+def get_item_key(item, key=DEDUP_KEY_GUID, fields=('title', 'link', 'description')):
+    """
+    Get the identifier of the item
+
+    Parameters
+    ----------
+    item : FeedItem
+        Feed item
+    key : str
+        One of :data:`DEDUP_KEYS`:
+        'guid' is the content of <guid> or <link> if the item has no guid,
+        'link' is the content of <link>,
+        'content' is a hash of the elements ``fields``
+    fields : iterable of str
+        Names of elements of the item that are hashed by the 'content' key
+
+    Returns
+    -------
+    bytes or None
+        Identifier or None if the item has no identifier
+    """
+    if key == DEDUP_KEY_CONTENT:
+        digest = hashlib.sha1()
+        for name in fields:
+            element = getattr(item, name, None)
+            digest.update(name.encode('utf-8') + b'\0')
+            if element is not None and element.assigned:
+                for token in iter_element_tokens(element):
+                    digest.update(token.encode('utf-8') + b'\0')
+            digest.update(b'\1')
+        return DEDUP_KEY_CONTENT.encode('ascii') + b':' + digest.digest()
+    guid = _get_content(item, DEDUP_KEY_GUID) if key == DEDUP_KEY_GUID else ''
+    if guid:
+        return DEDUP_KEY_GUID.encode('ascii') + b':' + guid.encode('utf-8')
+    link = _get_content(item, DEDUP_KEY_LINK)
+    if link:
+        return DEDUP_KEY_LINK.encode('ascii') + b':' + link.encode('utf-8')
+    return None
+
+
+class MemoryFilter(object):
+    """
+    Exact filter of keys that are kept in memory
+    """
+
+    def __init__(self):
+        self._keys = set()
+
+    def add(self, key):
+        """
+        Add the key
+
+        Parameters
+        ----------
+        key : bytes
+            Identifier of an item
+
+        Returns
+        -------
+        bool
+            Whether the key has already been added
+        """
+        if key in self._keys:
+            return True
+        self._keys.add(key)
+        return False
+
+    def close(self):
+        self._keys = set()
+
+
+class BloomFilter(object):
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        """
+        Probabilistic filter of keys with the fixed memory size.
+        A new key is reported as added with the probability ``error_rate``
+        until the number of keys exceeds ``capacity``, added keys are always reported
+
+        Parameters
+        ----------
+        capacity : int
+            Expected number of keys
+        error_rate : float
+            Probability of false positives for the expected number of keys
+        """
+        if capacity < 1:
+            raise ValueError('Capacity must be positive, not {!r}'.format(capacity))
+        if not 0 < error_rate < 1:
+            raise ValueError('Error rate must be between 0 and 1, not {!r}'.format(error_rate))
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)))
+        self.hashes = max(1, int(round(self.size / float(capacity) * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _iter_positions(self, key):
+        # double hashing simulates independent hash functions
+        first, second = struct.unpack('<QQ', hashlib.md5(key).digest())
+        for number in six.moves.range(self.hashes):
+            yield (first + number * second) % self.size
+
+    def add(self, key):
+        """
+        Add the key
+
+        Parameters
+        ----------
+        key : bytes
+            Identifier of an item
+
+        Returns
+        -------
+        bool
+            Whether the key has probably been added
+        """
+        bits = self._bits
+        added = True
+        for position in self._iter_positions(key):
+            index, mask = position >> 3, 1 << (position & 7)
+            if not bits[index] & mask:
+                added = False
+                bits[index] |= mask
+        return added
+
+    def close(self):
+        self._bits = bytearray(len(self._bits))
+
+
+class PersistentFilter(object):
+    def __init__(self, path, commit_interval=1000):
+        """
+        Exact filter of keys that are stored in the SQLite database and survive runs
+
+        Parameters
+        ----------
+        path : str
+            Path of the database file, it's created if it doesn't exist
+        commit_interval : int
+            Number of new keys after which they are committed,
+            the rest of keys are committed by :meth:`close`
+        """
+        self.path = path
+        self.commit_interval = commit_interval
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS keys (key BLOB PRIMARY KEY)')
+        self._uncommitted = 0
+        self._reserved = set()
+
+    def reserve(self, key):
+        """
+        Reserve the key of an item that's being processed without storing it,
+        the key is stored by :meth:`add` when the item is exported or dropped by :meth:`release`
+
+        Parameters
+        ----------
+        key : bytes
+            Identifier of an item
+
+        Returns
+        -------
+        bool
+            Whether the key has already been reserved in this run or added in this or previous runs
+        """
+        if key in self._reserved:
+            return True
+        cursor = self._connection.execute('SELECT 1 FROM keys WHERE key = ?', (sqlite3.Binary(key),))
+        if cursor.fetchone() is not None:
+            return True
+        self._reserved.add(key)
+        return False
+
+    def release(self, key):
+        """
+        Drop the reservation of the key of an item that hasn't been exported
+
+        Parameters
+        ----------
+        key : bytes
+            Identifier of an item
+        """
+        self._reserved.discard(key)
+
+    def add(self, key):
+        """
+        Add the key
+
+        Parameters
+        ----------
+        key : bytes
+            Identifier of an item
+
+        Returns
+        -------
+        bool
+            Whether the key has already been added in this or previous runs
+        """
+        self._reserved.discard(key)
+        cursor = self._connection.execute('INSERT OR IGNORE INTO keys (key) VALUES (?)', (sqlite3.Binary(key),))
+        if cursor.rowcount < 1:
+            return True
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_interval:
+            self._connection.commit()
+            self._uncommitted = 0
+        return False
+
+    def close(self):
+        self._reserved = set()
+        self._connection.commit()
+        self._connection.close()
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 
+import hashlib
+import heapq
+from contextlib import contextmanager
 from itertools import chain
 from collections import Counter
-from operator import itemgetter
 
 from datetime import datetime
+from xml.sax.saxutils import quoteattr, XMLGenerator
+import six
 import scrapy
 from scrapy.exporters import XmlItemExporter
 
@@ -12,8 +16,80 @@ from .items import RssItem, FeedItem
 from .rss.channel import ChannelElement
 from .rss.old.items import RssItem as OldRssItem
 from .exceptions import *
-from .utils import get_tzlocal, is_strict_subclass, get_full_class_name, deprecated_class
+from .templates import TemplateSerializer
+from .sorting import ExternalSorter
+from .utils import get_tzlocal, get_timestamp, is_strict_subclass, get_full_class_name, deprecated_class
 from . import meta
+from .meta.element import iter_element_tokens
+
+
+VALIDATION_STRICT = 'strict'
+VALIDATION_SAMPLED = 'sampled'
+VALIDATION_TRUSTED = 'trusted'
+VALIDATION_MODES = (VALIDATION_STRICT, VALIDATION_SAMPLED, VALIDATION_TRUSTED)
+
+ENGINE_SAX = 'sax'
+ENGINE_TEMPLATE = 'template'
+ENGINES = (ENGINE_SAX, ENGINE_TEMPLATE)
+
+ATOM_NAMESPACE = 'http://www.w3.org/2005/Atom'
+
+
+class _FeedXMLGenerator(XMLGenerator):
+    def __init__(self, out, encoding='utf-8'):
+        """
+        XML generator that can redirect its output and digest the data written to the output
+
+        Parameters
+        ----------
+        out : file-like
+            Output of the generator
+        encoding : str
+            Encoding of the output
+        """
+        XMLGenerator.__init__(self, out, encoding=encoding)
+        self._output_write = self._write
+        self._write = self._write_output
+        # hash object that's updated with the data written to the output, None means no digest
+        self.digest = None
+
+    def _write_output(self, data):
+        if self.digest is not None:
+            self.digest.update(data.encode(self._encoding) if isinstance(data, six.text_type) else data)
+        self._output_write(data)
+
+    def write(self, data):
+        """
+        Write the raw XML data to the current output
+
+        Parameters
+        ----------
+        data : str
+        """
+        self._write(data)
+
+    @contextmanager
+    def redirect(self, write=None):
+        """
+        Redirect the output within the context
+
+        Parameters
+        ----------
+        write : callable or None
+            Function that takes the written data, None means the data is discarded
+        """
+        output_write = self._write
+        self._write = write if write is not None else (lambda data: None)
+        try:
+            yield
+        finally:
+            self._write = output_write
+
+    def discard_undeclared_namespaces(self):
+        """
+        Discard started namespaces that aren't declared by a start tag yet
+        """
+        self._undeclared_ns_maps = []
 
 
 class FeedItemExporter(XmlItemExporter):
@@ -24,6 +100,9 @@ class FeedItemExporter(XmlItemExporter):
                  generator='Scrapy {}'.format(scrapy.__version__),
                  docs=None, cloud=None, ttl=None, image=None, rating=None, text_input=None,
                  skip_hours=None, skip_days=None,
+                 validation=VALIDATION_STRICT, validation_sample_rate=0.1, stats=None, engine=ENGINE_SAX,
+                 max_items=0, sort_items=False, sort_key=None,
+                 sort_buffer_size=16 << 20, sort_max_fan_in=64, sort_temp_dir=None, merger=None, digest=False,
                  **kwargs):
         """
         RSS parameters semantics: https://validator.w3.org/feed/docs/rss2.html
@@ -34,6 +113,47 @@ class FeedItemExporter(XmlItemExporter):
             predefined XML namespaces {prefix: URI, ...} or [(prefix, URI), ...]
         item_cls : type
             main class of RSS items (default: RssItem)
+        validation : str
+            validation policy of items:
+            'strict' validates each item,
+            'sampled' validates the fraction ``validation_sample_rate`` of items,
+            'trusted' does not validate items
+        validation_sample_rate : float
+            fraction of validated items in the 'sampled' mode, the first item is always validated
+        stats : scrapy.statscollectors.StatsCollector or None
+            collector of the validation statistics
+        engine : str
+            serialization engine of items:
+            'sax' generates XML by SAX events,
+            'template' joins precomputed XML fragments of item classes
+            and falls back to SAX events for items that declare namespaces
+        max_items : int
+            maximum number of exported items, 0 means no limit.
+            If it's positive then only items with the latest pubDate are kept
+            (items without pubDate are the oldest, earlier items win ties),
+            they are kept as serialized fragments and written sorted from the newest one
+            by :meth:`export_retained_items` or :meth:`finish_exporting`
+        sort_items : bool
+            whether all items are written sorted by ``sort_key``
+            by :meth:`export_retained_items` or :meth:`finish_exporting`.
+            Serialized items are spilled to sorted temporary files that are merged at the end,
+            so the number of items isn't limited by memory
+        sort_key : callable or None
+            function that returns a picklable sort key of a prepared item,
+            items are sorted in ascending order of keys, items with equal keys keep their order
+            (default: :func:`latest_first`)
+        sort_buffer_size : int
+            total length of serialized items that are kept in memory before they are spilled
+        sort_max_fan_in : int
+            maximum number of temporary files that are merged at once
+        sort_temp_dir : str or None
+            directory of temporary files (default: the system temporary directory)
+        merger : FeedMerger or None
+            merger that registers prepared items and provides items of the previous feed
+            that are written after new items by :meth:`export_retained_items` or :meth:`finish_exporting`
+        digest : bool
+            whether the digest of the exported content is computed while it's written,
+            see :attr:`content_digest`
 
         Item fields that corresponds to RSS element with attributes or sub-elements,
         must be a dictionary-like such as
@@ -48,6 +168,8 @@ class FeedItemExporter(XmlItemExporter):
         kwargs['root_element'] = 'rss'
         kwargs['item_element'] = 'item'
         super(FeedItemExporter, self).__init__(file, **kwargs)
+        # recent Scrapy versions write to the text wrapper of the file
+        self.xg = _FeedXMLGenerator(getattr(self, 'stream', file), encoding=self.encoding)
 
         self.channel_element_name = 'channel'
         self.channel = ChannelElement()
@@ -96,10 +218,125 @@ class FeedItemExporter(XmlItemExporter):
                 skipped_ns_prefixes.add(ns_prefix)
             else:
                 self._namespaces[ns_prefix] = ns_uri
-        self._started_ns_counter = Counter()
+        # started namespaces {(prefix, URI): number of started scopes}
+        self._started_namespaces = {}
+        # namespaces that are started in the scopes of exported elements
+        self._ns_scopes = []
+        self._root_namespaces = frozenset()
+        # {(element class, attrs only): whether namespaces of elements are declared by the root element}
+        self._declared_namespaces_of_classes = {}
+
+        if validation not in VALIDATION_MODES:
+            raise ValueError("Validation mode must be one of {}, not {!r}"
+                             .format(', '.join(map(repr, VALIDATION_MODES)), validation))
+        if not 0 < validation_sample_rate <= 1:
+            raise ValueError("Validation sample rate must be in range (0, 1], not {!r}"
+                             .format(validation_sample_rate))
+        self.validation = validation
+        self.validation_sample_rate = validation_sample_rate
+        self._validation_credit = 1.0 - validation_sample_rate  # the first item is validated
+        self.stats = stats
+
+        if engine not in ENGINES:
+            raise ValueError("Serialization engine must be one of {}, not {!r}"
+                             .format(', '.join(map(repr, ENGINES)), engine))
+        self.engine = engine
+        self._template_serializer = (TemplateSerializer(self._namespaces.items(), self.encoding)
+                                     if engine == ENGINE_TEMPLATE else None)
+
+        if max_items < 0:
+            raise ValueError('Maximum number of items must be non-negative, not {!r}'.format(max_items))
+        if max_items and sort_items:
+            raise ValueError('Items cannot be both limited and sorted, the latest items are sorted anyway')
+        self.max_items = max_items
+        # min-heap of retained items [(has pubDate, timestamp, -number, fragment), ...]
+        self._retained_items = []
+        self._retained_number = 0
+        self.sort_key = sort_key or latest_first
+        self._sorter = (ExternalSorter(max_buffer_size=sort_buffer_size, max_fan_in=sort_max_fan_in,
+                                       temp_dir=sort_temp_dir, stats=stats)
+                        if sort_items else None)
+        self._merger = merger
+
+        # the opening tags and the channel elements are digested by their values in content_digest,
+        # so the generator digests the data that's written after them
+        self._digest = hashlib.sha256() if digest else None
+
+    @property
+    def content_digest(self):
+        """
+        SHA-256 hex digest of the root namespaces, the channel elements except <lastBuildDate>
+        and the data written after them, so feeds that differ only by the build date have equal digests.
+        None if ``digest`` is disabled
+        """
+        if self._digest is None:
+            return None
+        digest = hashlib.sha256()
+        for ns_prefix, ns_uri in sorted(self._root_namespaces, key=lambda ns: (ns[0] or '', ns[1])):
+            digest.update('{}\0{}\0'.format(ns_prefix or '', ns_uri).encode('utf-8'))
+        for child_name, child in self.channel.assigned_children:
+            if child_name.name == 'lastBuildDate':
+                continue
+            for token in chain([str(child_name), '{'], iter_element_tokens(child), ['}']):
+                digest.update(token.encode('utf-8') + b'\0')
+        digest.update(self._digest.digest())
+        return digest.hexdigest()
+
+    @property
+    def etag(self):
+        """
+        Strong ETag of the content (:attr:`content_digest` in quotes), None if ``digest`` is disabled
+        """
+        content_digest = self.content_digest
+        return None if content_digest is None else '"{}"'.format(content_digest)
+
+    @property
+    def retains_items(self):
+        """
+        Whether items are retained until :meth:`export_retained_items` instead of written immediately
+        """
+        return bool(self.max_items) or self._sorter is not None
+
+    def validate_schema(self):
+        """
+        Check specifications of the item class and the channel class without instances
+
+        Raises
+        ------
+        InvalidComponentError
+            If a component of the specification is invalid
+        """
+        self.channel.__class__.validate_schema(self.channel_element_name)
+        self._item_cls.validate_schema(self.item_element)
+
+    def _must_validate_item(self):
+        """
+        Decide whether the next item is validated according to the validation policy
+
+        Returns
+        -------
+        bool
+        """
+        if self.validation == VALIDATION_STRICT:
+            return True
+        if self.validation == VALIDATION_TRUSTED:
+            return False
+        self._validation_credit += self.validation_sample_rate
+        if self._validation_credit >= 1:
+            self._validation_credit -= 1
+            return True
+        return False
+
+    @staticmethod
+    def _validate_element(instance, name=None):
+        try:
+            instance.validate(name)
+        except InvalidComponentError as e:
+            raise InvalidFeedItemComponentsError(instance, msg=str(e))
 
 
-    def _export_xml_element(self, element, xml_name=None, attrs_only_namespaces=True):
+    def _export_xml_element(self, element, xml_name=None, attrs_only_namespaces=True, validate=True,
+                            namespaces_declared=False):
         """
         Export the element as an XML element
 
@@ -111,6 +348,10 @@ class FeedItemExporter(XmlItemExporter):
             If it's None then export children XML elements only without parent element
         attrs_only_namespaces : bool
             Whether extract namespaces from attributes and itself only
+        validate : bool
+            Whether validate the element, validation includes children elements
+        namespaces_declared : bool
+            Whether all namespaces of the element and its descendants are known to be declared by the root element
         """
         if not isinstance(element, meta.Element):
             raise ValueError('Argument element must be instance of <Element>, not <{}>'
@@ -118,61 +359,205 @@ class FeedItemExporter(XmlItemExporter):
                                      else repr(element)))
 
         if xml_name:
-            namespaces = element.get_namespaces(attrs_only=attrs_only_namespaces)
-            attrs_namespaces = element.get_namespaces(attrs_only=True)
-            new_namespaces = namespaces - set(self._started_ns_counter)
-            count_prefixes = Counter(map(itemgetter(0), new_namespaces))
-            # ignore multiple namespaces with the same prefix
-            new_namespaces = {ns for ns in namespaces
-                              if count_prefixes[ns[0]] == 1
-                              or ns in attrs_namespaces and ns not in self._started_ns_counter}
-            self._started_ns_counter.update(new_namespaces)
+            if namespaces_declared:
+                started_scope = False
+            else:
+                declared = self._are_namespaces_declared(element, attrs_only_namespaces)
+                started_scope = not declared and self._start_ns_scope(element, attrs_only_namespaces)
+                # namespaces of all descendants have been checked
+                namespaces_declared = declared and not attrs_only_namespaces
             qname = '{}:{}'.format(element.ns_prefix, xml_name[1]) if element.ns_prefix else xml_name
 
-            for ns_prefix, ns_uri in new_namespaces:
-                self.xg.startPrefixMapping(ns_prefix, ns_uri)
-
         element_instances = element if isinstance(element, meta.MultipleElements) else (element,)
-        for instance in element_instances:
-            try:
-                instance.validate(xml_name[1] if xml_name else None)
-            except InvalidComponentError as e:
-                raise InvalidFeedItemComponentsError(instance, msg=str(e))
+        try:
+            for instance in element_instances:
+                if validate:
+                    self._validate_element(instance, xml_name[1] if xml_name else None)
 
-            try:
-                attrs = instance.serialize_attrs()
-            except Exception as e:
-                raise InvalidFeedItemComponentsError(instance, msg=str(e))
-            content = attrs.pop(instance.content_name.xml_name, None) if instance.content_name else None
-            if xml_name:
-                self.xg.startElementNS(xml_name, qname, attrs)
-            if content:
-                self.xg.characters(content)
-            for child_name, child in instance.children.items():
-                if child.assigned:
-                    self._export_xml_element(child, child_name.xml_name)
-            if xml_name:
-                self.xg.endElementNS(xml_name, qname)
+                try:
+                    attrs = instance.serialize_attrs()
+                except Exception as e:
+                    raise InvalidFeedItemComponentsError(instance, msg=str(e))
+                content = attrs.pop(instance.content_name.xml_name, None) if instance.content_name else None
+                if xml_name:
+                    self.xg.startElementNS(xml_name, qname, attrs)
+                if content:
+                    self.xg.characters(content)
+                for child_name, child in instance.assigned_children:
+                    self._export_xml_element(child, child_name.xml_name, validate=False,
+                                             namespaces_declared=namespaces_declared)
+                if xml_name:
+                    self.xg.endElementNS(xml_name, qname)
+        finally:
+            # scopes of elements that have failed are ended too, so the next items can be exported
+            if xml_name and started_scope:
+                self._end_ns_scope()
 
-        if xml_name:
-            for ns_prefix, ns_uri in new_namespaces:
-                self.xg.endPrefixMapping(ns_prefix)
-            self._started_ns_counter -= Counter(new_namespaces)
+    def _are_namespaces_declared(self, element, attrs_only):
+        """
+        Check whether all namespaces of the element are declared by the root element.
+        Namespace requirements of the element class are checked at first,
+        then namespaces that are assigned to the instance and its components
+
+        Parameters
+        ----------
+        element : Element
+        attrs_only : bool
+            Whether check namespaces of attributes and element itself only
+
+        Returns
+        -------
+        bool
+        """
+        root_namespaces = self._root_namespaces
+        if element._ns_uri and (element._ns_prefix, element._ns_uri) not in root_namespaces:
+            return False
+        if isinstance(element, meta.MultipleElements):
+            # namespaces of multiple elements include namespaces of all their components
+            return all(self._are_namespaces_declared(instance, False) for instance in element)
+        key = element.__class__, attrs_only
+        declared = self._declared_namespaces_of_classes.get(key)
+        if declared is None:
+            requirements = (element.__class__._attrs_namespaces if attrs_only
+                            else element.__class__._components_namespaces)
+            declared = self._declared_namespaces_of_classes[key] = requirements <= root_namespaces
+        # class requirements don't cover namespaces of instances
+        return declared and root_namespaces.issuperset(element.get_namespaces(attrs_only=attrs_only))
+
+    def _start_ns_scope(self, element, attrs_only):
+        """
+        Start namespaces of the element that haven't been started yet
+
+        Parameters
+        ----------
+        element : Element
+        attrs_only : bool
+            Whether start namespaces of attributes and element itself only
+
+        Returns
+        -------
+        bool
+            Whether a new scope of namespaces is started
+        """
+        started_namespaces = self._started_namespaces
+        namespaces = element.get_namespaces(attrs_only=attrs_only)
+        new_namespaces = [ns for ns in namespaces if ns not in started_namespaces]
+        if not new_namespaces:
+            return False
+        attrs_namespaces = element.get_namespaces(attrs_only=True)
+        count_prefixes = Counter(ns_prefix for ns_prefix, _ in new_namespaces)
+        # ignore multiple namespaces with the same prefix
+        new_namespaces = {ns for ns in namespaces
+                          if count_prefixes[ns[0]] == 1
+                          or ns in attrs_namespaces and ns not in started_namespaces}
+        for ns in new_namespaces:
+            started_namespaces[ns] = started_namespaces.get(ns, 0) + 1
+        for ns_prefix, ns_uri in new_namespaces:
+            self.xg.startPrefixMapping(ns_prefix, ns_uri)
+        self._ns_scopes.append(new_namespaces)
+        return True
+
+    def _end_ns_scope(self):
+        """
+        End namespaces of the last started scope
+        """
+        started_namespaces = self._started_namespaces
+        # namespaces of an element that has failed before its start tag aren't declared
+        self.xg.discard_undeclared_namespaces()
+        for ns in self._ns_scopes.pop():
+            self.xg.endPrefixMapping(ns[0])
+            if started_namespaces[ns] > 1:
+                started_namespaces[ns] -= 1
+            else:
+                del started_namespaces[ns]
 
 
     def start_exporting(self):
+        self._start_root(self._namespaces.items())
+        self._export_xml_element(self.channel)
+        self.xg.digest = self._digest
+
+    def resume_exporting(self, root_namespaces):
+        """
+        Continue exporting to the end of the channel of an existing feed.
+        The opening tags and the channel elements aren't written,
+        items declare namespaces that aren't declared by the existing root element themselves
+
+        Parameters
+        ----------
+        root_namespaces : iterable of (str or None, str)
+            Namespaces (prefix, URI) that are declared by the root element of the existing feed
+
+        Returns
+        -------
+        list of (str or None, str)
+            Namespaces of the exporter that aren't declared by the existing root element
+        """
+        root_namespaces = set(root_namespaces)
+        declared = [ns for ns in self._namespaces.items() if ns in root_namespaces]
+        with self.xg.redirect():
+            self._start_root(declared)
+        if self._template_serializer is not None:
+            self._template_serializer = TemplateSerializer(declared, self.encoding)
+        self.xg.digest = self._digest
+        return [ns for ns in self._namespaces.items() if ns not in root_namespaces]
+
+    def _start_root(self, namespaces):
+        """
+        Start the document, the root element declaring the namespaces and the channel element
+        """
+        namespaces = list(namespaces)
         self.xg.startDocument()
 
-        for ns_prefix, ns_uri in self._namespaces.items():
+        for ns_prefix, ns_uri in namespaces:
             self.xg.startPrefixMapping(ns_prefix, ns_uri)
-        self._started_ns_counter.update(self._namespaces.items())
+        self._started_namespaces.update(dict.fromkeys(namespaces, 1))
+        self._root_namespaces = frozenset(namespaces)
+        self._declared_namespaces_of_classes.clear()
 
         root_attrs = {(None, 'version'): '2.0'}
         self.xg.startElementNS((None, self.root_element), self.root_element, root_attrs)
         self.xg.startElement(self.channel_element_name, {})
-        self._export_xml_element(self.channel)
 
     def export_item(self, item):
+        self.export_prepared_item(self.prepare_item(item))
+
+    def export_prepared_item(self, item):
+        """
+        Write the prepared item to the file or retain it if ``max_items`` or ``sort_items`` is set
+
+        Parameters
+        ----------
+        item : FeedItem
+            Item returned by :meth:`prepare_item`
+        """
+        if self.retains_items:
+            self._retain_item(item)
+        else:
+            self._write_item(item)
+        self._register_merged_item(item)
+
+    def prepare_item(self, item):
+        """
+        Check the item type and validate the item according to the validation policy
+
+        Parameters
+        ----------
+        item : FeedItem or scrapy.Item
+            Feed item or an item with 'rss' field
+
+        Returns
+        -------
+        FeedItem
+            Feed item that's ready to be serialized
+
+        Raises
+        ------
+        InvalidFeedItemError
+            If the item type is not supported
+        InvalidFeedItemComponentsError
+            If the item is validated and it's invalid
+        """
         if (not isinstance(item, self._allowed_item_classes)
                 and not isinstance(getattr(item, 'rss', None), RssItem)):
             raise InvalidFeedItemError("Item must be type {} or have 'rss' field of type 'RssItem'"
@@ -180,18 +565,244 @@ class FeedItemExporter(XmlItemExporter):
         if not isinstance(item, self._allowed_item_classes):
             item = item.rss
 
-        self._export_xml_element(item, (None, self.item_element), attrs_only_namespaces=False)
+        if self._must_validate_item():
+            self._inc_stats('feed/validation/validated')
+            try:
+                self._validate_element(item, self.item_element)
+            except InvalidFeedItemComponentsError:
+                self._inc_stats('feed/validation/failed')
+                raise
+        return item
+
+    def _register_merged_item(self, item):
+        """
+        Register the exported item in the merger,
+        so items that have failed aren't replaced in the previous feed
+        """
+        if self._merger is not None:
+            self._merger.add(item)
+
+    def serialize_item(self, item):
+        """
+        Serialize the prepared item into an XML fragment without writing it to the file.
+        The fragment is the same as the output of :meth:`export_item` in the current state of the exporter
+
+        Parameters
+        ----------
+        item : FeedItem
+            Item returned by :meth:`prepare_item`
+
+        Returns
+        -------
+        str
+            XML fragment
+        """
+        fragments = []
+        with self.xg.redirect(fragments.append):
+            self._write_item(item)
+        return ''.join(fragments)
+
+    def export_fragment(self, fragment, item=None):
+        """
+        Write the XML fragment returned by :meth:`serialize_item` to the file
+
+        Parameters
+        ----------
+        fragment : str
+        item : FeedItem or None
+            Prepared item of the fragment,
+            the fragment is retained instead of written if ``max_items`` or ``sort_items`` is set
+        """
+        if item is not None and self.retains_items:
+            self._retain_item(item, fragment)
+        else:
+            self.xg.write(fragment)
+        if item is not None:
+            self._register_merged_item(item)
+
+    def _retain_item(self, item, fragment=None):
+        """
+        Keep the serialized item if it's one of ``max_items`` latest items or all items are sorted
+        """
+        if self._sorter is not None:
+            self._sorter.add(self.sort_key(item), self.serialize_item(item) if fragment is None else fragment)
+            return
+        timestamp = get_pub_timestamp(item)
+        self._retained_number += 1
+        key = ((False, 0.0) if timestamp is None else (True, timestamp)) + (-self._retained_number,)
+        retained_items = self._retained_items
+        full = len(retained_items) >= self.max_items
+        if full:
+            # either the item or the oldest retained item is dropped
+            self._inc_stats('feed/max_items/dropped')
+            if key < retained_items[0][:3]:
+                # the item is older than all retained items, so it isn't even serialized
+                return
+        if fragment is None:
+            fragment = self.serialize_item(item)
+        if full:
+            heapq.heapreplace(retained_items, key + (fragment,))
+        else:
+            heapq.heappush(retained_items, key + (fragment,))
+
+    def export_retained_items(self, item_written=None):
+        """
+        Write items retained because of ``max_items`` or ``sort_items`` to the file in their order
+        and then items of the previous feed if ``merger`` is set
+
+        Parameters
+        ----------
+        item_written : callable or None
+            Function that's called after each item is written
+        """
+        for _ in self.iter_retained_items():
+            if item_written is not None:
+                item_written()
+
+    def iter_retained_items(self):
+        """
+        Write retained items and then items of the previous feed to the file one by one
+
+        Returns
+        -------
+        iterator
+            Iterator that writes the next item on each step
+        """
+        if self._sorter is not None:
+            try:
+                for fragment in self._sorter:
+                    self.xg.write(fragment)
+                    yield
+            finally:
+                self._sorter.close()
+        else:
+            retained_items = sorted(self._retained_items, reverse=True)
+            self._retained_items = []
+            for retained_item in retained_items:
+                self.xg.write(retained_item[-1])
+                yield
+        if self._merger is not None:
+            # items of the previous feed follow new items
+            merger, self._merger = self._merger, None
+            for fragment in merger.iter_items(self._root_namespaces):
+                self.xg.write(fragment)
+                yield
+
+    def discard_retained_items(self):
+        """
+        Discard retained items and remove temporary files of sorting
+        """
+        self._retained_items = []
+        if self._sorter is not None:
+            self._sorter.close()
+
+    def serialize_header(self):
+        """
+        Start exporting like :meth:`start_exporting`, but return the opening tags and the channel elements
+        instead of writing them to the file
+
+        Returns
+        -------
+        str
+            XML fragment
+        """
+        fragments = []
+        with self.xg.redirect(fragments.append):
+            self.start_exporting()
+        return ''.join(fragments)
+
+    def serialize_footer(self):
+        """
+        Serialize the closing tags that are written by :meth:`finish_exporting`
+        without changing the state of the exporter
+
+        Returns
+        -------
+        str
+            XML fragment
+        """
+        fragments = []
+        with self.xg.redirect(fragments.append):
+            self.xg.endElement(self.channel_element_name)
+            self.xg.endElementNS((None, self.root_element), self.root_element)
+        return ''.join(fragments)
+
+    @staticmethod
+    def serialize_links(links):
+        """
+        Serialize links between feed documents (RFC 5005) into <atom:link> channel elements.
+        Each element declares the Atom namespace itself, so the fragment is valid at any place of the channel
+
+        Parameters
+        ----------
+        links : iterable of (str, str)
+            Pairs (relation, URL) such as ('next', 'http://example.com/feed.2.rss')
+
+        Returns
+        -------
+        str
+            XML fragment
+        """
+        return ''.join('<atom:link xmlns:atom={} rel={} href={}/>'
+                       .format(quoteattr(ATOM_NAMESPACE), quoteattr(rel), quoteattr(href))
+                       for rel, href in links)
+
+    def _write_item(self, item):
+        if self._template_serializer is not None:
+            xml = self._template_serializer.serialize(item, (None, self.item_element))
+            if xml is not None:
+                self.xg.write(xml)
+                return
+        self._export_xml_element(item, (None, self.item_element), attrs_only_namespaces=False, validate=False)
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
 
 
     def finish_exporting(self):
+        self.export_retained_items()
         self.xg.endElement(self.channel_element_name)
         self.xg.endElementNS((None, self.root_element), self.root_element)
-        for ns_prefix, ns_uri in self._namespaces.items():
+        for ns_prefix, ns_uri in self._root_namespaces:
             self.xg.endPrefixMapping(ns_prefix)
-        self._started_ns_counter -= Counter(self._namespaces.items())
+        self._started_namespaces.clear()
         self.xg.endDocument()
 
 
+def get_pub_timestamp(item):
+    """
+    Get publication date of the item
+
+    Parameters
+    ----------
+    item : FeedItem
+
+    Returns
+    -------
+    float or None
+        Number of seconds since the epoch or None if the item doesn't have pubDate
+    """
+    pub_date = getattr(getattr(item, 'pubDate', None), 'value', None)
+    return None if pub_date is None else get_timestamp(pub_date)
+
+
+def latest_first(item):
+    """
+    Sort key of items from the latest pubDate, items without pubDate are the last
+
+    Parameters
+    ----------
+    item : FeedItem
+
+    Returns
+    -------
+    tuple
+    """
+    timestamp = get_pub_timestamp(item)
+    return (1, 0.0) if timestamp is None else (0, -timestamp)
+
+
 @deprecated_class('Use FeedItemExporter instead')
 class RssItemExporter(FeedItemExporter):
     pass
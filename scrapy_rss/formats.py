@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import hashlib
+import json
+
+import six
+
+from .meta.element import iter_element_tokens
+from .utils import format_rfc3339
+
+
+FORMAT_JSON_FEED = 'json'
+
+JSON_FEED_VERSION = 'https://jsonfeed.org/version/1.1'
+
+
+def _get_text(element):
+    value = getattr(element, 'value', None) if element is not None and element.assigned else None
+    return None if value is None else six.text_type(value)
+
+
+class JsonFeedExporter(object):
+    def __init__(self, file, channel, feed_url=None, encoding='utf-8', stats=None):
+        """
+        Exporter of prepared feed items into JSON Feed 1.1: https://www.jsonfeed.org/version/1.1/.
+        Items aren't validated, they are streamed to the file one by one.
+
+        Channel elements are mapped to the top-level fields:
+        title to 'title', link to 'home_page_url', description to 'description',
+        URL of image to 'icon', managingEditor to 'authors' and language to 'language'.
+        Item elements are mapped to the item fields:
+        guid (link or a hash of the item if there is no guid) to 'id', link to 'url', title to 'title',
+        description to 'content_html', pubDate to 'date_published', author to 'authors',
+        categories to 'tags' and enclosure to 'attachments'.
+        Other elements have no counterparts in JSON Feed and they are skipped
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file
+        channel : ChannelElement
+            Channel of the feed
+        feed_url : str or None
+            URL of the JSON feed
+        encoding : str
+            Encoding of the file
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the number of exported items
+        """
+        self.file = file
+        self.channel = channel
+        self.feed_url = feed_url
+        self.encoding = encoding
+        self.stats = stats
+        self._items = 0
+
+    def _dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    def _write(self, data):
+        self.file.write(data.encode(self.encoding))
+
+    def serialize_channel(self):
+        """
+        Map the channel to the top-level fields of the feed
+
+        Returns
+        -------
+        OrderedDict
+        """
+        channel = self.channel
+        feed = OrderedDict([('version', JSON_FEED_VERSION), ('title', _get_text(channel.title))])
+        home_page_url = _get_text(channel.link)
+        if home_page_url:
+            feed['home_page_url'] = home_page_url
+        if self.feed_url:
+            feed['feed_url'] = self.feed_url
+        description = _get_text(channel.description)
+        if description:
+            feed['description'] = description
+        icon = _get_text(channel.image.url) if channel.image.assigned else None
+        if icon:
+            feed['icon'] = icon
+        editor = _get_text(channel.managingEditor)
+        if editor:
+            feed['authors'] = [{'name': editor}]
+        language = _get_text(channel.language)
+        if language:
+            feed['language'] = language
+        return feed
+
+    def serialize_item(self, item):
+        """
+        Map the prepared feed item to the fields of the JSON Feed item
+
+        Parameters
+        ----------
+        item : FeedItem
+            Item returned by :meth:`FeedItemExporter.prepare_item`
+
+        Returns
+        -------
+        OrderedDict
+        """
+        url = _get_text(getattr(item, 'link', None))
+        item_id = _get_text(getattr(item, 'guid', None)) or url
+        if not item_id:
+            # JSON Feed items must have an identifier, equal items have equal identifiers
+            digest = hashlib.sha1()
+            for token in iter_element_tokens(item):
+                digest.update(token.encode('utf-8') + b'\0')
+            item_id = 'urn:sha1:{}'.format(digest.hexdigest())
+        fields = OrderedDict([('id', item_id)])
+        if url:
+            fields['url'] = url
+        title = _get_text(getattr(item, 'title', None))
+        if title is not None:
+            fields['title'] = title
+        # JSON Feed items must have a content
+        fields['content_html'] = _get_text(getattr(item, 'description', None)) or ''
+        pub_date = getattr(item, 'pubDate', None)
+        if pub_date is not None and pub_date.assigned:
+            fields['date_published'] = format_rfc3339(pub_date.value)
+        author = _get_text(getattr(item, 'author', None))
+        if author:
+            fields['authors'] = [{'name': author}]
+        tags = [_get_text(category) for category in getattr(item, 'category', ())]
+        if tags:
+            fields['tags'] = tags
+        enclosure = getattr(item, 'enclosure', None)
+        if enclosure is not None and enclosure.assigned:
+            attachment = OrderedDict([('url', six.text_type(enclosure.url)),
+                                      ('mime_type', six.text_type(enclosure.type))])
+            try:
+                attachment['size_in_bytes'] = int(enclosure.length)
+            except (TypeError, ValueError):
+                pass
+            fields['attachments'] = [attachment]
+        return fields
+
+    def start_exporting(self):
+        header = self._dumps(self.serialize_channel())
+        # items follow the top-level fields
+        self._write(header[:-1] + ',"items":[')
+
+    def export_item(self, item):
+        """
+        Write the prepared feed item to the file
+
+        Parameters
+        ----------
+        item : FeedItem
+            Item returned by :meth:`FeedItemExporter.prepare_item`
+        """
+        self._write((',' if self._items else '') + self._dumps(self.serialize_item(item)))
+        self._items += 1
+        if self.stats is not None:
+            self.stats.inc_value('feed/formats/json/items')
+
+    def finish_exporting(self):
+        self._write(']}\n')
+
+
+FORMATS = {
+    FORMAT_JSON_FEED: JsonFeedExporter,
+}
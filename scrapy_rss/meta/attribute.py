@@ -2,12 +2,17 @@
 
 import re
 
-from .nscomponent import BaseNSComponent
+from copy import deepcopy
+
+from .nscomponent import BaseNSComponent, _IMMUTABLE_TYPES, _cloned_slotnames
 from ..exceptions import InvalidComponentError
 from ..utils import deprecated_class
 
 
 class ElementAttribute(BaseNSComponent):
+    __slots__ = ('_ns_prefix', '_ns_uri', '_required', '_is_content', 'serializer', '_value', '_owner')
+    _components_state = frozenset(('_owner',))  # weak reference to the element of the attribute isn't cloned
+
     def __init__(self, value=None, serializer=str,
                  required=False, is_content=False, **kwargs):
         """
@@ -30,7 +35,16 @@ class ElementAttribute(BaseNSComponent):
         self._required = required
         self._is_content = is_content
         self.serializer = serializer
-        self.value = value
+        self._value = value
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        self._invalidate_state()
 
     @property
     def required(self):
@@ -54,7 +68,7 @@ class ElementAttribute(BaseNSComponent):
 
     @property
     def assigned(self):
-        return self.value is not None
+        return self._value is not None
 
     @property
     def settings(self):
@@ -67,6 +81,27 @@ class ElementAttribute(BaseNSComponent):
     def clear(self):
         self.value = None
 
+    def _invalidate_state(self):
+        owner = getattr(self, '_owner', None)
+        element = owner() if owner is not None else None
+        if element is not None:
+            element._invalidate_state()
+
+    def _copy_state(self, clone):
+        if getattr(self, '__dict__', None) or _cloned_slotnames(self.__class__) != _CLONED_SLOTNAMES:
+            super(ElementAttribute, self)._copy_state(clone)
+            return
+        # attributes without extra state are copied directly
+        setter = object.__setattr__
+        setter(clone, '_ns_prefix', self._ns_prefix)
+        setter(clone, '_ns_uri', self._ns_uri)
+        setter(clone, '_required', self._required)
+        setter(clone, '_is_content', self._is_content)
+        serializer = self.serializer
+        setter(clone, 'serializer', serializer if serializer.__class__ in _IMMUTABLE_TYPES else deepcopy(serializer))
+        value = self._value
+        setter(clone, '_value', value if value.__class__ in _IMMUTABLE_TYPES else deepcopy(value))
+
     def get_namespaces(self, assigned_only=True):
         """
         Get namespaces of the attribute
@@ -87,13 +122,13 @@ class ElementAttribute(BaseNSComponent):
 
     def __repr__(self):
         super_repr = super(ElementAttribute, self).__repr__()
-        if (not hasattr(self, 'value') or not hasattr(self, 'serializer')
+        if (not hasattr(self, '_value') or not hasattr(self, 'serializer')
                 or not hasattr(self, '_required') or not hasattr(self, '_is_content')):
             return super_repr
         s_match = re.match(r'^[^(]+\((.*?)\)$', super_repr)
         s_repr = ", " + s_match.group(1) if s_match else ''
         return "{}(value={!r}, serializer={!r}, required={!r}, is_content={!r}{})"\
-            .format(self.__class__.__name__, self.value, self.serializer,
+            .format(self.__class__.__name__, self._value, self.serializer,
                     self._required, self._is_content, s_repr)
 
     def validate(self, name=None):
@@ -102,7 +137,12 @@ class ElementAttribute(BaseNSComponent):
             raise InvalidComponentError(self, name, "required value is not assigned")
 
 
+# slots of attributes without extra state that're copied to clones
+_CLONED_SLOTNAMES = tuple(name for name in ElementAttribute.__slots__
+                          if name not in ElementAttribute._components_state)
+
+
 # backward compatibility
 @deprecated_class("Use ElementAttribute class instead")
 class ItemElementAttribute(ElementAttribute):
-    pass
+    __slots__ = ()
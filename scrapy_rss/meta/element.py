@@ -3,20 +3,196 @@
 from copy import deepcopy
 import re
 from itertools import chain
+from operator import attrgetter
+import weakref
 
 import six
 
 from .attribute import ElementAttribute
-from .nscomponent import BaseNSComponent, NSComponentName
+from .nscomponent import BaseNSComponent, NSComponentName, _IMMUTABLE_TYPES, _set_state
 from ..exceptions import InvalidComponentNameError, InvalidComponentError, InvalidElementValueError, InvalidAttributeValueError
 from ..utils import Mapping, Iterable, object_to_list, deprecated_class, deprecated_func
 
 
+class _ChildDescriptor(object):
+    """
+    Child element of an element instance that's created on first access
+    """
+    __slots__ = ('name', 'prototype')
+
+    def __init__(self, name, prototype):
+        """
+        Parameters
+        ----------
+        name : NSComponentName
+            Name of the child element
+        prototype : Element
+            Class-level child element
+        """
+        self.name = name
+        self.prototype = prototype
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self.prototype
+        children = instance._children
+        try:
+            return children[self.name]
+        except KeyError:
+            # concurrent readers get the same child
+            child = children.setdefault(self.name, self.prototype._clone())
+            _add_parent(child, instance)
+            return child
+
+    def __set__(self, instance, value):
+        instance._children[self.name] = value
+        _add_parent(value, instance)
+
+
+class _ChildrenView(Mapping):
+    """
+    All children elements of an element instance.
+    Child element is created on first access
+    """
+    __slots__ = ('_element',)
+
+    def __init__(self, element):
+        self._element = element
+
+    def __getitem__(self, name):
+        if name not in self._element.__class__._children:
+            raise KeyError(name)
+        return getattr(self._element, name.priv_name)
+
+    def __contains__(self, name):
+        return name in self._element.__class__._children
+
+    def __iter__(self):
+        return iter(self._element.__class__._children)
+
+    def __len__(self):
+        return len(self._element.__class__._children)
+
+    def __repr__(self):
+        return repr(dict(self._element._iter_children()))
+
+
+def _state_cache(element):
+    """
+    Get the derived state of an element that's kept until the element or any of its descendants is mutated
+
+    Parameters
+    ----------
+    element : Element
+
+    Returns
+    -------
+    dict
+        Cached values of the element state
+    """
+    cache = element._cache
+    if cache is None:
+        cache = {}
+        object.__setattr__(element, '_cache', cache)
+    return cache
+
+
+def _add_parent(element, parent):
+    """
+    Register the parent element whose derived state depends on the element.
+    Elements keep weak references to parents, so an element can be shared by several parents
+    without reference cycles
+
+    Parameters
+    ----------
+    element : Element
+    parent : Element
+    """
+    parent_ref = weakref.ref(parent)
+    parents = element._parents
+    if parent_ref not in parents:
+        object.__setattr__(element, '_parents',
+                           tuple(ref for ref in parents if ref() is not None) + (parent_ref,))
+
+
+def _adopt_components(element):
+    """
+    Register the element as the owner of its attributes and the parent of its children
+
+    Parameters
+    ----------
+    element : Element
+    """
+    element_ref = weakref.ref(element)
+    for attr in element._attrs.values():
+        attr._owner = element_ref
+    for child in element._children.values():
+        object.__setattr__(child, '_parents', (element_ref,))
+
+
+def _element_assigned(element):
+    if element._assigned:
+        return True
+    children = element._children
+    if not children:
+        return False
+    cache = _state_cache(element)
+    assigned = cache.get('assigned')
+    if assigned is None:
+        assigned = cache['assigned'] = any(child.assigned for child in children.values())
+    return assigned
+
+
+_attribute_validate = six.get_unbound_function(ElementAttribute.validate)
+
+
+def _name_path(name, comp_name):
+    """
+    Build name path of a component.
+    It's used to report an invalid component only
+
+    Parameters
+    ----------
+    name : str or NSComponentName or Iterable[str or NSComponentName] or None
+        Name path of the parent component
+    comp_name : str or NSComponentName
+        Name of the component
+
+    Returns
+    -------
+    list of (str or NSComponentName)
+    """
+    name_path = object_to_list(name)
+    name_path.append(comp_name)
+    return name_path
+
+
+def _slot_name(comp_priv_name):
+    """
+    Get name of a slot that stores a component.
+    Private names cannot be used for slots directly since they are mangled
+
+    Parameters
+    ----------
+    comp_priv_name : str
+        Private name of an attribute or child element
+
+    Returns
+    -------
+    str
+        Slot name
+    """
+    return '_slot' + comp_priv_name
+
+
 class ElementMeta(type):
     _blacklisted_comp_names = frozenset((
         '_attrs', 'attrs', '_children', 'children', '_required_attrs', 'required_attrs',
         '_required_children', 'required_children', '_content_name', 'content_name',
-        '_required', 'required', '_assigned', 'assigned', 'base_element_cls'
+        '_required', 'required', '_assigned', 'assigned', 'base_element_cls',
+        '_construction_plan', '_eager_children', '_components_state', 'assigned_children',
+        '_known_names', '_attrs_prototypes', '_children_prototypes', '_cache', '_parents',
+        '_validation_plan', '_attrs_namespaces', '_components_namespaces'
     ))
 
     def __new__(mcs, cls_name, cls_bases, cls_attrs):
@@ -24,12 +200,13 @@ class ElementMeta(type):
             if isinstance(comp_value, ElementAttribute) or isinstance(comp_value.__class__, ElementMeta):
                 mcs._check_name(comp_name)
 
-        cls_attrs['_attrs'] = {}
-        cls_attrs['_children'] = {}
+        cls_attrs = dict(cls_attrs)
+        attrs = {}
+        children = {}
         for cls_base in reversed(cls_bases):
             if isinstance(cls_base, ElementMeta):
-                cls_attrs['_attrs'].update(cls_base._attrs)
-                cls_attrs['_children'].update(cls_base._children)
+                attrs.update(cls_base._attrs)
+                children.update(cls_base._children)
                 for comp_name, comp_value in cls_base.__dict__.items():
                     if (isinstance(comp_value.__class__, ElementMeta)
                             or isinstance(comp_value, ElementAttribute)):
@@ -43,32 +220,60 @@ class ElementMeta(type):
         if sum(attr.is_content for attr in elem_attrs.values()) > 1:
             raise ValueError("More than one attributes that's interpreted as content in the element '{}' specification"
                              .format(cls_name))
-        cls_attrs['_attrs'].update(elem_attrs)
+        attrs.update(elem_attrs)
 
-        children = {NSComponentName(elem_name, ns_prefix=elem_descr.ns_prefix, ns_uri=elem_descr.ns_uri):
-                    elem_descr for elem_name, elem_descr in cls_attrs.items()
-                    if isinstance(elem_descr.__class__, ElementMeta) and not elem_name.startswith('__')}
-        for elem_name, elem in children.items():
+        elem_children = {NSComponentName(elem_name, ns_prefix=elem_descr.ns_prefix, ns_uri=elem_descr.ns_uri):
+                         elem_descr for elem_name, elem_descr in cls_attrs.items()
+                         if isinstance(elem_descr.__class__, ElementMeta) and not elem_name.startswith('__')}
+        for elem_name, elem in elem_children.items():
             if not elem.ns_prefix:
                 elem.ns_prefix = elem_name.ns_prefix
-        cls_attrs['_children'].update(children)
-
-        cls_attrs.update({comp_name.priv_name: comp_descr
-                          for comp_name, comp_descr in chain(elem_attrs.items(), children.items())})
-        cls_attrs.update({comp_name.pub_name:
-                          property(_build_component_getter(comp_name),
-                                   _build_component_setter(comp_name))
-                          for comp_name in chain(elem_attrs, children)})
+        children.update(elem_children)
+
+        # attributes of classes with __slots__ are stored in slots instead of instance dictionary
+        slotted_attr_names = []
+        if '__slots__' in cls_attrs:
+            slots = cls_attrs['__slots__']
+            slots = [slots] if isinstance(slots, six.string_types) else list(slots)
+            slotted_attr_names = [attr_name for attr_name in elem_attrs
+                                  if not any(hasattr(cls_base, _slot_name(attr_name.priv_name))
+                                             for cls_base in cls_bases)]
+            slots.extend(_slot_name(attr_name.priv_name) for attr_name in slotted_attr_names)
+            cls_attrs['__slots__'] = tuple(slots)
+
+        cls_attrs.update({attr_name.priv_name: attr_descr
+                          for attr_name, attr_descr in elem_attrs.items()
+                          if attr_name not in slotted_attr_names})
+        # children elements are stored in the instance dictionary of children only
+        cls_attrs.update({elem_name.priv_name: _ChildDescriptor(elem_name, elem_descr)
+                          for elem_name, elem_descr in elem_children.items()})
+        cls_attrs.update({attr_name.pub_name: property(*_build_attribute_accessors(attr_name))
+                          for attr_name in elem_attrs})
+        cls_attrs.update({elem_name.pub_name: property(*_build_child_accessors(elem_name, elem_descr))
+                          for elem_name, elem_descr in elem_children.items()})
+
+        cls = super(ElementMeta, mcs).__new__(mcs, cls_name, cls_bases, cls_attrs)
+
+        for attr_name in slotted_attr_names:
+            setattr(cls, attr_name.priv_name, cls.__dict__[_slot_name(attr_name.priv_name)])
+        cls._attrs_prototypes = attrs
+        cls._children_prototypes = children
+        return cls
+
+    # class-level components are accessed by the same names as components of instances,
+    # but instances store them in slots
+    @property
+    def _attrs(cls):
+        return cls._attrs_prototypes
 
-        return super(ElementMeta, mcs).__new__(mcs, cls_name, cls_bases, cls_attrs)
+    @property
+    def _children(cls):
+        return cls._children_prototypes
 
     def __init__(cls, cls_name, cls_bases, cls_attrs):
-        cls._assigned = False
-        cls.assigned = property(
-            lambda self: self._assigned or any(child.assigned for child in self._children.values())
-        )
+        cls.assigned = property(_element_assigned)
         cls.attrs = property(lambda self: self._attrs) # Attributes dict
-        cls.children = property(lambda self: self._children) # children elements dict
+        cls.children = property(lambda self: _ChildrenView(self)) # children elements mapping
 
         cls._required_attrs = {attr_name
                                for attr_name, attr_descr in cls._attrs.items()
@@ -91,13 +296,51 @@ class ElementMeta(type):
                 (lambda self: self._content_name)
         )
 
+        # construction plan: (name, private name, prototype) of each attribute
+        cls._construction_plan = tuple((attr_name, attr_name.priv_name, attr_descr)
+                                       for attr_name, attr_descr in cls._attrs.items())
+        # children with predefined values are created with an element,
+        # other children are created on first access
+        cls._eager_children = {elem_name: elem_descr
+                               for elem_name, elem_descr in cls._children.items()
+                               if elem_descr.assigned}
+        # validation plan: attributes as (name, private name, whether attribute class overrides validation)
+        # and children as (name, private name, whether child is required) in the order of declaration
+        cls._validation_plan = (
+            tuple((attr_name, attr_name.priv_name,
+                   six.get_unbound_function(attr_descr.__class__.validate) is not _attribute_validate)
+                  for attr_name, attr_descr in cls._attrs.items()),
+            tuple((elem_name, elem_name.priv_name, elem_descr.required)
+                  for elem_name, elem_descr in cls._children.items())
+        )
+        # namespace requirements: namespaces of attributes
+        # and namespaces of all components that can be descendants of an element
+        cls._attrs_namespaces = frozenset(chain.from_iterable(
+            BaseNSComponent.get_namespaces(attr_descr) for attr_descr in cls._attrs.values()
+        ))
+        components_namespaces = set(cls._attrs_namespaces)
+        for elem_descr in cls._children.values():
+            components_namespaces.update(BaseNSComponent.get_namespaces(elem_descr))
+            child_cls = (elem_descr.base_element_cls if isinstance(elem_descr, MultipleElements)
+                         else elem_descr.__class__)
+            components_namespaces.update(child_cls._components_namespaces)
+        cls._components_namespaces = frozenset(components_namespaces)
+        cls._components_state = frozenset(chain(
+            ('_attrs', '_children', '_cache', '_parents'),
+            (attr_priv_name for _, attr_priv_name, _ in cls._construction_plan),
+            (_slot_name(attr_priv_name) for _, attr_priv_name, _ in cls._construction_plan)
+        ))
+
         cls.serialize_attrs = lambda self: {
-            attr_name.xml_name: attr.serializer(attr.value)
+            attr_name.xml_name: attr.serializer(attr._value)
             for attr_name in self.attrs
             for attr in (getattr(self, attr_name.priv_name),)
             if attr.assigned
         }
 
+        # names that can be assigned to initialized instances
+        cls._known_names = frozenset(dir(cls))
+
         super(ElementMeta, cls).__init__(cls_name, cls_bases, cls_attrs)
 
     @classmethod
@@ -118,6 +361,9 @@ class Element(BaseNSComponent):
         All attributes of the element.
     children : {NSComponentName : Element}
         All children elements of this element.
+        Child element is created on first access, children that haven't been created are unassigned.
+    assigned_children : list of (NSComponentName, Element)
+        Assigned children elements in the order of their declaration.
     required_attrs : set of NSComponentName
         Required element attributes.
     required_children : set of NSComponentName
@@ -136,23 +382,68 @@ class Element(BaseNSComponent):
         The dictionary key is a tuple (namespace_uri, attribute_name) for SAX handlers
     """
 
-    _inited = False
+    __slots__ = ('_attrs', '_children', '_required', '_inited', '_assigned', '_ns_prefix', '_ns_uri',
+                 '_cache', '_parents', '__weakref__')
 
     def __new__(cls, *args, **kwargs):
         instance = super(Element, cls).__new__(cls)
-        new_attrs = {}
-        new_children = {}
-        for component_name in chain(instance._attrs, instance._children):
-            new_component = deepcopy(getattr(instance, component_name.priv_name))
-            Element.__setattr__(instance, component_name.priv_name, new_component)
-            if isinstance(new_component, ElementAttribute):
-                new_attrs[component_name] = new_component
-            else:
-                new_children[component_name] = new_component
-        Element.__setattr__(instance, '_attrs', new_attrs)
-        Element.__setattr__(instance, '_children', new_children)
+        _set_state(instance, chain(
+            (('_inited', False), ('_assigned', False), ('_ns_prefix', ''), ('_ns_uri', '')),
+            cls._clone_components().items()
+        ))
+        _adopt_components(instance)
         return instance
 
+    @classmethod
+    def _clone_components(cls, source=None):
+        """
+        Clone attributes according to the class construction plan
+        and children elements that have been created
+
+        Parameters
+        ----------
+        source : Element or None
+            Element whose components are used as prototypes.
+            If it's None then class-level components are used as prototypes
+
+        Returns
+        -------
+        dict
+            Instance state with cloned attributes, dictionaries ``_attrs`` and ``_children``,
+            empty cache of the derived state and no parents
+        """
+        state = {}
+        new_attrs = {}
+        for attr_name, attr_priv_name, prototype in cls._construction_plan:
+            if source is not None:
+                prototype = getattr(source, attr_priv_name)
+            state[attr_priv_name] = new_attrs[attr_name] = prototype._clone()
+        children = cls._eager_children if source is None else source._children
+        state['_attrs'] = new_attrs
+        state['_children'] = {child_name: child._clone() for child_name, child in children.items()}
+        state['_cache'] = None
+        state['_parents'] = ()
+        return state
+
+    def _copy_state(self, clone):
+        super(Element, self)._copy_state(clone)
+        _set_state(clone, self._clone_components(self).items())
+        _adopt_components(clone)
+
+    def __deepcopy__(self, memo):
+        # parents of copied children are the copied elements
+        return self._clone()
+
+    def _invalidate_state(self):
+        """
+        Drop the derived state of the element and all its ancestors
+        """
+        object.__setattr__(self, '_cache', None)
+        for parent_ref in self._parents:
+            parent = parent_ref()
+            if parent is not None:
+                parent._invalidate_state()
+
     def __init__(self, *args, **kwargs):
         """
         Initialize element
@@ -183,15 +474,15 @@ class Element(BaseNSComponent):
             elif self.content_name:
                 if str(self.content_name) not in kwargs:
                     kwargs[str(self.content_name)] = arg
-            elif not self._attrs and len(self._children) == 1:
-                kwargs[str(next(iter(self._children)))] = arg
+            elif not self._attrs and len(self.__class__._children) == 1:
+                kwargs[str(next(iter(self.__class__._children)))] = arg
             else:
                 raise ValueError("Element of type '{}' does not support unnamed non-mapping arguments "
                                  "(no content attribute, another attribute exists or no single child)"
                                  .format(self.__class__.__name__))
             args = tuple()
 
-        for component_name in chain(self._attrs, self._children):
+        for component_name in chain(self._attrs, self.__class__._children):
             component_name = str(component_name)
             if component_name in kwargs:
                 setattr(self, component_name, kwargs[component_name])
@@ -216,12 +507,35 @@ class Element(BaseNSComponent):
         settings['required'] = self._required
         return settings
 
+    @property
+    def assigned_children(self):
+        children = self._children
+        return [(child_name, children[child_name])
+                for child_name in self.__class__._children
+                if child_name in children and children[child_name].assigned]
+
+    def _iter_children(self):
+        """
+        Iterate over children elements without creating them
+
+        Returns
+        -------
+        Iterable[(NSComponentName, Element)]
+            Pairs (name, child) in the order of declaration
+            where child that hasn't been created is substituted by its class-level prototype
+        """
+        children = self._children
+        for child_name, prototype in self.__class__._children.items():
+            yield child_name, children.get(child_name, prototype)
+
     def __setattr__(self, key, value):
-        if self._inited and not hasattr(self, key):
+        if (key not in self._known_names and self._inited
+                and key not in getattr(self, '__dict__', ())):
             raise AttributeError("No attribute {!r}. Supported components: {}"
                                  .format(key,
                                          ', '.join(map(repr, map(str, chain(self.attrs, self.children))))))
         super(Element, self).__setattr__(key, value)
+        self._invalidate_state()
 
     def __repr__(self):
         super_repr = super(Element, self).__repr__()
@@ -231,7 +545,7 @@ class Element(BaseNSComponent):
         s_repr = s_match.group(1) if s_match else ''
         comps_repr = ", ".join("{}={!r}".format(comp_name, comp)
                                for comp_name, comp in chain(self.attrs.items(),
-                                                            self.children.items()))
+                                                            self._iter_children()))
         return "{}(required={!r}, {})".format(self.__class__.__name__,
                                               self._required,
                                               ", ".join(filter(None, [comps_repr, s_repr])))
@@ -240,14 +554,18 @@ class Element(BaseNSComponent):
         """
         Clear attributes and all children elements
         """
-        for comp in chain(self.attrs.values(), self.children.values()):
+        for comp in chain(self._attrs.values(), self._children.values()):
             comp.clear()
         self._assigned = False
+        self._invalidate_state()
 
     def validate(self, name=None):
         """
         Check if the element has valid attributes' and children values.
-        If this element is not assigned (skipped) and is not required then element is valid
+        If this element is not assigned (skipped) and is not required then element is valid.
+        Components are checked according to the class validation plan,
+        name path of a component is built only when it's invalid.
+        Successful validation is cached until any component is mutated
 
         Parameters
         ----------
@@ -259,19 +577,79 @@ class Element(BaseNSComponent):
         InvalidComponentError
             If this component is invalid
         """
+        cache = _state_cache(self)
+        if 'valid' in cache:
+            return
         super(Element, self).validate(name)
         if not self.assigned:
-            if self.required:
+            if self._required:
                 raise InvalidComponentError(self, name, "missing required element")
+            cache['valid'] = True
             return
-        for comp_name, comp in chain(self._attrs.items(), self._children.items()):
-            name_path = object_to_list(name)
-            name_path.append(comp_name)
-            comp.validate(name_path)
+        attrs_plan, children_plan = self._validation_plan
+        for attr_name, attr_priv_name, custom_validation in attrs_plan:
+            attr = getattr(self, attr_priv_name)
+            if custom_validation:
+                try:
+                    attr.validate()
+                except InvalidComponentError as exc:
+                    attr.validate(_name_path(name, attr_name))
+                    raise exc
+            elif attr._value is None and attr._required or attr._ns_prefix and not attr._ns_uri:
+                attr.validate(_name_path(name, attr_name))
+        children = self._children
+        for child_name, child_priv_name, required in children_plan:
+            child = children.get(child_name)
+            if child is None:
+                if not required:
+                    continue  # child that hasn't been created is unassigned
+                child = getattr(self, child_priv_name)
+            try:
+                child.validate()
+            except InvalidComponentError as exc:
+                # validate again to report the full name path
+                child.validate(_name_path(name, child_name))
+                raise exc
+        # if the element has been modified during validation then the cache is already stale
+        cache['valid'] = True
+
+    @classmethod
+    def validate_schema(cls, name=None):
+        """
+        Check the element class specification without instances:
+        namespaces of all attributes and children elements
+        and uniqueness of their XML names
+
+        Parameters
+        ----------
+        name: str or NSComponentName or Iterable[str or NSComponentName] or None
+            Name path of elements of this class
+
+        Raises
+        ------
+        InvalidComponentError
+            If a component of the specification is invalid
+        """
+        for components in (cls._attrs, cls._children):
+            xml_names = {}
+            for comp_name, prototype in components.items():
+                BaseNSComponent.validate(prototype, _name_path(name, comp_name))
+                if getattr(prototype, 'is_content', False):
+                    continue
+                if comp_name.xml_name in xml_names:
+                    raise InvalidComponentError(prototype, _name_path(name, comp_name),
+                                                "XML name is the same as the name of component '{}'"
+                                                .format(xml_names[comp_name.xml_name]))
+                xml_names[comp_name.xml_name] = comp_name
+        for child_name, prototype in cls._children.items():
+            child_cls = (prototype.base_element_cls if isinstance(prototype, MultipleElements)
+                         else prototype.__class__)
+            child_cls.validate_schema(_name_path(name, child_name))
 
     def get_namespaces(self, assigned_only=True, attrs_only=False):
         """
-        Get namespaces of the element
+        Get namespaces of the element.
+        The result is cached until any component is mutated
 
         Parameters
         ----------
@@ -285,17 +663,120 @@ class Element(BaseNSComponent):
         set of (str or None, str or None)
             Set of pairs (namespace_prefix, namespace_uri)
         """
+        cache = _state_cache(self)
+        key = ('namespaces', bool(assigned_only), bool(attrs_only))
+        namespaces = cache.get(key)
+        if namespaces is None:
+            namespaces = cache[key] = frozenset(self._collect_namespaces(assigned_only, attrs_only))
+        return set(namespaces)
+
+    def _collect_namespaces(self, assigned_only, attrs_only):
         namespaces = super(Element, self).get_namespaces()
-        for comp in chain(self.attrs.values(),
-                          self.children.values() if not attrs_only else []):
+        if attrs_only:
+            children = ()
+        elif assigned_only:
+            children = self._children.values()
+        else:
+            children = (child for _, child in self._iter_children())
+        for comp in chain(self._attrs.values(), children):
             if not assigned_only or comp.assigned:
                 namespaces.update(comp.get_namespaces(assigned_only))
         return namespaces
 
 
+class _ElementsList(list):
+    """
+    Elements of :class:`MultipleElements` that drop the derived state of their owner on each change.
+    The owner is assigned while the list isn't empty
+    """
+    __slots__ = ('_owner',)
+
+    def __init__(self, owner, iterable=()):
+        super(_ElementsList, self).__init__(iterable)
+        self._owner = weakref.ref(owner)
+        for elem in self:
+            _add_parent(elem, owner)
+
+    def _changed(self, added=()):
+        owner = self._owner()
+        if owner is None:
+            return
+        for elem in added:
+            _add_parent(elem, owner)
+        object.__setattr__(owner, '_assigned', bool(self))
+        owner._invalidate_state()
+
+    def append(self, elem):
+        super(_ElementsList, self).append(elem)
+        self._changed((elem,))
+
+    def extend(self, iterable):
+        elems = list(iterable)
+        super(_ElementsList, self).extend(elems)
+        self._changed(elems)
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+    def __imul__(self, count):
+        super(_ElementsList, self).__imul__(count)
+        self._changed()
+        return self
+
+    def insert(self, index, elem):
+        super(_ElementsList, self).insert(index, elem)
+        self._changed((elem,))
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+        super(_ElementsList, self).__setitem__(index, value)
+        self._changed(value if isinstance(index, slice) else (value,))
+
+    def __delitem__(self, index):
+        super(_ElementsList, self).__delitem__(index)
+        self._changed()
+
+    # Python 2 implements slicing by separate methods
+    def __setslice__(self, start, stop, value):
+        self.__setitem__(slice(start, stop), value)
+
+    def __delslice__(self, start, stop):
+        self.__delitem__(slice(start, stop))
+
+    def pop(self, index=-1):
+        elem = super(_ElementsList, self).pop(index)
+        self._changed()
+        return elem
+
+    def remove(self, elem):
+        super(_ElementsList, self).remove(elem)
+        self._changed()
+
+    def clear(self):
+        del self[:]
+
+    def sort(self, *args, **kwargs):
+        super(_ElementsList, self).sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self):
+        super(_ElementsList, self).reverse()
+        self._changed()
+
+    def __reduce__(self):
+        # copies are plain lists, the owner of copies wraps them again
+        return list, (list(self),)
+
+    def __deepcopy__(self, memo):
+        return [deepcopy(elem, memo) for elem in self]
+
+
 class MultipleElements(Element):
     """
-    Represents sibling elements of the same base class
+    Represents sibling elements of the same base class.
+    Changes of the list ``elements`` are tracked as changes of the instance
     """
 
     def __init__(self, base_element_cls, **kwargs):
@@ -313,6 +794,13 @@ class MultipleElements(Element):
             raise NotImplementedError('Class MultipleElements does not support attributes serialization')
         self.serialize_attrs = serializer
 
+    def _copy_state(self, clone):
+        super(MultipleElements, self)._copy_state(clone)
+        _set_state(clone, (('base_element_cls', self.base_element_cls),
+                           ('_content_name', self._content_name)))
+        if 'elements' in clone.__dict__:
+            _set_state(clone, (('elements', _ElementsList(clone, clone.__dict__['elements'])),))
+
     @property
     def settings(self):
         settings = super(MultipleElements, self).settings
@@ -347,7 +835,6 @@ class MultipleElements(Element):
             or content value of element
         """
         self.elements.append(self._check_value(elem))
-        self._assigned = True
 
     def extend(self, iterable):
         """
@@ -382,7 +869,6 @@ class MultipleElements(Element):
         Remove all elements
         """
         del self.elements[:]
-        self._assigned = False
 
     def pop(self, index=-1):
         """
@@ -394,21 +880,19 @@ class MultipleElements(Element):
             Element index (last by default)
         """
         elem = self.elements.pop(index)
-        if not self.elements:
-            self._assigned = False
         return elem
 
     def validate(self, name=None):
         for idx, element in enumerate(self.elements):
-            name_path = object_to_list(name)
-            name_path.append('[{}]'.format(idx))
-            element.validate(name_path)
+            try:
+                element.validate()
+            except InvalidComponentError as exc:
+                element.validate(_name_path(name, '[{}]'.format(idx)))
+                raise exc
         super(Element, self).validate(name)
 
     def __delitem__(self, index):
         self.elements.__delitem__(index)
-        if not self.elements:
-            self._assigned = False
 
     def __getitem__(self, index):
         return self.elements[index]
@@ -453,6 +937,8 @@ class MultipleElements(Element):
                                      "Choose element and set its' attribute.".format(len(self.elements)))
             setattr(self.elements[0], name, value)
         else:
+            if name == 'elements':
+                value = _ElementsList(self, value)
             super(MultipleElements, self).__setattr__(name, value)
 
     def __repr__(self):
@@ -464,76 +950,144 @@ class MultipleElements(Element):
         base_cls_repr = "base_element_cls={!r}".format(self.base_element_cls)
         return "{}({})".format(self.__class__.__name__, ", ".join(filter(None, [base_cls_repr, s_repr])))
 
-    def get_namespaces(self, assigned_only=True, attrs_only=False):
-        namespaces = super(MultipleElements, self).get_namespaces()
+    def _collect_namespaces(self, assigned_only, attrs_only):
+        namespaces = super(MultipleElements, self)._collect_namespaces(True, False)
         for elem in self.elements:
             namespaces.update(elem.get_namespaces(assigned_only))
         return namespaces
 
 
-def _build_component_getter(name):
+def iter_element_tokens(element):
+    """
+    Iterate over names and serialized values of assigned attributes and children of the element.
+    Equal elements produce equal tokens in every run, so the tokens can be hashed
+
+    Parameters
+    ----------
+    element : Element
+
+    Returns
+    -------
+    iterator of str
     """
-    Build attribute or child element getter
+    if isinstance(element, MultipleElements):
+        for sub_element in element:
+            yield '['
+            for token in iter_element_tokens(sub_element):
+                yield token
+            yield ']'
+        return
+    for attr_name, attr in element.attrs.items():
+        if attr.assigned:
+            yield str(attr_name)
+            yield six.text_type(attr.serializer(attr.value))
+    for child_name, child in element.assigned_children:
+        yield str(child_name)
+        yield '{'
+        for token in iter_element_tokens(child):
+            yield token
+        yield '}'
+
+
+def _build_attribute_accessors(name):
+    """
+    Build attribute getter and setter
 
     Parameters
     ----------
     name : NSComponentName
-        name of an attribute or child element
+        name of an attribute
+
+    Returns
+    -------
+    (callable, callable)
+        Getter and setter of the attribute value
     """
-    def getter(self):
-        component = getattr(self, name.priv_name)
-        return component.value if isinstance(component, ElementAttribute) else component
-    return getter
+    priv_name = name.priv_name
+    set_field = object.__setattr__
+
+    def setter(self, value):
+        attr = getattr(self, priv_name)
+        if value is None:
+            attr.clear()
+        elif isinstance(value, ElementAttribute):
+            raise InvalidAttributeValueError(name, value)
+        else:
+            attr._value = value
+        set_field(self, '_assigned', value is not None)
+        self._invalidate_state()
 
+    return attrgetter(priv_name + '._value'), setter
 
-def _build_component_setter(name):
+
+def _build_child_accessors(name, prototype):
     """
-    Build attribute or child element setter
+    Build child element getter and setter according to the class of the child element
 
     Parameters
     ----------
     name : NSComponentName
-        name of an attribute or child element
+        name of a child element
+    prototype : Element
+        class-level child element
+
+    Returns
+    -------
+    (callable, callable)
+        Getter and setter of the child element
     """
+    priv_name = name.priv_name
+    set_field = object.__setattr__
+    child_cls = prototype.__class__
+
+    if isinstance(prototype, MultipleElements):
+        def setter(self, value):
+            child = getattr(self, priv_name)
+            child.clear()
+            if value is not None:
+                child.add(value)
+            set_field(self, '_assigned', value is not None)
+            self._invalidate_state()
+
+        return attrgetter(priv_name), setter
+
+    # setter of a component of the child element that's assigned by a non-mapping value
+    if (prototype.content_name
+            and (not prototype.required_attrs
+                 or len(prototype.required_attrs) == 1
+                    and prototype.content_name in prototype.required_attrs)):
+        value_setter = getattr(child_cls, prototype.content_name.pub_name).fset
+    elif len(child_cls._children) == 1 and not prototype.required_attrs:
+        value_setter = getattr(child_cls, str(next(iter(child_cls._children)))).fset
+    else:
+        value_setter = None
 
     def setter(self, value):
-        component = getattr(self, name.priv_name)
+        children = self._children
         if value is None:
-            component.clear()
-        elif isinstance(component, ElementAttribute):
-            if isinstance(value, ElementAttribute):
-                raise InvalidAttributeValueError(name, value)
-            component.value = value
-        elif isinstance(component, MultipleElements):
-            component.clear()
-            component.add(value)
-        elif isinstance(value, component.__class__):
-            if not component.compatible_with(value):
-                raise InvalidElementValueError(name, component.__class__, value,
+            if name in children:
+                children[name].clear()
+        elif value.__class__ in _IMMUTABLE_TYPES or not isinstance(value, (Element, Mapping)):
+            if value_setter is None:
+                raise InvalidElementValueError(name, child_cls, value)
+            value_setter(getattr(self, priv_name), value)
+        elif isinstance(value, child_cls):
+            if not children.get(name, prototype).compatible_with(value):
+                raise InvalidElementValueError(name, child_cls, value,
                                                msg="Value class or its attributes are incompatible.")
-            setattr(self, name.priv_name, value)
-            self._children[name] = value
+            children[name] = value
+            _add_parent(value, self)
         elif isinstance(value, Element):
-            raise InvalidElementValueError(name, component.__class__, value)
-        elif isinstance(value, Mapping):
-            args = dict(**value)
-            args.update(component.settings)
-            new_value = component.__class__(**args)
-            setattr(self, name.priv_name, new_value)
-            self._children[name] = new_value
-        elif (component.content_name
-              and (not component.required_attrs
-                   or len(component.required_attrs) == 1
-                       and component.content_name in component.required_attrs)):
-            setattr(component, component.content_name.pub_name, value)
-        elif len(component.children) == 1 and not component.required_attrs:
-            child_name = next(iter(component.children))
-            setattr(component, str(child_name), value)
+            raise InvalidElementValueError(name, child_cls, value)
         else:
-            raise InvalidElementValueError(name, component.__class__, value)
-        self._assigned = value is not None
+            args = dict(**value)
+            args.update(children.get(name, prototype).settings)
+            children[name] = child = child_cls(**args)
+            _add_parent(child, self)
+        set_field(self, '_assigned', value is not None)
+        self._invalidate_state()
 
-    return setter
+    return attrgetter(priv_name), setter
 
 
 # backward compatibility
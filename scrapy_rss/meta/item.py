@@ -40,7 +40,7 @@ class FeedItem(six.with_metaclass(ItemMeta, Element, BaseItem)):
 
     @property
     def elements(self):
-        return self._children
+        return self.children
 
     def __setattr__(self, name, value):
         if name in self.fields:
@@ -1,14 +1,82 @@
 # -*- coding: utf-8 -*-
 
+from copy import deepcopy
 import re
+import types
+
+import six
+from six.moves import copyreg
 
 from ..exceptions import NoNamespaceURIError, InvalidComponentError
 from ..utils import Iterable
 
 
+# types of values that are shared between a prototype component and its clones
+_IMMUTABLE_TYPES = frozenset(six.integer_types + (
+    type(None), bool, float, complex, six.text_type, six.binary_type,
+    type, types.FunctionType, types.BuiltinFunctionType,
+))
+
+
+def _intern(name):
+    try:
+        return six.moves.intern(name)
+    except TypeError:  # unicode names in Python 2
+        return name
+
+
+_MISSING = object()
+
+
+def _cloned_slotnames(cls):
+    """
+    Get names of slots that are copied from a prototype component to its clones.
+    The result is cached in the class
+
+    Parameters
+    ----------
+    cls : type
+        Class of BaseNSComponent
+
+    Returns
+    -------
+    tuple of str
+        Slot names except the state that's cloned by subclasses separately
+    """
+    names = cls.__dict__.get('__cloned_slotnames__')
+    if names is None:
+        components_state = cls._components_state
+        names = tuple(name for name in copyreg._slotnames(cls) if name not in components_state)
+        setattr(cls, '__cloned_slotnames__', names)
+    return names
+
+
+def _set_state(obj, state):
+    """
+    Set instance state stored both in ``__dict__`` and slots
+
+    Parameters
+    ----------
+    obj : object
+    state : Iterable[(str, Any)]
+        Pairs (attribute name, value)
+    """
+    setter = object.__setattr__
+    for name, value in state:
+        setter(obj, name, value)
+
+
 class BaseNSComponent(object):
+    __slots__ = ()
     _ns_prefix = ''
     _ns_uri = ''
+    _components_state = frozenset()  # instance state that's cloned by subclasses separately
+
+    def __new__(cls, *args, **kwargs):
+        if cls is BaseNSComponent:
+            # the base class does not own any storage to keep its subclasses slotted
+            cls = _StandaloneNSComponent
+        return super(BaseNSComponent, cls).__new__(cls)
 
     def __init__(self, ns_prefix=None, ns_uri=None):
         """
@@ -62,6 +130,7 @@ class BaseNSComponent(object):
         if self._ns_prefix:
             raise ValueError("Namespace prefix is already non-empty")
         self._ns_prefix = ns_prefix
+        self._invalidate_state()
 
     @property
     def ns_uri(self):
@@ -95,6 +164,7 @@ class BaseNSComponent(object):
         if self._ns_uri:
             raise ValueError("Namespace URI is already non-empty")
         self._ns_uri = ns_uri
+        self._invalidate_state()
 
     @property
     def settings(self):
@@ -132,6 +202,48 @@ class BaseNSComponent(object):
         return "{}(ns_prefix={!r}, ns_uri={!r})"\
             .format(self.__class__.__name__, self._ns_prefix, self._ns_uri)
 
+    def _invalidate_state(self):
+        """
+        Drop the derived state that depends on this component.
+        Components don't keep any derived state by default
+        """
+
+    def _clone(self):
+        """
+        Copy the component using it as a prototype.
+        It's equivalent to ``deepcopy(self)``, but it does not copy immutable state.
+
+        Returns
+        -------
+        BaseNSComponent
+            An independent copy of this component
+        """
+        cls = self.__class__
+        clone = super(BaseNSComponent, cls).__new__(cls)
+        self._copy_state(clone)
+        return clone
+
+    def _copy_state(self, clone):
+        """
+        Copy the instance state to a clone
+
+        Parameters
+        ----------
+        clone : BaseNSComponent
+            Uninitialized instance of the same class
+        """
+        setter = object.__setattr__
+        instance_dict = getattr(self, '__dict__', None)
+        if instance_dict:
+            components_state = self._components_state
+            for key, value in instance_dict.items():
+                if key not in components_state:
+                    setter(clone, key, value if value.__class__ in _IMMUTABLE_TYPES else deepcopy(value))
+        for key in _cloned_slotnames(self.__class__):
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                setter(clone, key, value if value.__class__ in _IMMUTABLE_TYPES else deepcopy(value))
+
     def get_namespaces(self):
         """
         Get namespace of the component
@@ -179,7 +291,16 @@ class BaseNSComponent(object):
         return True
 
 
+class _StandaloneNSComponent(BaseNSComponent):
+    """
+    Storage for instances of the bare :class:`BaseNSComponent`
+    """
+    __slots__ = ('_ns_prefix', '_ns_uri')
+
+
 class NSComponentName(BaseNSComponent):
+    __slots__ = ('_ns_prefix', '_ns_uri', '_name', '_public_fullname', '_private_fullname', '_xml_name', '_hash')
+
     def __init__(self, name, ns_prefix=None, ns_uri=None):
         """
         Component' name wrapper
@@ -200,12 +321,22 @@ class NSComponentName(BaseNSComponent):
             secondary_ns_prefix = None
         super(NSComponentName, self).__init__(ns_prefix=ns_prefix or secondary_ns_prefix,
                                               ns_uri=ns_uri)
-        self._name = name
+        self._name = _intern(name)
         if secondary_ns_prefix:
-            self._public_fullname = '{}__{}'.format(secondary_ns_prefix, name)
+            self._public_fullname = _intern('{}__{}'.format(secondary_ns_prefix, name))
         else:
-            self._public_fullname = name
-        self._private_fullname = '__{}'.format(self._public_fullname) 
+            self._public_fullname = self._name
+        self._private_fullname = _intern('__{}'.format(self._public_fullname))
+        self._update_key()
+
+    def _update_key(self):
+        self._xml_name = self._ns_uri, _intern(self._name.rstrip('_'))
+        self._hash = hash(self.__key())
+
+    @BaseNSComponent.ns_uri.setter
+    def ns_uri(self, ns_uri):
+        BaseNSComponent.ns_uri.fset(self, ns_uri)
+        self._update_key()
 
     @property
     def settings(self):
@@ -235,7 +366,7 @@ class NSComponentName(BaseNSComponent):
         (str or None, str)
             component name in the namespaced SAX format where the second item without trailing underscores
         """
-        return self._ns_uri, self._name.rstrip('_')
+        return self._xml_name
 
     @property
     def pub_name(self):
@@ -270,7 +401,7 @@ class NSComponentName(BaseNSComponent):
         return self._ns_uri, self._name
 
     def __hash__(self):
-        return hash(self.__key())
+        return self._hash
 
     def __eq__(self, other):
         if isinstance(other, NSComponentName):
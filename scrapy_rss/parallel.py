@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+from collections import deque
+from io import BytesIO
+import logging
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import threading
+
+from . import meta
+
+
+POOL_PROCESS = 'process'
+POOL_THREAD = 'thread'
+
+logger = logging.getLogger(__name__)
+
+
+def dump_element(element):
+    """
+    Convert the element into a compact picklable form.
+    Attribute serializers of class specifications are not included,
+    so elements whose specifications contain lambdas or closures can be transferred between processes
+
+    Parameters
+    ----------
+    element : Element
+
+    Returns
+    -------
+    tuple
+        Picklable state of the element that's restored by :func:`load_element`
+    """
+    attrs = []
+    for _, attr_priv_name, prototype in element.__class__._construction_plan:
+        attr = getattr(element, attr_priv_name)
+        serializer = None if attr.serializer is prototype.serializer else attr.serializer
+        if (attr.value is None and serializer is None
+                and attr._ns_prefix == prototype._ns_prefix and attr._ns_uri == prototype._ns_uri):
+            attrs.append(None)
+        else:
+            attrs.append((attr.value, attr._ns_prefix, attr._ns_uri, serializer))
+    children = tuple((child_name.priv_name, child.__class__, dump_element(child))
+                     for child_name, child in element._children.items()
+                     if child.assigned)
+    elements = (tuple((elem.__class__, dump_element(elem)) for elem in element.elements)
+                if isinstance(element, meta.MultipleElements) else ())
+    return (element._required, element._assigned, element._ns_prefix, element._ns_uri,
+            tuple(attrs), children, elements)
+
+
+def load_element(element_cls, state):
+    """
+    Restore the element from the compact form
+
+    Parameters
+    ----------
+    element_cls : ElementMeta
+        Class of the element
+    state : tuple
+        State returned by :func:`dump_element`
+
+    Returns
+    -------
+    Element
+    """
+    element = element_cls()
+    _load_state(element, state)
+    return element
+
+
+def _load_state(element, state):
+    set_field = object.__setattr__
+    required, assigned, ns_prefix, ns_uri, attrs, children, elements = state
+    set_field(element, '_required', required)
+    set_field(element, '_assigned', assigned)
+    set_field(element, '_ns_prefix', ns_prefix)
+    set_field(element, '_ns_uri', ns_uri)
+    for (_, attr_priv_name, prototype), attr_state in zip(element.__class__._construction_plan, attrs):
+        attr = getattr(element, attr_priv_name)
+        if attr_state is None:
+            attr._value = None
+            continue
+        attr._value, attr._ns_prefix, attr._ns_uri, serializer = attr_state
+        if serializer is not None:
+            attr.serializer = serializer
+    for child_priv_name, child_cls, child_state in children:
+        child = getattr(element, child_priv_name)
+        if child.__class__ is child_cls:
+            _load_state(child, child_state)
+        else:
+            child = child_cls()
+            _load_state(child, child_state)
+            set_field(element, child_priv_name, child)
+    for elem_cls, elem_state in elements:
+        elem = elem_cls()
+        _load_state(elem, elem_state)
+        element.elements.append(elem)
+
+
+# exporter of the current worker process or thread
+_worker = threading.local()
+
+
+def _start_worker_exporter(exporter_cls, args, kwargs, root_namespaces=None):
+    exporter = exporter_cls(BytesIO(), *args, **kwargs)
+    if root_namespaces is None:
+        exporter.start_exporting()
+    else:
+        exporter.resume_exporting(root_namespaces)
+    _worker.exporter = exporter
+    _worker.exporter_args = exporter_cls, args, kwargs, root_namespaces
+
+
+def _serialize_items(items, dumped):
+    fragments = []
+    for item in items:
+        try:
+            if dumped:
+                item = load_element(*item)
+            fragments.append(_worker.exporter.serialize_item(item))
+        except Exception:
+            # the state of the exporter may be broken, the item is serialized by the writer
+            _start_worker_exporter(*_worker.exporter_args)
+            fragments.append(None)
+    return fragments
+
+
+class SerializationPool(object):
+    # whether items are transferred to workers in the compact form
+    dumps_items = False
+
+    def __init__(self, exporter, workers, max_in_flight=None, batch_size=None,
+                 exporter_args=(), exporter_kwargs=None, item_written=None, root_namespaces=None):
+        """
+        Pool of workers that serialize items into XML fragments
+        that are written by the single writer in the order of submission.
+        Each worker has its own exporter,
+        the exporter of the pool prepares items and writes fragments.
+        Items that cannot be serialized are skipped when they are written,
+        they are logged and counted in the stats ``feed/serialization/failed``
+
+        Parameters
+        ----------
+        exporter : FeedItemExporter
+            Exporter that prepares items before submission
+            and serializes items that cannot be serialized by workers
+        workers : int
+            Number of workers
+        max_in_flight : int or None
+            Maximum number of submitted items that haven't been merged (default: 64 per worker)
+        batch_size : int or None
+            Number of items that are sent to a worker at once (default: 16 or less to fit ``max_in_flight``)
+        exporter_args : tuple
+            Positional arguments of the exporter constructor except the file
+        exporter_kwargs : dict or None
+            Named arguments of the exporter constructor
+        item_written : callable or None
+            Function that's called after each item is written
+        root_namespaces : list of (str or None, str) or None
+            Namespaces declared by the root element of the existing feed
+            if the exporter resumes exporting to it
+        """
+        if workers < 1:
+            raise ValueError('Number of serialization workers must be positive, not {!r}'.format(workers))
+        if max_in_flight is None:
+            max_in_flight = 64 * workers
+        elif max_in_flight < 1:
+            raise ValueError('Maximum number of items in flight must be positive, not {!r}'
+                             .format(max_in_flight))
+        if batch_size is None:
+            batch_size = min(16, max(1, max_in_flight // workers))
+        elif not 0 < batch_size <= max_in_flight:
+            raise ValueError('Batch size must be positive and not greater than the maximum number of items '
+                             'in flight, not {!r}'.format(batch_size))
+        self.exporter = exporter
+        self.workers = workers
+        self.max_in_flight = max_in_flight
+        self.batch_size = batch_size
+        self.item_written = item_written
+        worker_kwargs = dict(exporter_kwargs or {})
+        # items are validated before submission
+        worker_kwargs['validation'] = 'trusted'
+        worker_kwargs['stats'] = None
+        # batches (items, result) that have been sent to workers
+        self._pending = deque()
+        self._batch = []
+        self._batch_payloads = []
+        self._in_flight = 0
+        self._pool = self._create_pool(workers, initializer=_start_worker_exporter,
+                                       initargs=(exporter.__class__, tuple(exporter_args), worker_kwargs,
+                                                 root_namespaces))
+
+    def _create_pool(self, workers, initializer, initargs):
+        """
+        Create pool of workers
+
+        Parameters
+        ----------
+        workers : int
+            Number of workers
+        initializer : callable
+            Function that's called by each worker on start
+        initargs : tuple
+            Arguments of the initializer
+
+        Returns
+        -------
+        multiprocessing.pool.Pool
+        """
+        raise NotImplementedError
+
+    def submit(self, item):
+        """
+        Prepare the item, submit it to workers
+        and write fragments of serialized items in the order of submission.
+        It doesn't wait for workers, :meth:`get_waiter` limits the number of items in flight
+
+        Parameters
+        ----------
+        item : FeedItem or scrapy.Item
+        """
+        item = self.exporter.prepare_item(item)
+        self._batch.append(item)
+        self._batch_payloads.append((item.__class__, dump_element(item)) if self.dumps_items else item)
+        self._in_flight += 1
+        if len(self._batch) >= self.batch_size:
+            self._send_batch()
+        self.merge_ready()
+
+    def merge_ready(self):
+        """
+        Write fragments of the sent batches that are serialized already in the order of submission
+        """
+        pending = self._pending
+        while pending and pending[0][1].ready():
+            self._merge(*pending.popleft())
+
+    def get_waiter(self):
+        """
+        Get the function that blocks until the oldest sent batch is serialized
+        if the number of items in flight exceeds ``max_in_flight``.
+        The function is called outside the crawler thread (by ``deferToThread()`` or an executor of the event loop)
+        and then :meth:`merge_ready` writes the batch, so the crawler thread isn't blocked by workers
+
+        Returns
+        -------
+        callable or None
+            Function without arguments or None if the number of items in flight doesn't exceed the maximum
+        """
+        if self._in_flight <= self.max_in_flight or not self._pending:
+            return None
+        return self._pending[0][1].wait
+
+    def drain(self):
+        """
+        Wait for all submitted items and write their fragments
+        """
+        if self._batch:
+            self._send_batch()
+        while self._pending:
+            self._merge(*self._pending.popleft())
+
+    def _send_batch(self):
+        self._pending.append((self._batch, self._pool.apply_async(_serialize_items,
+                                                                    (self._batch_payloads, self.dumps_items))))
+        self._batch = []
+        self._batch_payloads = []
+
+    def _merge(self, items, result):
+        try:
+            fragments = result.get()
+        except Exception:
+            # items cannot be transferred to workers
+            fragments = [None] * len(items)
+        for item, fragment in zip(items, fragments):
+            self._in_flight -= 1
+            if fragment is None:
+                try:
+                    fragment = self.exporter.serialize_item(item)
+                except Exception:
+                    # the item has passed the pipeline already, so only this item is dropped
+                    self.exporter._inc_stats('feed/serialization/failed')
+                    logger.error('Item is dropped from the feed, it cannot be serialized: %r', item,
+                                 exc_info=True)
+                    continue
+            self.exporter.export_fragment(fragment, item)
+            if self.item_written is not None:
+                self.item_written()
+
+    def close(self):
+        """
+        Stop worker processes, items that haven't been drained are discarded
+        """
+        self._pending.clear()
+        self._batch = []
+        self._batch_payloads = []
+        self._in_flight = 0
+        self._pool.terminate()
+        self._pool.join()
+
+
+class ProcessSerializationPool(SerializationPool):
+    """
+    Pool of processes that serialize items transferred in the compact form,
+    items that cannot be pickled are serialized by the writer
+    """
+    dumps_items = True
+
+    def _create_pool(self, workers, initializer, initargs):
+        return multiprocessing.Pool(workers, initializer=initializer, initargs=initargs)
+
+
+class ThreadSerializationPool(SerializationPool):
+    """
+    Pool of threads that serialize items directly.
+    Items must not be changed after submission until they are written
+    """
+
+    def _create_pool(self, workers, initializer, initargs):
+        return ThreadPool(workers, initializer=initializer, initargs=initargs)
+
+
+POOLS = {
+    POOL_PROCESS: ProcessSerializationPool,
+    POOL_THREAD: ThreadSerializationPool,
+}
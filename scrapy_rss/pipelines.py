@@ -1,22 +1,74 @@
 # -*- coding: utf-8 -*-
 
+import io
+import logging
+import os
+from xml.sax.saxutils import escape
 from packaging.version import Version
 import six
 import scrapy
 from scrapy import signals
-from scrapy.exceptions import NotConfigured, CloseSpider
+from scrapy.exceptions import NotConfigured, CloseSpider, DropItem
 from scrapy.utils.misc import load_object
+from twisted.internet import threads
 
-from .items import RssItem
-from .exporters import FeedItemExporter
+from .items import FeedItem, RssItem
+from .exporters import FeedItemExporter, VALIDATION_STRICT, ENGINE_SAX
+from .writers import (CoalescingWriter, CompressingWriter, RotatingWriter, BackgroundWriter, AtomicFile,
+                      infer_compression, COMPRESSION_NONE, FSYNC_CLOSE)
+from .parallel import POOLS, POOL_PROCESS
+from .appending import ExistingFeed, FeedMerger, MERGE_KEY_GUID
+from .formats import FORMATS
+from .dedup import (MemoryFilter, BloomFilter, PersistentFilter, get_item_key, DEDUP_KEYS, DEDUP_KEY_GUID,
+                    DEDUP_MODES, DEDUP_MODE_MEMORY, DEDUP_MODE_BLOOM, DEDUP_MODE_PERSISTENT)
 from .utils import deprecated_class
 
 
+logger = logging.getLogger(__name__)
+
+def _get_running_loop():
+    """
+    Get the running asyncio event loop
+
+    Returns
+    -------
+    asyncio.AbstractEventLoop or None
+        The running event loop or None if there's no one
+    """
+    try:
+        import asyncio
+        return asyncio.get_running_loop()
+    except (ImportError, AttributeError, RuntimeError):
+        return None
+
+
+class _FeedSpider(object):
+    """
+    Spider with the settings of a single feed file
+    """
+
+    def __init__(self, spider, settings):
+        self.spider = spider
+        self.settings = settings
+
+    def __getattr__(self, name):
+        return getattr(self.spider, name)
+
+
 class FeedExportPipeline(object):
+    exporter_cls = FeedItemExporter
+
     def __init__(self, crawler):
         self.files = {}
         self.exporters = {}
+        self.writers = {}
+        self.pools = {}
+        self.atomic_files = {}
+        self.existing_feeds = {}
+        # {spider: [(spider of the file, file, exporter), ...]} of additional formats
+        self.format_exporters = {}
         self.spider = getattr(crawler, 'spider', None)
+        self.stats = getattr(crawler, 'stats', None)
 
     def _get_spider(self, spider):
         return self.spider or spider
@@ -30,13 +82,6 @@ class FeedExportPipeline(object):
 
     def spider_opened(self, spider=None):
         spider = self._get_spider(spider)
-        try:
-            file = open(spider.settings.get('FEED_FILE'), 'wb')
-        except TypeError:
-            raise NotConfigured('FEED_FILE parameter does not string or does not exist')
-        except (IOError, OSError) as e:
-            raise CloseSpider('Cannot open file {}: {}'.format(spider.settings.get('FEED_FILE', None), e))
-        self.files[spider] = file
         feed_title = spider.settings.get('FEED_TITLE')
         if not feed_title:
             raise NotConfigured('FEED_TITLE parameter does not exist')
@@ -47,30 +92,595 @@ class FeedExportPipeline(object):
         if feed_description is None:
             raise NotConfigured('FEED_DESCRIPTION parameter does not exist')
 
+        feed_file = spider.settings.get('FEED_FILE')
+        append = spider.settings.getbool('FEED_APPEND', False)
+        merge = spider.settings.getbool('FEED_MERGE', False)
+        skip_unchanged = spider.settings.getbool('FEED_SKIP_UNCHANGED', False)
+        if append and merge:
+            raise NotConfigured('FEED_APPEND cannot be combined with FEED_MERGE')
+        if append and skip_unchanged:
+            raise NotConfigured('FEED_APPEND cannot be combined with FEED_SKIP_UNCHANGED')
+        rotate = spider.settings.getint('FEED_ROTATE_ITEMS', 0) or spider.settings.getint('FEED_ROTATE_BYTES', 0)
+        if rotate and (append or merge or skip_unchanged):
+            raise NotConfigured('{} cannot be combined with rotation of the feed'
+                                .format('FEED_APPEND' if append else 'FEED_MERGE' if merge
+                                        else 'FEED_SKIP_UNCHANGED'))
+        formats = spider.settings.getdict('FEED_FORMATS')
+        if formats:
+            self._check_formats(spider, formats)
+        if rotate:
+            file = writer = self._open_rotating_writer(spider, feed_file)
+        else:
+            file = self._open_file(spider, feed_file, append=append)
+            writer = file if hasattr(file, 'end_item') else None
+        if writer is not None:
+            self.writers[spider] = writer
+        self.files[spider] = file
+        try:
+            self._open_exporter(spider, file, (feed_title, feed_link, feed_description))
+            if formats:
+                self._open_format_exporters(spider, formats)
+        except Exception:
+            self._discard_file(spider, file)
+            raise
+
+    def _check_formats(self, spider, formats):
+        for format_name in formats:
+            if format_name not in FORMATS:
+                raise NotConfigured('Feed format must be one of {}, not {!r}'
+                                    .format(', '.join(map(repr, sorted(FORMATS))), format_name))
+        # additional formats are written item by item in the order of the feed
+        conflicts = ([name for name in ('FEED_APPEND', 'FEED_MERGE', 'FEED_SORT_ITEMS')
+                      if spider.settings.getbool(name, False)]
+                     + [name for name in ('FEED_MAX_ITEMS', 'FEED_ROTATE_ITEMS', 'FEED_ROTATE_BYTES',
+                                          'FEED_SERIALIZATION_WORKERS')
+                        if spider.settings.getint(name, 0)])
+        if conflicts:
+            raise NotConfigured('{} cannot be combined with FEED_FORMATS'.format(conflicts[0]))
+
+    def _open_format_exporters(self, spider, formats):
+        """
+        Open files and exporters of additional formats that share the channel of the feed exporter
+        """
+        format_exporters = self.format_exporters[spider] = []
+        channel = self.exporters[spider].channel
+        feed_urls = spider.settings.getdict('FEED_FORMAT_URLS')
+        try:
+            for format_name, path in sorted(formats.items()):
+                # the file is published and discarded separately from the feed file
+                format_spider = _FeedSpider(spider, spider.settings)
+                file = self._open_file(format_spider, path)
+                try:
+                    exporter = FORMATS[format_name](file, channel, feed_url=feed_urls.get(format_name),
+                                                    stats=self.stats)
+                    exporter.start_exporting()
+                except Exception:
+                    self._discard_file(format_spider, file)
+                    raise
+                format_exporters.append((format_spider, file, exporter))
+        except Exception:
+            self._discard_format_files(spider)
+            raise
+
+    def _discard_format_files(self, spider):
+        format_exporters = self.format_exporters.pop(spider, ())
+        for format_spider, file, _ in format_exporters:
+            try:
+                self._discard_file(format_spider, file)
+            except Exception:
+                pass
+
+    def _close_format_files(self, spider):
+        """
+        Finish exporting of additional formats and publish their files,
+        all files are discarded if one of them fails
+        """
+        format_exporters = self.format_exporters.get(spider, ())
+        try:
+            for _, file, exporter in format_exporters:
+                exporter.finish_exporting()
+                file.close()
+        except Exception:
+            self._discard_format_files(spider)
+            raise
+        self.format_exporters.pop(spider, None)
+        for format_spider, _, _ in format_exporters:
+            self._publish_file(format_spider)
+
+    def _open_rotating_writer(self, spider, feed_file):
+        if not feed_file:
+            raise NotConfigured('FEED_FILE parameter does not string or does not exist')
+        name_template = spider.settings.get('FEED_ROTATE_NAME', '{stem}.{page}{ext}')
+        url_template = spider.settings.get('FEED_ROTATE_URL', '{filename}')
+        stem, ext = os.path.splitext(feed_file)
+
+        def get_page_path(page):
+            return feed_file if page == 1 else name_template.format(stem=stem, ext=ext, page=page)
+
+        def get_page_url(page):
+            return url_template.format(page=page, filename=os.path.basename(get_page_path(page)))
+
+        def get_page_links(page, last):
+            # RFC 5005: the pages are linked as a paged feed forwards and as archives backwards
+            links = []
+            if page > 1:
+                links.append(('prev-archive', get_page_url(page - 1)))
+            if not last:
+                links.append(('next', get_page_url(page + 1)))
+            exporter = self.exporters[spider]
+            return exporter.serialize_links(links).encode(exporter.encoding)
+
+        def publish_page(page):
+            atomic_file = self.atomic_files.pop(spider, None)
+            if atomic_file is not None:
+                atomic_file.publish()
+
+        return RotatingWriter(lambda page: self._open_file(spider, get_page_path(page)),
+                              links=get_page_links, publish_page=publish_page,
+                              max_items=spider.settings.getint('FEED_ROTATE_ITEMS', 0),
+                              max_bytes=spider.settings.getint('FEED_ROTATE_BYTES', 0),
+                              stats=self.stats)
+
+    def _open_file(self, spider, path, append=False):
+        """
+        Open the feed file and its writers according to the settings
+
+        Parameters
+        ----------
+        spider : scrapy.Spider
+        path : str
+            Path of the feed file
+        append : bool
+            Whether items are appended to the existing feed file
+
+        Returns
+        -------
+        file-like
+            The outermost writer or the file
+        """
+        buffer_size = spider.settings.getint('FEED_BUFFER_SIZE', 0)
+        flush_items = spider.settings.getint('FEED_FLUSH_ITEMS', 0)
+        flush_interval = spider.settings.getfloat('FEED_FLUSH_INTERVAL', 0)
+        coalesced = buffer_size > 0 or flush_items > 0 or flush_interval > 0
+        compression = spider.settings.get('FEED_COMPRESSION')
+        if not compression:
+            compression = infer_compression(str(path)) if path else COMPRESSION_NONE
+        compressed = compression != COMPRESSION_NONE
+        # the previous feed is read by the merger after new items are written
+        # and it's kept untouched if the new feed is unchanged
+        atomic = (spider.settings.getbool('FEED_ATOMIC', False) or spider.settings.getbool('FEED_MERGE', False)
+                  or spider.settings.getbool('FEED_SKIP_UNCHANGED', False))
+        existing_feed = None
+        if append and path and os.path.exists(path):
+            if compressed:
+                raise NotConfigured('FEED_APPEND cannot be combined with compression')
+            try:
+                existing_feed = ExistingFeed.scan(path)
+            except (IOError, OSError, ValueError) as e:
+                raise CloseSpider('Cannot append to file {}: {}'.format(path, e))
+        try:
+            if atomic:
+                file = self.atomic_files[spider] = AtomicFile(
+                    path, fsync=spider.settings.get('FEED_FSYNC', FSYNC_CLOSE),
+                    fsync_interval=spider.settings.getfloat('FEED_FSYNC_INTERVAL', 0), stats=self.stats
+                )
+                if existing_feed is not None:
+                    # the existing feed is copied to the temporary file before new items
+                    self.existing_feeds[spider] = existing_feed
+            elif existing_feed is not None:
+                # new items overwrite the closing tags
+                file = open(path, 'r+b', 0 if coalesced else -1)
+                file.seek(existing_feed.tail_offset)
+                file.truncate()
+                self.existing_feeds[spider] = existing_feed
+            else:
+                # coalesced and compressed data is written by large chunks, so the file doesn't need its own buffer
+                file = open(path, 'wb', 0 if coalesced or compressed else -1)
+        except TypeError:
+            raise NotConfigured('FEED_FILE parameter does not string or does not exist')
+        except (IOError, OSError) as e:
+            raise CloseSpider('Cannot open file {}: {}'.format(path, e))
+        try:
+            if compressed:
+                level = spider.settings.get('FEED_COMPRESSION_LEVEL')
+                file = CompressingWriter(file, compression, level=None if level is None else int(level),
+                                         stats=self.stats)
+            if (compressed or atomic) and not coalesced:
+                # the compressor and the atomic file are fed by large chunks instead of each SAX event
+                file = io.BufferedWriter(file)
+            if coalesced:
+                file = CoalescingWriter(file, buffer_size=buffer_size, flush_items=flush_items,
+                                        flush_interval=flush_interval, stats=self.stats)
+            if spider.settings.getbool('FEED_WRITER_THREAD', False):
+                file = BackgroundWriter(file, max_queue_size=spider.settings.getint('FEED_WRITER_QUEUE_SIZE', 1000),
+                                        stats=self.stats)
+        except Exception:
+            try:
+                file.close()
+            finally:
+                atomic_file = self.atomic_files.pop(spider, None)
+                existing_feed = self.existing_feeds.pop(spider, None)
+                if atomic_file is not None:
+                    atomic_file.discard()
+                elif existing_feed is not None:
+                    existing_feed.restore()
+            raise
+        return file
+
+    def _open_exporter(self, spider, file, exporter_args):
         item_cls = spider.settings.get('FEED_ITEM_CLASS', spider.settings.get('FEED_ITEM_CLS', RssItem))
         if isinstance(item_cls, six.string_types):
             item_cls = load_object(item_cls)
 
         namespaces = spider.settings.get('FEED_NAMESPACES', {})
 
-        feed_exporter = spider.settings.get('FEED_EXPORTER', FeedItemExporter)
+        feed_exporter = spider.settings.get('FEED_EXPORTER', self.exporter_cls)
         if isinstance(feed_exporter, six.string_types):
             feed_exporter = load_object(feed_exporter)
-        if not issubclass(feed_exporter, FeedItemExporter):
-            raise TypeError("FEED_EXPORTER must be FeedItemExporter or its subclass, not '{}'".format(feed_exporter))
-        self.exporters[spider] = feed_exporter(file, feed_title, feed_link, feed_description,
-                                               namespaces=namespaces, item_cls=item_cls)
-        self.exporters[spider].start_exporting()
+        if not issubclass(feed_exporter, self.exporter_cls):
+            raise TypeError("FEED_EXPORTER must be {0} or its subclass, not '{1}'"
+                            .format(self.exporter_cls.__name__, feed_exporter))
+        exporter_kwargs = {
+            'namespaces': namespaces,
+            'item_cls': item_cls,
+            'validation': spider.settings.get('FEED_VALIDATION', VALIDATION_STRICT),
+            'validation_sample_rate': spider.settings.getfloat('FEED_VALIDATION_SAMPLE_RATE', 0.1),
+            'stats': self.stats,
+            'engine': spider.settings.get('FEED_EXPORT_ENGINE', ENGINE_SAX),
+        }
+        sort_key = spider.settings.get('FEED_SORT_KEY')
+        if isinstance(sort_key, six.string_types):
+            sort_key = load_object(sort_key)
+        # retention of items and the digest aren't passed to exporters of serialization workers
+        retention_kwargs = {
+            'max_items': spider.settings.getint('FEED_MAX_ITEMS', 0),
+            'sort_items': spider.settings.getbool('FEED_SORT_ITEMS', False),
+            'sort_key': sort_key,
+            'sort_buffer_size': spider.settings.getint('FEED_SORT_BUFFER_SIZE', 16 << 20),
+            'sort_max_fan_in': spider.settings.getint('FEED_SORT_MAX_FAN_IN', 64),
+            'sort_temp_dir': spider.settings.get('FEED_SORT_TEMP_DIR'),
+            'merger': self._create_merger(spider) if spider.settings.getbool('FEED_MERGE', False) else None,
+            'digest': spider.settings.getbool('FEED_SKIP_UNCHANGED', False),
+        }
+        exporter = self.exporters[spider] = feed_exporter(file, *exporter_args,
+                                                          **dict(exporter_kwargs, **retention_kwargs))
+        if spider.settings.getbool('FEED_VALIDATE_SCHEMA', False):
+            exporter.validate_schema()
+        writer = self.writers.get(spider)
+        existing_feed = self.existing_feeds.get(spider)
+        if existing_feed is not None:
+            atomic_file = self.atomic_files.get(spider)
+            if atomic_file is not None:
+                # nothing is written to the temporary file yet, so the copy precedes new items
+                existing_feed.copy(atomic_file, self._serialize_last_build_date(exporter))
+            undeclared_namespaces = exporter.resume_exporting(existing_feed.namespaces)
+            if undeclared_namespaces and self.stats is not None:
+                # items declare these namespaces themselves
+                self.stats.set_value('feed/append/undeclared_namespaces', len(undeclared_namespaces))
+        elif isinstance(writer, RotatingWriter):
+            # the header and the footer are serialized once and written to each page
+            header = exporter.serialize_header()
+            writer.header = header.encode(exporter.encoding)
+            writer.footer = exporter.serialize_footer().encode(exporter.encoding)
+            exporter.export_fragment(header)
+        else:
+            exporter.start_exporting()
+
+        workers = spider.settings.getint('FEED_SERIALIZATION_WORKERS', 0)
+        if workers > 0:
+            pool_type = spider.settings.get('FEED_SERIALIZATION_POOL', POOL_PROCESS)
+            if pool_type not in POOLS:
+                raise ValueError("Serialization pool must be one of {}, not {!r}"
+                                 .format(', '.join(map(repr, sorted(POOLS))), pool_type))
+            # retained items are written when the spider is closed
+            writer = self.writers.get(spider) if not exporter.retains_items else None
+            self.pools[spider] = POOLS[pool_type](
+                exporter, workers,
+                max_in_flight=spider.settings.getint('FEED_SERIALIZATION_MAX_IN_FLIGHT') or None,
+                batch_size=spider.settings.getint('FEED_SERIALIZATION_BATCH_SIZE') or None,
+                exporter_args=exporter_args, exporter_kwargs=exporter_kwargs,
+                root_namespaces=existing_feed.namespaces if existing_feed is not None else None,
+                item_written=writer.end_item if writer is not None else None
+            )
+
+    def _create_merger(self, spider):
+        feed_file = spider.settings.get('FEED_FILE')
+        compression = spider.settings.get('FEED_COMPRESSION') or infer_compression(str(feed_file))
+        return FeedMerger(feed_file, key=spider.settings.get('FEED_MERGE_KEY', MERGE_KEY_GUID),
+                          max_age=spider.settings.getfloat('FEED_MERGE_MAX_AGE', 0),
+                          max_items=spider.settings.getint('FEED_MERGE_MAX_ITEMS', 0),
+                          compression=compression, stats=self.stats)
+
+    def _discard_file(self, spider, file):
+        """
+        Close the feed file after a failure,
+        the previous feed is kept untouched if the feed file is atomic
+        and the previous feed is restored if items are appended to it in place
+        """
+        self.writers.pop(spider, None)
+        self.files.pop(spider, None)
+        atomic_file = self.atomic_files.pop(spider, None)
+        existing_feed = self.existing_feeds.pop(spider, None)
+        exporter = self.exporters.get(spider)
+        if exporter is not None:
+            exporter.discard_retained_items()
+        try:
+            file.close()
+        finally:
+            if atomic_file is not None:
+                atomic_file.discard()
+            elif existing_feed is not None:
+                existing_feed.restore()
+
+    def _get_digest_file(self, spider):
+        return spider.settings.get('FEED_DIGEST_FILE') or '{}.digest'.format(spider.settings.get('FEED_FILE'))
+
+    def _is_unchanged(self, spider, path, content_digest):
+        """
+        Whether the published feed file exists and the digest of its content is equal to the new one
+        """
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(self._get_digest_file(spider), 'rb') as f:
+                return f.read().strip() == content_digest.encode('ascii')
+        except (IOError, OSError):
+            return False
+
+    def _publish_file(self, spider):
+        """
+        Publish the closed feed file if it's atomic
+        (unless its content is unchanged and FEED_SKIP_UNCHANGED is set)
+        or update the build date of the existing feed if items are appended to it
+        """
+        atomic_file = self.atomic_files.pop(spider, None)
+        exporter = self.exporters.get(spider)
+        content_digest = exporter.content_digest if exporter is not None else None
+        if content_digest is not None and self.stats is not None:
+            self.stats.set_value('feed/etag', exporter.etag)
+        if atomic_file is not None:
+            if content_digest is not None and self._is_unchanged(spider, atomic_file.path, content_digest):
+                # the published feed keeps its lastBuildDate
+                atomic_file.discard()
+                if self.stats is not None:
+                    self.stats.inc_value('feed/unchanged')
+            else:
+                atomic_file.publish()
+                if content_digest is not None:
+                    digest_file = AtomicFile(self._get_digest_file(spider), fsync=atomic_file.fsync)
+                    try:
+                        digest_file.write(content_digest.encode('ascii') + b'\n')
+                        digest_file.publish()
+                    except Exception:
+                        digest_file.discard()
+                        raise
+        existing_feed = self.existing_feeds.pop(spider, None)
+        if existing_feed is not None and atomic_file is None:
+            if not existing_feed.update_last_build_date(self._serialize_last_build_date(exporter)):
+                logger.warning('<lastBuildDate> of feed %s is kept, the new build date has a different length '
+                               'or the feed has no <lastBuildDate>, enable FEED_ATOMIC to replace it',
+                               existing_feed.path)
+                if self.stats is not None:
+                    self.stats.inc_value('feed/append/last_build_date_kept')
+
+    @staticmethod
+    def _serialize_last_build_date(exporter):
+        last_build_date = exporter.channel.lastBuildDate
+        content = last_build_date.serialize_attrs()[last_build_date.content_name.xml_name]
+        return escape(content).encode(exporter.encoding)
+
+    def spider_closed(self, spider=None):
+        spider = self._get_spider(spider)
+        file = self.files[spider]
+        try:
+            pool = self.pools.pop(spider, None)
+            if pool is not None:
+                try:
+                    pool.drain()
+                finally:
+                    pool.close()
+            exporter = self.exporters[spider]
+            writer = self.writers.get(spider)
+            exporter.export_retained_items(writer.end_item if writer is not None else None)
+            exporter.finish_exporting()
+            file.close()
+        except Exception:
+            try:
+                self._discard_file(spider, file)
+            finally:
+                self._discard_format_files(spider)
+            raise
+        self.writers.pop(spider, None)
+        self.files.pop(spider)
+        self._publish_file(spider)
+        self._close_format_files(spider)
+
+    def process_item(self, item, spider=None):
+        spider = self._get_spider(spider)
+        writer = self.writers.get(spider)
+        pool = self.pools.get(spider)
+        if pool is not None:
+            pool.submit(item)
+            return self._wait_for_pool(pool, writer, item)
+        exporter = self.exporters[spider]
+        format_exporters = self.format_exporters.get(spider)
+        if format_exporters:
+            # the item is validated once and serialized once per format
+            feed_item = exporter.prepare_item(item)
+            exporter.export_prepared_item(feed_item)
+            for _, format_file, format_exporter in format_exporters:
+                format_exporter.export_item(feed_item)
+                if hasattr(format_file, 'end_item'):
+                    format_file.end_item()
+        else:
+            exporter.export_item(item)
+        if writer is not None and not exporter.retains_items:
+            writer.end_item()
+        return self._wait_for_writer(writer, item)
+
+    def _wait_for_pool(self, pool, writer, item):
+        waiter = pool.get_waiter()
+        if waiter is None:
+            return self._wait_for_writer(writer, item)
+        if _get_running_loop() is not None:
+            # items are processed by coroutines of the event loop
+            from .aio import wait_for_pool
+            return wait_for_pool(pool, lambda: self._wait_for_writer(writer, item))
+
+        def merge(_):
+            pool.merge_ready()
+            return self._wait_for_pool(pool, writer, item)
+
+        # process the next items when serialized items are written, the reactor isn't blocked meanwhile
+        return threads.deferToThread(waiter).addCallback(merge)
+
+    @staticmethod
+    def _wait_for_writer(writer, item):
+        wait_for_space = getattr(writer, 'wait_for_space', None)
+        if wait_for_space is not None:
+            # process the next items when the queue of the writer thread isn't full
+            waiting = wait_for_space()
+            if waiting is not None:
+                return waiting.addCallback(lambda _: item)
+        return item
+
+
+class DuplicateFilterPipeline(object):
+    """
+    Pipeline that drops items whose identifier has already been seen,
+    it must have a lower priority number than :class:`FeedExportPipeline`
+    """
+
+    def __init__(self, crawler):
+        self.filters = {}
+        self.key_options = {}
+        self.reserved_keys = {}
+        self.spider = getattr(crawler, 'spider', None)
+        self.stats = getattr(crawler, 'stats', None)
+
+    def _get_spider(self, spider):
+        return self.spider or spider
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler)
+        crawler.signals.connect(pipeline.spider_opened, signals.spider_opened)
+        crawler.signals.connect(pipeline.spider_closed, signals.spider_closed)
+        crawler.signals.connect(pipeline.item_scraped, signals.item_scraped)
+        crawler.signals.connect(pipeline.item_failed, signals.item_dropped)
+        if hasattr(signals, 'item_error'):
+            crawler.signals.connect(pipeline.item_failed, signals.item_error)
+        return pipeline
+
+    def spider_opened(self, spider=None):
+        spider = self._get_spider(spider)
+        key = spider.settings.get('FEED_DEDUP_KEY', DEDUP_KEY_GUID)
+        if key not in DEDUP_KEYS:
+            raise NotConfigured('FEED_DEDUP_KEY must be one of {}, not {!r}'
+                                .format(', '.join(map(repr, DEDUP_KEYS)), key))
+        mode = spider.settings.get('FEED_DEDUP_MODE', DEDUP_MODE_MEMORY)
+        if mode == DEDUP_MODE_MEMORY:
+            item_filter = MemoryFilter()
+        elif mode == DEDUP_MODE_BLOOM:
+            item_filter = BloomFilter(capacity=spider.settings.getint('FEED_DEDUP_BLOOM_CAPACITY', 1000000),
+                                      error_rate=spider.settings.getfloat('FEED_DEDUP_BLOOM_ERROR_RATE', 0.001))
+        elif mode == DEDUP_MODE_PERSISTENT:
+            path = spider.settings.get('FEED_DEDUP_PATH')
+            if not path:
+                raise NotConfigured('FEED_DEDUP_PATH parameter does not exist')
+            item_filter = PersistentFilter(str(path))
+        else:
+            raise NotConfigured('FEED_DEDUP_MODE must be one of {}, not {!r}'
+                                .format(', '.join(map(repr, DEDUP_MODES)), mode))
+        self.filters[spider] = item_filter
+        self.key_options[spider] = (key,
+                                    spider.settings.getlist('FEED_DEDUP_FIELDS', ['title', 'link', 'description']),
+                                    spider.settings.getbool('FEED_DEDUP_AUTO_GUID', False))
+        if hasattr(item_filter, 'reserve'):
+            # keys of items that are being processed by the next pipelines
+            self.reserved_keys[spider] = {}
 
     def spider_closed(self, spider=None):
         spider = self._get_spider(spider)
-        self.exporters[spider].finish_exporting()
-        file = self.files.pop(spider)
-        file.close()
+        self.key_options.pop(spider, None)
+        self.reserved_keys.pop(spider, None)
+        item_filter = self.filters.pop(spider, None)
+        if item_filter is not None:
+            item_filter.close()
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
+
+    @staticmethod
+    def _get_feed_item(item):
+        feed_item = getattr(item, 'rss', None)
+        if not isinstance(feed_item, RssItem):
+            feed_item = item
+        return feed_item if isinstance(feed_item, FeedItem) else None
+
+    def _get_reserved_key(self, spider, item):
+        feed_item = self._get_feed_item(item)
+        if feed_item is None:
+            return None
+        key, fields, _ = self.key_options[spider]
+        return get_item_key(feed_item, key, fields)
+
+    def item_scraped(self, item, spider=None):
+        """
+        Store the reserved key of the exported item
+        """
+        spider = self._get_spider(spider)
+        reserved_keys = self.reserved_keys.get(spider)
+        if not reserved_keys:
+            return
+        item_key = self._get_reserved_key(spider, item)
+        if item_key is not None and reserved_keys.pop(item_key, None) is not None:
+            self.filters[spider].add(item_key)
+
+    def item_failed(self, item, spider=None):
+        """
+        Release the reserved key of the item that's dropped or failed by the next pipelines,
+        so its duplicates aren't dropped
+        """
+        spider = self._get_spider(spider)
+        reserved_keys = self.reserved_keys.get(spider)
+        if not reserved_keys:
+            return
+        item_key = self._get_reserved_key(spider, item)
+        # duplicates that're dropped by this pipeline don't release the key of the first item
+        if item_key is not None and reserved_keys.get(item_key) == id(item):
+            del reserved_keys[item_key]
+            self.filters[spider].release(item_key)
 
     def process_item(self, item, spider=None):
         spider = self._get_spider(spider)
-        self.exporters[spider].export_item(item)
+        key, fields, auto_guid = self.key_options[spider]
+        feed_item = self._get_feed_item(item)
+        if feed_item is None:
+            # unsupported items are rejected by the exporter
+            return item
+        if auto_guid:
+            guid = getattr(feed_item, 'guid', None)
+            link = getattr(feed_item, 'link', None)
+            if guid is not None and link is not None and not guid.assigned and link.assigned:
+                feed_item.guid = link.value
+        item_key = get_item_key(feed_item, key, fields)
+        if item_key is None:
+            self._inc_stats('feed/dedup/missing_key')
+            return item
+        reserved_keys = self.reserved_keys.get(spider)
+        if reserved_keys is None:
+            duplicate = self.filters[spider].add(item_key)
+        else:
+            # the key is stored when the item is exported
+            duplicate = self.filters[spider].reserve(item_key)
+            if not duplicate:
+                reserved_keys[item_key] = id(item)
+        if duplicate:
+            self._inc_stats('feed/dedup/hits')
+            raise DropItem('Duplicate item {!r}'.format(item_key))
+        self._inc_stats('feed/dedup/misses')
         return item
 
 
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+
+from collections import OrderedDict
+import os
+import shutil
+import sys
+import tempfile
+
+import six
+from scrapy import signals
+from scrapy.exceptions import NotConfigured, DropItem
+from scrapy.utils.misc import load_object
+
+from .items import RssItem
+from .meta.element import Element, MultipleElements
+from .pipelines import FeedExportPipeline, _FeedSpider
+from .writers import infer_compression, COMPRESSION_NONE, FSYNC_NONE
+
+
+RESUME_APPEND = 'append'
+RESUME_SPOOL = 'spool'
+RESUME_MODES = (RESUME_APPEND, RESUME_SPOOL)
+
+# settings of the feed that are formatted with the feed key
+ROUTE_TEMPLATE_SETTINGS = ('FEED_FILE', 'FEED_TITLE', 'FEED_LINK', 'FEED_DESCRIPTION')
+# settings that cannot be combined with routing, feeds are finished whenever they are evicted
+UNSUPPORTED_SETTINGS = ('FEED_ROTATE_ITEMS', 'FEED_ROTATE_BYTES', 'FEED_MAX_ITEMS', 'FEED_SORT_ITEMS',
+                        'FEED_MERGE', 'FEED_SKIP_UNCHANGED', 'FEED_FORMATS')
+
+
+def _copy_settings(settings):
+    # settings of the spider are frozen, settings of feeds are changed when they are resumed
+    settings = settings.copy()
+    settings.frozen = False
+    return settings
+
+
+class _Route(object):
+    def __init__(self, key, export_spider, publish_spider=None, spool_path=None):
+        """
+        State of a single feed
+
+        Parameters
+        ----------
+        key
+            Feed key
+        export_spider : _FeedSpider
+            Spider whose settings are used to export items of the feed
+        publish_spider : _FeedSpider or None
+            Spider whose settings are used to publish the spool file
+        spool_path : str or None
+            Path of the spool file
+        """
+        self.key = key
+        self.export_spider = export_spider
+        self.publish_spider = publish_spider
+        self.spool_path = spool_path
+        self.started = False
+
+
+class FeedRouterPipeline(object):
+    """
+    Pipeline that exports items to multiple feeds by :class:`FeedExportPipeline`.
+    Each item is mapped to a feed key that selects the file and the channel settings of its feed,
+    feeds are opened lazily and at most FEED_ROUTE_MAX_OPEN least recently used feeds are kept open.
+    Evicted feeds are finished and resumed by appending to them
+    """
+    feed_pipeline_cls = FeedExportPipeline
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.spider = getattr(crawler, 'spider', None)
+        self.stats = getattr(crawler, 'stats', None)
+        # feeds are passed to the pipeline explicitly
+        self.feed_pipeline = self.feed_pipeline_cls(crawler)
+        self.feed_pipeline.spider = None
+        self.key_functions = {}
+        self.routes = {}
+        self.open_routes = {}
+        self.spool_dirs = {}
+
+    def _get_spider(self, spider):
+        return self.spider or spider
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler)
+        crawler.signals.connect(pipeline.spider_opened, signals.spider_opened)
+        crawler.signals.connect(pipeline.spider_closed, signals.spider_closed)
+        return pipeline
+
+    def spider_opened(self, spider=None):
+        spider = self._get_spider(spider)
+        settings = spider.settings
+        route_key = settings.get('FEED_ROUTE_KEY')
+        if isinstance(route_key, six.string_types):
+            route_key = load_object(route_key)
+        if route_key is None and not settings.get('FEED_ROUTE_FIELD'):
+            raise NotConfigured('FEED_ROUTE_KEY or FEED_ROUTE_FIELD parameter does not exist')
+        resume = settings.get('FEED_ROUTE_RESUME', RESUME_APPEND)
+        if resume not in RESUME_MODES:
+            raise NotConfigured('FEED_ROUTE_RESUME must be one of {}, not {!r}'
+                                .format(', '.join(map(repr, RESUME_MODES)), resume))
+        if settings.getint('FEED_ROUTE_MAX_OPEN', 32) < 0:
+            raise NotConfigured('FEED_ROUTE_MAX_OPEN must be non-negative')
+        if resume == RESUME_SPOOL and settings.getbool('FEED_APPEND', False):
+            raise NotConfigured('FEED_APPEND cannot be combined with FEED_ROUTE_RESUME = {!r}'.format(RESUME_SPOOL))
+        for name in UNSUPPORTED_SETTINGS:
+            if settings.get(name):
+                raise NotConfigured('{} cannot be combined with routing of items'.format(name))
+        self.key_functions[spider] = route_key
+        self.routes[spider] = {}
+        self.open_routes[spider] = OrderedDict()
+        if resume == RESUME_SPOOL:
+            self.spool_dirs[spider] = tempfile.mkdtemp(prefix='scrapy_rss-spool-',
+                                                       dir=settings.get('FEED_ROUTE_SPOOL_DIR'))
+
+    def get_feed_key(self, item, spider):
+        """
+        Get the feed key of the item by FEED_ROUTE_KEY or FEED_ROUTE_FIELD
+
+        Parameters
+        ----------
+        item : FeedItem or scrapy.Item
+            Feed item or an item with 'rss' field
+        spider : scrapy.Spider
+
+        Returns
+        -------
+        object or None
+            Hashable feed key or None if the item has no key
+        """
+        key_function = self.key_functions[spider]
+        if key_function is not None:
+            return key_function(item)
+        field = spider.settings.get('FEED_ROUTE_FIELD')
+        fields = getattr(item, 'fields', {})
+        if field in fields and not isinstance(fields[field], Element):
+            # a field of the item that isn't an element
+            return item.get(field)
+        feed_item = getattr(item, 'rss', None)
+        if not isinstance(feed_item, RssItem):
+            feed_item = item
+        element = getattr(feed_item, field, None)
+        if isinstance(element, MultipleElements):
+            # items are routed by the first element
+            element = element[0] if len(element) else None
+        if not isinstance(element, Element) or not element.assigned:
+            return None
+        if element.content_name is None:
+            raise ValueError('Element <{}> has no content to route items by'.format(field))
+        return getattr(element, str(element.content_name))
+
+    def _create_route(self, spider, key):
+        settings = _copy_settings(spider.settings)
+        overrides = dict(spider.settings.getdict('FEED_ROUTES').get(key) or {})
+        for name in ROUTE_TEMPLATE_SETTINGS:
+            value = overrides.get(name, settings.get(name))
+            if isinstance(value, six.string_types):
+                overrides[name] = value.format(key=key)
+        settings.setdict(overrides, priority='cmdline')
+        for name in UNSUPPORTED_SETTINGS:
+            if settings.get(name):
+                raise NotConfigured('{} cannot be combined with routing of items'.format(name))
+        spool_dir = self.spool_dirs.get(spider)
+        if spool_dir is None:
+            if (settings.getint('FEED_ROUTE_MAX_OPEN', 32)
+                    and (settings.getbool('FEED_ATOMIC', False)
+                         or (settings.get('FEED_COMPRESSION')
+                             or infer_compression(str(settings.get('FEED_FILE')))) != COMPRESSION_NONE)):
+                raise NotConfigured("Compressed and atomic feeds are resumed only if FEED_ROUTE_RESUME = {!r}"
+                                    .format(RESUME_SPOOL))
+            return _Route(key, _FeedSpider(spider, settings))
+        # items are exported to the uncompressed spool file that's published when the spider is closed
+        spool_path = os.path.join(spool_dir, '{}.xml'.format(len(self.routes[spider])))
+        export_settings = _copy_settings(settings)
+        export_settings.setdict({'FEED_FILE': spool_path, 'FEED_COMPRESSION': COMPRESSION_NONE,
+                                 'FEED_ATOMIC': False, 'FEED_FSYNC': FSYNC_NONE}, priority='cmdline')
+        return _Route(key, _FeedSpider(spider, export_settings), _FeedSpider(spider, settings), spool_path)
+
+    def _open_route(self, spider, key):
+        open_routes = self.open_routes[spider]
+        route = open_routes.pop(key, None)
+        if route is not None:
+            # the most recently used feed is the last one
+            open_routes[key] = route
+            return route
+        route = self.routes[spider].get(key)
+        if route is None:
+            route = self.routes[spider][key] = self._create_route(spider, key)
+            self._inc_stats('feed/route/feeds')
+        max_open = spider.settings.getint('FEED_ROUTE_MAX_OPEN', 32)
+        while max_open and len(open_routes) >= max_open:
+            _, evicted_route = open_routes.popitem(last=False)
+            self._close_route(evicted_route)
+            self._inc_stats('feed/route/evictions')
+        if route.started:
+            route.export_spider.settings.set('FEED_APPEND', True, priority='cmdline')
+            self._inc_stats('feed/route/resumes')
+        self.feed_pipeline.spider_opened(route.export_spider)
+        route.started = True
+        open_routes[key] = route
+        return route
+
+    def _close_route(self, route):
+        try:
+            self.feed_pipeline.spider_closed(route.export_spider)
+        finally:
+            self.feed_pipeline.exporters.pop(route.export_spider, None)
+
+    def _publish_spool(self, route):
+        """
+        Copy the spool file of the feed to the feed file that's opened according to the feed settings
+        """
+        file = self.feed_pipeline._open_file(route.publish_spider, route.publish_spider.settings.get('FEED_FILE'))
+        try:
+            with open(route.spool_path, 'rb') as spool:
+                shutil.copyfileobj(spool, file, 1 << 16)
+            file.close()
+        except Exception:
+            self.feed_pipeline._discard_file(route.publish_spider, file)
+            raise
+        self.feed_pipeline._publish_file(route.publish_spider)
+
+    def spider_closed(self, spider=None):
+        spider = self._get_spider(spider)
+        self.key_functions.pop(spider, None)
+        open_routes = self.open_routes.pop(spider)
+        routes = self.routes.pop(spider)
+        spool_dir = self.spool_dirs.pop(spider, None)
+        # other feeds are closed even if a feed fails, the first error is raised
+        exc_info = None
+        try:
+            while open_routes:
+                _, route = open_routes.popitem(last=False)
+                try:
+                    self._close_route(route)
+                except Exception:
+                    exc_info = exc_info or sys.exc_info()
+                    # the spool of the failed feed isn't published
+                    routes.pop(route.key)
+            if spool_dir is not None:
+                for route in routes.values():
+                    try:
+                        self._publish_spool(route)
+                    except Exception:
+                        exc_info = exc_info or sys.exc_info()
+        finally:
+            if spool_dir is not None:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+        if exc_info is not None:
+            six.reraise(*exc_info)
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
+
+    def process_item(self, item, spider=None):
+        spider = self._get_spider(spider)
+        key = self.get_feed_key(item, spider)
+        if key is None:
+            self._inc_stats('feed/route/unrouted')
+            raise DropItem('Item has no feed key')
+        route = self._open_route(spider, key)
+        return self.feed_pipeline.process_item(item, route.export_spider)
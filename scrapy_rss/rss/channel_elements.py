@@ -5,21 +5,27 @@ from ..exceptions import InvalidComponentError
 
 
 class TitleElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class LinkElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class DescriptionElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class LanguageElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class CopyrightElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class ManagingEditorElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
     def validate(self, name=None):
@@ -34,6 +40,7 @@ class ManagingEditorElement(meta.Element):
         super(ManagingEditorElement, self).validate(name)
 
 class WebMasterElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
     def validate(self, name=None):
@@ -48,18 +55,23 @@ class WebMasterElement(meta.Element):
         super(WebMasterElement, self).validate(name)
 
 class PubDateElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True, serializer=format_rfc822)
 
 class LastBuildDateElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True, serializer=format_rfc822)
 
 class CategoryElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class GeneratorElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class DocsElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class CloudElement(meta.Element):
@@ -79,6 +91,7 @@ class CloudElement(meta.Element):
     protocol : {'xml-rpc', 'http-post', 'soap'}
         The protocol of the cloud.  Acceptable values ``xml-rpc``, ``http-post`` or ``soap``
     """
+    __slots__ = ()
     domain = meta.ElementAttribute(required=True)
     port = meta.ElementAttribute(required=True)
     path = meta.ElementAttribute(required=True)
@@ -86,25 +99,32 @@ class CloudElement(meta.Element):
     protocol = meta.ElementAttribute(required=True)
 
 class TtlElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class ImageUrlElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class ImageTitleElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class ImageLinkElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class ImageWidthElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(is_content=True)
 
 class ImageHeightElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(is_content=True)
 
 class ImageDescriptionElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(is_content=True)
 
 class ImageElement(meta.Element):
@@ -132,6 +152,7 @@ class ImageElement(meta.Element):
         Contains text that is included in the TITLE attribute of the link
         formed around the image in the HTML rendering.
     """
+    __slots__ = ()
     url = ImageUrlElement(required=True)
     title = ImageTitleElement(required=True)
     link = ImageLinkElement(required=True)
@@ -141,19 +162,24 @@ class ImageElement(meta.Element):
 
 
 class RatingElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class TextInputTitleElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class TextInputDescriptionElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class TextInputNameElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class TextInputLinkElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class TextInputElement(meta.Element):
@@ -171,6 +197,7 @@ class TextInputElement(meta.Element):
     link
         The URL of the CGI script that processes text input requests.
     """
+    __slots__ = ()
     title = TextInputTitleElement(required=True)
     description = TextInputDescriptionElement(required=True)
     name = TextInputNameElement(required=True)
@@ -178,14 +205,18 @@ class TextInputElement(meta.Element):
 
 
 class SkipHoursHourElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class SkipHoursElement(meta.Element):
+    __slots__ = ()
     hour = meta.MultipleElements(SkipHoursHourElement)
 
 
 class SkipDaysDayElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 class SkipDaysElement(meta.Element):
+    __slots__ = ()
     day = meta.MultipleElements(SkipDaysDayElement)
@@ -5,26 +5,32 @@ from ..utils import format_rfc822
 
 
 class TitleElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class LinkElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class DescriptionElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class AuthorElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class CategoryElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class CommentsElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
@@ -41,6 +47,7 @@ class EnclosureElement(meta.Element):
     type
         A standard MIME type.
     """
+    __slots__ = ()
     url = meta.ElementAttribute(required=True)
     length = meta.ElementAttribute(required=True)
     type = meta.ElementAttribute(required=True)
@@ -60,14 +67,17 @@ class GuidElement(meta.Element):
 
         By default, it equals to `true`.
     """
+    __slots__ = ()
     isPermaLink = meta.ElementAttribute(required=False, serializer=lambda v: str(v).lower(), value=True)
     value = meta.ElementAttribute(required=True, is_content=True)
 
 
 class PubDateElement(meta.Element):
+    __slots__ = ()
     value = meta.ElementAttribute(required=True, serializer=format_rfc822, is_content=True)
 
 
 class SourceElement(meta.Element):
+    __slots__ = ()
     url = meta.ElementAttribute(required=True)
     title = meta.ElementAttribute(is_content=True)
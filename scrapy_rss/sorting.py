@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+import heapq
+import os
+import shutil
+import tempfile
+
+from six.moves import cPickle as pickle
+
+
+class ExternalSorter(object):
+    def __init__(self, max_buffer_size=16 << 20, max_fan_in=64, temp_dir=None, stats=None):
+        """
+        Sorter of serialized items that don't fit in memory.
+        Entries are collected in memory and spilled to sorted temporary files (runs)
+        when their size exceeds ``max_buffer_size``,
+        the runs are merged by a streaming k-way merge when entries are iterated.
+        Entries with equal keys keep the order of addition
+
+        Parameters
+        ----------
+        max_buffer_size : int
+            Total length of fragments in memory after which they are spilled to a run
+        max_fan_in : int
+            Maximum number of runs that are merged at once,
+            the oldest runs are merged into the new run in advance if there are more runs
+        temp_dir : str or None
+            Directory of the temporary directory of runs (default: the system temporary directory)
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the statistics of runs and merges
+        """
+        if max_buffer_size < 1:
+            raise ValueError('Maximum buffer size must be positive, not {!r}'.format(max_buffer_size))
+        if max_fan_in < 2:
+            raise ValueError('Maximum fan-in must be at least 2, not {!r}'.format(max_fan_in))
+        self.max_buffer_size = max_buffer_size
+        self.max_fan_in = max_fan_in
+        self.temp_dir = temp_dir
+        self.stats = stats
+        self._buffer = []
+        self._buffer_size = 0
+        self._number = 0
+        self._directory = None
+        self._runs = []
+
+    def __len__(self):
+        return self._number
+
+    def add(self, key, fragment):
+        """
+        Add the entry
+
+        Parameters
+        ----------
+        key
+            Picklable sort key of the entry
+        fragment : str
+            Serialized item
+        """
+        self._buffer.append((key, self._number, fragment))
+        self._number += 1
+        self._buffer_size += len(fragment)
+        if self._buffer_size >= self.max_buffer_size:
+            self._spill()
+
+    def __iter__(self):
+        """
+        Iterate over fragments of entries sorted by their keys
+
+        Returns
+        -------
+        iterator of str
+        """
+        self._buffer.sort()
+        if not self._runs:
+            return (entry[2] for entry in self._buffer)
+        while len(self._runs) + 1 > self.max_fan_in:
+            runs = self._runs[:self.max_fan_in]
+            del self._runs[:self.max_fan_in]
+            self._write_run(heapq.merge(*map(self._read_run, runs)))
+            for run in runs:
+                os.remove(run)
+            self._inc_stats('feed/sort/merges')
+        self._inc_stats('feed/sort/merges')
+        return (entry[2] for entry in heapq.merge(self._buffer, *map(self._read_run, self._runs)))
+
+    def _spill(self):
+        self._buffer.sort()
+        self._write_run(self._buffer)
+        self._buffer = []
+        self._buffer_size = 0
+        self._inc_stats('feed/sort/runs')
+
+    def _write_run(self, entries):
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix='scrapy_rss-sort-', dir=self.temp_dir)
+        fd, path = tempfile.mkstemp(suffix='.run', dir=self._directory)
+        with os.fdopen(fd, 'wb') as f:
+            # a pickler per entry, the memo of a shared pickler would keep all entries in memory
+            for entry in entries:
+                pickle.dump(entry, f, pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+
+    @staticmethod
+    def _read_run(path):
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+
+    def _inc_stats(self, key):
+        if self.stats is not None:
+            self.stats.inc_value(key)
+
+    def close(self):
+        """
+        Discard entries and remove runs
+        """
+        self._buffer = []
+        self._buffer_size = 0
+        self._runs = []
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+from xml.sax.saxutils import escape, quoteattr
+
+import six
+
+from . import meta
+from .exceptions import InvalidFeedItemComponentsError
+
+
+XML_NS_URI = 'http://www.w3.org/XML/1998/namespace'
+
+
+class _NotCompiledError(Exception):
+    """
+    Element cannot be serialized by templates
+    """
+
+
+def _qname(context, xml_name):
+    """
+    Build a qualified name as :class:`xml.sax.saxutils.XMLGenerator` does
+
+    Parameters
+    ----------
+    context : {str : str or None}
+        Declared namespaces {URI: prefix}
+    xml_name : (str or None, str)
+        Name in the format **(ns_uri, name)**
+
+    Returns
+    -------
+    str
+    """
+    ns_uri, name = xml_name
+    if ns_uri:
+        if ns_uri == XML_NS_URI:
+            return 'xml:' + name
+        prefix = context[ns_uri]
+        if prefix:
+            return prefix + ':' + name
+    return name
+
+
+class ElementTemplate(object):
+    __slots__ = ('attrs', 'children')
+
+    def __init__(self, element_cls, context):
+        """
+        Precomputed XML fragments of elements of the class
+
+        Parameters
+        ----------
+        element_cls : ElementMeta
+            Class of elements
+        context : {str : str or None}
+            Namespaces {URI: prefix} that are declared in the scope of elements
+
+        Raises
+        ------
+        _NotCompiledError
+            If XML names of attributes are not unique
+        """
+        attr_xml_names = [attr_name.xml_name for attr_name in element_cls._attrs]
+        if len(set(attr_xml_names)) != len(attr_xml_names):
+            raise _NotCompiledError(element_cls)
+        content_name = element_cls._content_name
+        # pairs (private name, attribute prefix ' qname=' or None for content) in the order of declaration
+        self.attrs = tuple((attr_name.priv_name,
+                            None if attr_name is content_name
+                            else ' {}='.format(_qname(context, attr_name.xml_name)))
+                           for attr_name in element_cls._attrs)
+        # tuples (name, open tag without closing bracket, close tag, whether child is multiple)
+        self.children = tuple((child_name, '<' + _qname(context, child_name.xml_name),
+                               '</{}>'.format(_qname(context, child_name.xml_name)),
+                               isinstance(prototype, meta.MultipleElements))
+                              for child_name, prototype in element_cls._children.items())
+
+
+class TemplateSerializer(object):
+    def __init__(self, namespaces, encoding='utf-8'):
+        """
+        Serializer of feed elements that joins precomputed XML fragments of element classes.
+        Output is equal to the output of :class:`xml.sax.saxutils.XMLGenerator`
+        for elements whose namespaces are declared by the root element.
+        Namespaces of element classes are checked once per class,
+        namespaces assigned to element and attribute instances are checked on each serialization
+
+        Parameters
+        ----------
+        namespaces : Iterable[(str or None, str)]
+            Namespaces (prefix, URI) that are declared by the root element in the order of declaration
+        encoding : str
+            Encoding of the output document
+        """
+        self._context = {}
+        self._namespaces = set()
+        for ns_prefix, ns_uri in namespaces:
+            self._context[ns_uri] = ns_prefix
+            self._namespaces.add((ns_prefix, ns_uri))
+        self._encoding = encoding
+        self._templates = {}
+
+    def get_template(self, element_cls):
+        """
+        Get template of elements of the class
+
+        Parameters
+        ----------
+        element_cls : ElementMeta
+
+        Returns
+        -------
+        ElementTemplate or None
+            Template or None if elements of the class require namespace declarations
+        """
+        try:
+            return self._templates[element_cls]
+        except KeyError:
+            pass
+        template = None
+        if element_cls._components_namespaces <= self._namespaces:
+            try:
+                template = ElementTemplate(element_cls, self._context)
+            except _NotCompiledError:
+                pass
+        self._templates[element_cls] = template
+        return template
+
+    def serialize(self, element, xml_name):
+        """
+        Serialize the element
+
+        Parameters
+        ----------
+        element : Element
+        xml_name : (str or None, str)
+            Name of the element in the format **(ns_uri, name)**
+
+        Returns
+        -------
+        str or None
+            XML fragment or None if element cannot be serialized by templates,
+            including elements whose namespaces aren't declared by the root element
+
+        Raises
+        ------
+        InvalidFeedItemComponentsError
+            If an attribute cannot be serialized
+        """
+        fragments = []
+        try:
+            qname = _qname(self._context, xml_name)
+            self._render(element, '<' + qname, '</{}>'.format(qname), fragments)
+        except _NotCompiledError:
+            return None
+        return ''.join(fragments)
+
+    def _render(self, element, open_tag, close_tag, fragments):
+        template = self._templates.get(element.__class__, False)
+        if template is False:
+            template = self.get_template(element.__class__)
+        if template is None:
+            raise _NotCompiledError(element.__class__)
+        namespaces = self._namespaces
+        # namespace of the instance requires a declaration that's missing in templates
+        if element._ns_uri and (element._ns_prefix, element._ns_uri) not in namespaces:
+            raise _NotCompiledError(element.__class__)
+        append = fragments.append
+        append(open_tag)
+        content = None
+        try:
+            for attr_priv_name, attr_prefix in template.attrs:
+                attr = getattr(element, attr_priv_name)
+                if not attr.assigned:
+                    continue
+                if attr._ns_uri and (attr._ns_prefix, attr._ns_uri) not in namespaces:
+                    raise _NotCompiledError(element.__class__)
+                if attr_prefix is None:
+                    content = attr.serializer(attr._value)
+                else:
+                    append(attr_prefix)
+                    append(quoteattr(attr.serializer(attr._value)))
+        except _NotCompiledError:
+            raise
+        except Exception as e:
+            raise InvalidFeedItemComponentsError(element, msg=str(e))
+        append('>')
+        if content:
+            if not isinstance(content, six.text_type):
+                content = six.text_type(content, self._encoding)
+            append(escape(content))
+        children = element._children
+        for child_name, child_open_tag, child_close_tag, multiple in template.children:
+            child = children.get(child_name)
+            if child is None or not child.assigned:
+                continue
+            for instance in (child if multiple else (child,)):
+                self._render(instance, child_open_tag, child_close_tag, fragments)
+        append(close_tag)
@@ -1,7 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import calendar
 import locale
 import datetime
+import email.utils
 import functools
 import re
 import warnings
@@ -61,6 +63,101 @@ def format_rfc822(date):
     return date
 
 
+# unlike parsedate_tz() of Python 3, it returns None offset of dates without a timezone
+_parsedate_tz = getattr(email.utils, '_parsedate_tz', email.utils.parsedate_tz)
+
+
+def _parse_rfc822(date):
+    """
+
+    Parameters
+    ----------
+    date : str
+        String formatted according to RFC 822
+
+    Returns
+    -------
+    (datetime.datetime, int or None)
+        Naive datetime object and its UTC offset in seconds, None if the string has no timezone
+
+    Raises
+    ------
+    ValueError
+        if date is an invalid formatted string
+    """
+    parsed = _parsedate_tz(date)
+    if parsed is None:
+        raise ValueError("Invalid date: '{}'".format(date))
+    return datetime.datetime(*parsed[:6]), parsed[9]
+
+
+def get_timestamp(date):
+    """
+
+    Parameters
+    ----------
+    date : datetime.datetime or datetime.date or str
+        Datetime object or string formatted according to RFC 822,
+        naive datetime objects and strings without a timezone are in the local timezone
+        like in :func:`format_rfc822`
+
+    Returns
+    -------
+    float
+        Number of seconds since the epoch
+
+    Raises
+    ------
+    ValueError
+        if date is an invalid formatted string
+    """
+    if isinstance(date, six.string_types):
+        date, offset = _parse_rfc822(date)
+        if offset is not None:
+            return calendar.timegm(date.timetuple()) - float(offset)
+    if isinstance(date, datetime.date) and not isinstance(date, datetime.datetime):
+        date = datetime.datetime(date.year, date.month, date.day)
+    if not date.tzinfo:
+        date = date.replace(tzinfo=get_tzlocal())
+    return calendar.timegm(date.utctimetuple()) + date.microsecond / 1e6
+
+
+def format_rfc3339(date):
+    """
+
+    Parameters
+    ----------
+    date : datetime.datetime or datetime.date or str
+        Datetime object or string formatted according to RFC 822,
+        naive datetime objects and strings without a timezone are in the local timezone
+        like in :func:`format_rfc822`
+
+    Returns
+    -------
+    str
+        Stringified datetime object according to RFC 3339 standard with seconds precision
+
+    Raises
+    ------
+    ValueError
+        if date is an invalid formatted string
+    """
+    if isinstance(date, six.string_types):
+        date, offset = _parse_rfc822(date)
+    else:
+        offset = None
+        if isinstance(date, datetime.date) and not isinstance(date, datetime.datetime):
+            date = datetime.datetime(date.year, date.month, date.day)
+    if offset is None:
+        if not date.tzinfo:
+            date = date.replace(tzinfo=get_tzlocal())
+        offset = int(date.utcoffset().total_seconds())
+    offset_minutes = abs(offset) // 60
+    return '{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}{}{:02d}:{:02d}'.format(
+        date.year, date.month, date.day, date.hour, date.minute, date.second,
+        '-' if offset < 0 else '+', offset_minutes // 60, offset_minutes % 60)
+
+
 def object_to_list(obj):
     """
     Wrap object to list.
@@ -0,0 +1,600 @@
+# -*- coding: utf-8 -*-
+
+import bz2
+import gzip
+import io
+import os
+import stat
+import tempfile
+import threading
+import time
+import zlib
+
+from six.moves import queue
+from twisted.internet import defer
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+
+_clock = getattr(time, 'monotonic', time.time)
+
+COMPRESSION_NONE = 'none'
+COMPRESSION_GZIP = 'gzip'
+COMPRESSION_BZ2 = 'bz2'
+COMPRESSION_XZ = 'xz'
+# {compression: (file extensions, allowed levels)}
+COMPRESSIONS = {
+    COMPRESSION_GZIP: (('.gz', '.gzip'), range(0, 10)),
+    COMPRESSION_BZ2: (('.bz2',), range(1, 10)),
+    COMPRESSION_XZ: (('.xz',), range(0, 10)),
+}
+
+FSYNC_NONE = 'none'
+FSYNC_CLOSE = 'close'
+FSYNC_PERIODIC = 'periodic'
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_CLOSE, FSYNC_PERIODIC)
+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def infer_compression(path):
+    """
+    Get the compression of the file by its extension
+
+    Parameters
+    ----------
+    path : str
+        Path of the file
+
+    Returns
+    -------
+    str
+        One of :data:`COMPRESSIONS` or :data:`COMPRESSION_NONE`
+    """
+    extension = os.path.splitext(path)[1].lower()
+    for compression, (extensions, _) in COMPRESSIONS.items():
+        if extension in extensions:
+            return compression
+    return COMPRESSION_NONE
+
+
+def open_decompressed(path, compression):
+    """
+    Open the compressed file for reading of decompressed data
+
+    Parameters
+    ----------
+    path : str
+        Path of the file
+    compression : str
+        One of :data:`COMPRESSIONS` or :data:`COMPRESSION_NONE`
+
+    Returns
+    -------
+    file-like
+        Binary file
+    """
+    if compression == COMPRESSION_GZIP:
+        return gzip.GzipFile(path, 'rb')
+    if compression == COMPRESSION_BZ2:
+        return bz2.BZ2File(path, 'rb')
+    if compression == COMPRESSION_XZ:
+        if lzma is None:
+            raise ValueError("Compression {!r} requires module lzma".format(compression))
+        return lzma.LZMAFile(path, 'rb')
+    return open(path, 'rb')
+
+
+def _create_compressor(compression, level):
+    if compression == COMPRESSION_GZIP:
+        # the gzip container is written by zlib itself if wbits is 16 + window size
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level, zlib.DEFLATED, 16 + 15)
+    if compression == COMPRESSION_BZ2:
+        return bz2.BZ2Compressor(9 if level is None else level)
+    if lzma is None:
+        raise ValueError("Compression {!r} requires module lzma".format(compression))
+    return lzma.LZMACompressor(lzma.FORMAT_XZ, preset=level)
+
+
+class CoalescingWriter(io.BytesIO):
+    def __init__(self, file, buffer_size=0, flush_items=0, flush_interval=0, stats=None, clock=_clock):
+        """
+        Binary writer that collects written data in memory
+        and writes it to the file at once when any threshold is reached at the end of an item.
+        Writes go to the in-memory buffer without any checks, so the output is written by whole items
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file that receives coalesced data
+        buffer_size : int
+            Flush when the size of buffered data reaches this number of bytes, 0 disables the threshold
+        flush_items : int
+            Flush after this number of items, 0 disables the threshold
+        flush_interval : float
+            Flush when this number of seconds has passed since the last flush, 0 disables the threshold
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the flush statistics
+        clock : callable
+            Source of time in seconds
+        """
+        super(CoalescingWriter, self).__init__()
+        if buffer_size < 0 or flush_items < 0 or flush_interval < 0:
+            raise ValueError('Buffer thresholds must be non-negative numbers')
+        self.file = file
+        self.buffer_size = buffer_size
+        self.flush_items = flush_items
+        self.flush_interval = flush_interval
+        self.stats = stats
+        self._clock = clock
+        self._buffered_items = 0
+        self._last_flush_time = clock()
+
+    def end_item(self):
+        """
+        Mark the end of the item data and flush if any threshold is reached
+        """
+        self._buffered_items += 1
+        if (self.flush_items and self._buffered_items >= self.flush_items
+                or self.buffer_size and self.tell() >= self.buffer_size
+                or self.flush_interval and self._clock() - self._last_flush_time >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self.closed:
+            return
+        if self.tell():
+            data = self.getvalue()
+            self.seek(0)
+            self.truncate()
+            self.file.write(data)
+            self.file.flush()
+            if self.stats is not None:
+                self.stats.inc_value('feed/buffer/flushes')
+                self.stats.inc_value('feed/buffer/flushed_bytes', len(data))
+        self._buffered_items = 0
+        self._last_flush_time = self._clock()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            super(CoalescingWriter, self).close()
+            self.file.close()
+
+
+class CompressingWriter(io.RawIOBase):
+    def __init__(self, file, compression, level=None, stats=None):
+        """
+        Binary writer that compresses written data incrementally
+        and writes the compressed data to the file.
+        Compressed data is flushed by :meth:`close` only, so :meth:`flush` doesn't degrade the compression ratio
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file that receives compressed data
+        compression : str
+            One of :data:`COMPRESSIONS`: 'gzip', 'bz2' or 'xz'
+        level : int or None
+            Compression level (preset of 'xz'), None means the default level of the compression
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the compression statistics
+        """
+        super(CompressingWriter, self).__init__()
+        if compression not in COMPRESSIONS:
+            raise ValueError("Compression must be one of {}, not {!r}"
+                             .format(', '.join(map(repr, sorted(COMPRESSIONS))), compression))
+        if level is not None and level not in COMPRESSIONS[compression][1]:
+            levels = COMPRESSIONS[compression][1]
+            raise ValueError("Level of compression {!r} must be in range [{}, {}], not {!r}"
+                             .format(compression, levels[0], levels[-1], level))
+        self.file = file
+        self.compression = compression
+        self.stats = stats
+        self._compressor = _create_compressor(compression, level)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self.file.write(compressed)
+        if self.stats is not None:
+            self.stats.inc_value('feed/compression/input_bytes', len(data))
+            self.stats.inc_value('feed/compression/output_bytes', len(compressed))
+        return len(data)
+
+    def flush(self):
+        if not self.closed:
+            self.file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            compressed = self._compressor.flush()
+            self.file.write(compressed)
+            if self.stats is not None:
+                self.stats.inc_value('feed/compression/output_bytes', len(compressed))
+        finally:
+            super(CompressingWriter, self).close()
+            self.file.close()
+
+
+class AtomicFile(io.RawIOBase):
+    def __init__(self, path, fsync=FSYNC_CLOSE, fsync_interval=0, stats=None, clock=_clock):
+        """
+        Binary file that's written as a temporary file in the directory of the target file
+        and replaces the target file by :meth:`publish`,
+        so readers of the target file never see a partial file.
+        :meth:`close` doesn't replace the target file, :meth:`discard` removes the temporary file
+
+        Parameters
+        ----------
+        path : str
+            Path of the target file
+        fsync : str
+            Durability policy:
+            'none' doesn't synchronize the file with the disk,
+            'close' synchronizes the file when it's closed and the directory when the file is published,
+            'periodic' synchronizes the file every ``fsync_interval`` seconds in addition
+        fsync_interval : float
+            Number of seconds between synchronizations in the 'periodic' mode
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the synchronization statistics
+        clock : callable
+            Source of time in seconds
+        """
+        super(AtomicFile, self).__init__()
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError("Fsync policy must be one of {}, not {!r}"
+                             .format(', '.join(map(repr, FSYNC_POLICIES)), fsync))
+        if fsync == FSYNC_PERIODIC and fsync_interval <= 0:
+            raise ValueError("Fsync interval must be positive in the 'periodic' mode, not {!r}"
+                             .format(fsync_interval))
+        self.path = path
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.stats = stats
+        self._clock = clock
+        directory, name = os.path.split(os.path.abspath(path))
+        fd, self.temp_path = tempfile.mkstemp(prefix='.{}.'.format(name), suffix='.tmp', dir=directory)
+        try:
+            os.chmod(self.temp_path, self._get_mode(path))
+            self.file = io.FileIO(fd, 'w')
+        except Exception:
+            os.close(fd)
+            os.remove(self.temp_path)
+            raise
+        self._last_sync_time = clock()
+
+    @staticmethod
+    def _get_mode(path):
+        try:
+            # the published file keeps the permissions of the previous one
+            return stat.S_IMODE(os.stat(path).st_mode)
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            return 0o666 & ~umask
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        written = self.file.write(data)
+        if self.fsync == FSYNC_PERIODIC and self._clock() - self._last_sync_time >= self.fsync_interval:
+            self._sync()
+        return written
+
+    def _sync(self):
+        os.fsync(self.file.fileno())
+        self._last_sync_time = self._clock()
+        if self.stats is not None:
+            self.stats.inc_value('feed/atomic/fsyncs')
+
+    def close(self):
+        """
+        Close the temporary file, it's synchronized with the disk unless the policy is 'none'
+        """
+        if self.closed:
+            return
+        try:
+            if self.fsync != FSYNC_NONE:
+                self._sync()
+        finally:
+            super(AtomicFile, self).close()
+            self.file.close()
+
+    def publish(self):
+        """
+        Close the temporary file and atomically replace the target file with it
+        """
+        self.close()
+        _replace(self.temp_path, self.path)
+        if self.fsync != FSYNC_NONE and hasattr(os, 'O_DIRECTORY'):
+            # the renaming is durable when the directory is synchronized
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        if self.stats is not None:
+            self.stats.inc_value('feed/atomic/published')
+
+    def discard(self):
+        """
+        Close and remove the temporary file, the target file stays untouched
+        """
+        try:
+            if not self.closed:
+                super(AtomicFile, self).close()
+                self.file.close()
+        finally:
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+
+
+class RotatingWriter(io.BytesIO):
+    def __init__(self, open_page, header=b'', footer=b'', links=None, publish_page=None,
+                 max_items=0, max_bytes=0, stats=None):
+        """
+        Binary writer that splits the feed into pages.
+        When the number of items or bytes of the page reaches the limit at the end of an item,
+        the page is closed by the links and the footer and the next page is started by the header.
+        The header and the footer of the first and the last pages are written by the exporter,
+        the links of the last page are inserted before its footer
+
+        Parameters
+        ----------
+        open_page : callable
+            Function that returns the binary file of the page by its number starting from 1.
+            If the file has methods ``end_item()`` or ``wait_for_space()`` then they're called by the writer
+        header : bytes
+            Opening tags and channel elements of each page
+        footer : bytes
+            Closing tags of each page
+        links : callable or None
+            Function that returns the links of the page by its number and whether the page is the last one
+        publish_page : callable or None
+            Function that's called by the number of the page after the file of the full page is closed
+        max_items : int
+            Maximum number of items of each page, 0 disables the limit
+        max_bytes : int
+            Maximum size of each page in bytes before compression, 0 disables the limit.
+            Pages aren't split inside items, so the first item of the page is written anyway
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the rotation statistics
+        """
+        super(RotatingWriter, self).__init__()
+        if max_items < 0 or max_bytes < 0:
+            raise ValueError('Page limits must be non-negative numbers')
+        self.open_page = open_page
+        self.header = header
+        self.footer = footer
+        self.links = links
+        self.publish_page = publish_page
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.stats = stats
+        self.page = 1
+        self.file = open_page(self.page)
+        self._page_items = 0
+        self._page_bytes = 0
+
+    def end_item(self):
+        """
+        Mark the end of the item data and start the next page if any limit is reached
+        """
+        data = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        if (self._page_items and (self.max_items and self._page_items >= self.max_items
+                                  or self.max_bytes and self._page_bytes + len(data) > self.max_bytes)):
+            self._next_page()
+        self._write_page(data)
+        self._page_items += 1
+        end_item = getattr(self.file, 'end_item', None)
+        if end_item is not None:
+            end_item()
+
+    def wait_for_space(self):
+        """
+        Get the result of method ``wait_for_space()`` of the page file if it exists
+
+        Returns
+        -------
+        twisted.internet.defer.Deferred or None
+        """
+        wait_for_space = getattr(self.file, 'wait_for_space', None)
+        return wait_for_space() if wait_for_space is not None else None
+
+    def _write_page(self, data):
+        self.file.write(data)
+        self._page_bytes += len(data)
+
+    def _get_links(self, last):
+        return self.links(self.page, last) if self.links is not None else b''
+
+    def _next_page(self):
+        self.file.write(self._get_links(False) + self.footer)
+        self.file.close()
+        if self.publish_page is not None:
+            self.publish_page(self.page)
+        self.page += 1
+        if self.stats is not None:
+            self.stats.inc_value('feed/rotation/pages')
+        self.file = self.open_page(self.page)
+        self._page_items = 0
+        self._page_bytes = 0
+        self._write_page(self.header)
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            data = self.getvalue()
+            if data.endswith(self.footer):
+                data = data[:len(data) - len(self.footer)] + self._get_links(True) + self.footer
+            self.file.write(data)
+        finally:
+            super(RotatingWriter, self).close()
+            self.file.close()
+
+
+class BackgroundWriter(io.BytesIO):
+    def __init__(self, file, max_queue_size=1000, stats=None, call_from_thread=None, clock=_clock):
+        """
+        Binary writer that collects data of each item in memory
+        and writes it to the file by a dedicated thread,
+        so the crawler thread isn't blocked by file operations
+
+        Parameters
+        ----------
+        file : file-like
+            Binary file that's written by the writer thread only.
+            If the file has method ``end_item()`` then it's called by the writer thread after each item
+        max_queue_size : int
+            Number of queued items after which :meth:`wait_for_space` returns a Deferred
+        stats : scrapy.statscollectors.StatsCollector or None
+            Collector of the queue statistics
+        call_from_thread : callable or None
+            Function that calls the callable with arguments in the crawler thread
+            (default: ``reactor.callFromThread``)
+        clock : callable
+            Source of time in seconds
+        """
+        super(BackgroundWriter, self).__init__()
+        if max_queue_size < 1:
+            raise ValueError('Maximum queue size must be positive, not {!r}'.format(max_queue_size))
+        if call_from_thread is None:
+            from twisted.internet import reactor
+            call_from_thread = reactor.callFromThread
+        self.file = file
+        self.max_queue_size = max_queue_size
+        self.stats = stats
+        self._call_from_thread = call_from_thread
+        self._clock = clock
+        self._queue = queue.Queue()
+        self._queue_size = 0
+        self._lock = threading.Lock()
+        self._waiters = []
+        self._error = None
+        self._thread = threading.Thread(target=self._write_queued, name='FeedWriter')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def end_item(self):
+        """
+        Mark the end of the item data and queue it
+
+        Raises
+        ------
+        Exception
+            If the writer thread has failed, the next data is discarded
+        """
+        self._raise_error()
+        self._queue_chunk()
+
+    def wait_for_space(self):
+        """
+        Get a Deferred that fires when the queue isn't full
+
+        Returns
+        -------
+        twisted.internet.defer.Deferred or None
+            Deferred or None if the queue isn't full
+        """
+        with self._lock:
+            if self._queue_size < self.max_queue_size or self._error is not None:
+                return None
+            waiter = defer.Deferred()
+            self._waiters.append(waiter)
+        self._inc_stats('feed/writer/stalls')
+        stall_start = self._clock()
+
+        def count_stall_time(result):
+            self._inc_stats('feed/writer/stall_time', self._clock() - stall_start)
+            return result
+
+        return waiter.addBoth(count_stall_time)
+
+    def _queue_chunk(self):
+        if not self.tell():
+            return
+        data = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        with self._lock:
+            self._queue_size += 1
+            queue_size = self._queue_size
+        if self.stats is not None:
+            self.stats.max_value('feed/writer/max_queue_depth', queue_size)
+        self._queue.put(data)
+
+    def _write_queued(self):
+        end_item = getattr(self.file, 'end_item', None)
+        while True:
+            data = self._queue.get()
+            if data is None:
+                break
+            if self._error is None:
+                try:
+                    self.file.write(data)
+                    if end_item is not None:
+                        end_item()
+                except Exception as e:
+                    # the next chunks are discarded, the error is raised in the crawler thread
+                    self._error = e
+            with self._lock:
+                self._queue_size -= 1
+                if self._waiters and (self._queue_size < self.max_queue_size or self._error is not None):
+                    waiters = self._waiters
+                    self._waiters = []
+                else:
+                    waiters = ()
+            for waiter in waiters:
+                self._call_from_thread(waiter.callback, None)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise self._error
+
+    def _inc_stats(self, key, count=1):
+        if self.stats is not None:
+            self.stats.inc_value(key, count)
+
+    def close(self):
+        """
+        Write queued data, stop the writer thread and close the file
+
+        Raises
+        ------
+        Exception
+            If the writer thread has failed
+        """
+        if self.closed:
+            return
+        try:
+            self._queue_chunk()
+            self._queue.put(None)
+            self._thread.join()
+            with self._lock:
+                waiters = self._waiters
+                self._waiters = []
+            for waiter in waiters:
+                waiter.callback(None)
+        finally:
+            super(BackgroundWriter, self).close()
+            self.file.close()
+        self._raise_error()
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from itertools import product, combinations, combinations_with_replacement
+from itertools import chain, product, combinations, combinations_with_replacement
 from parameterized import parameterized
 
+import six
+
 from scrapy_rss.meta import Element, ElementAttribute
 from tests.elements import ATTR_VALUES
 
@@ -65,6 +67,24 @@ class Element5(Element4):
     child_elem51 = ChildElement5()
 
 
+class SlottedElement3(Element3):
+    __slots__ = ()
+
+class SlottedElement4(Element):
+    __slots__ = ()
+    base_attr40 = ElementAttribute(required=True)
+    child_elem40 = ChildElement4()
+
+class SlottedElement5(SlottedElement4):
+    __slots__ = ()
+    base_attr50 = ElementAttribute(is_content=True)
+    child_elem50 = ChildElement5()
+
+class DerivedFromSlottedElement5(SlottedElement5):
+    base_attr51 = ElementAttribute()
+    child_elem51 = ChildElement5()
+
+
 class TestInheritance(RssTestCase):
     def test_inherited_children(self):
         elem = Element2()
@@ -92,9 +112,11 @@ class TestInheritance(RssTestCase):
         self.assertEqual(children_count, len(elem.children))
         self.assertEqual(attrs_count, len(elem.attrs))
         private_attrs = [attr for attr in elem.__dict__.values() if isinstance(attr, ElementAttribute)]
-        private_children = [child for child in elem.__dict__.values() if isinstance(child, Element)]
-        self.assertEqual(children_count, len(private_children))
         self.assertEqual(attrs_count, len(private_attrs))
+        # children elements are created on first access
+        self.assertEqual([], elem.assigned_children)
+        private_children = {id(getattr(elem, child_name.priv_name)) for child_name in elem.children}
+        self.assertEqual(children_count, len(private_children))
 
         children_classes = [None, None, None, ChildElement3, ChildElement4, ChildElement5]
 
@@ -181,6 +203,37 @@ class TestInheritance(RssTestCase):
         self.assertFalse(base_elem.compatible_with(derived_elem))
         self.assertFalse(derived_elem.compatible_with(base_elem))
 
+    def test_slotted_elements(self):
+        self.assertFalse(hasattr(SlottedElement5(), '__dict__'))
+        self.assertTrue(hasattr(SlottedElement3(), '__dict__'))
+
+        elem = SlottedElement5(base_attr40='value 40', base_attr50='value 50', child_elem40='content 40')
+        self.assertEqual(2, len(elem.attrs))
+        self.assertEqual(2, len(elem.children))
+        for comp_name, comp in chain(elem.attrs.items(), elem.children.items()):
+            self.assertIs(comp, getattr(elem, comp_name.priv_name))
+        self.assertEqual('value 40', elem.base_attr40)
+        self.assertEqual('value 50', elem.base_attr50)
+        self.assertEqual('content 40', elem.child_elem40.child_attr41)
+
+        other_elem = SlottedElement5()
+        self.assertIsNone(other_elem.base_attr40)
+        self.assertIsNot(elem.child_elem40, other_elem.child_elem40)
+
+    def test_derived_from_slotted_elements(self):
+        elem = DerivedFromSlottedElement5(base_attr40='value 40', base_attr51='value 51',
+                                          child_elem51={'child_attr52': 'content 51'})
+        self.assertEqual(3, len(elem.attrs))
+        self.assertEqual(3, len(elem.children))
+        self.assertEqual({'__base_attr51'}, set(elem.__dict__))
+        for comp_name, comp in chain(elem.attrs.items(), elem.children.items()):
+            self.assertIs(comp, getattr(elem, comp_name.priv_name))
+        self.assertEqual('value 40', elem.base_attr40)
+        self.assertEqual('value 51', elem.base_attr51)
+        self.assertEqual('content 51', elem.child_elem51.child_attr52)
+        with six.assertRaisesRegex(self, AttributeError, 'No attribute'):
+            elem.unknown_attr = 'value'
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -7,7 +7,8 @@ from tests.utils import RssTestCase
 
 from scrapy_rss.items import RssItem
 from scrapy_rss.rss.item_elements import *
-from scrapy_rss.meta import Element, MultipleElements
+from scrapy_rss.meta import Element, ElementAttribute, MultipleElements
+from scrapy_rss.exceptions import InvalidComponentError
 
 
 
@@ -198,6 +199,24 @@ class TestMultipleElements(RssTestCase):
         item.category.value = 'another'
         self.assertEqual(item.category.value, 'another')
 
+    def test_invalid_element_name_path(self):
+        class PairElement(Element):
+            first = ElementAttribute(required=True)
+            second = ElementAttribute()
+
+        class PairsElement(Element):
+            pairs = MultipleElements(PairElement)
+
+        elem = PairsElement(pairs=[{'first': 1}, {'second': 2}])
+        with six.assertRaisesRegex(self, InvalidComponentError,
+                                   r"Invalid 'root\.pairs\.\[1\]\.first' component value"):
+            elem.validate('root')
+        with six.assertRaisesRegex(self, InvalidComponentError,
+                                   r"Invalid 'pairs\.\[1\]\.first' component value"):
+            elem.validate()
+        elem.pairs[1].first = 1
+        elem.validate('root')
+
 
 if __name__ == "__main__":
     unittest.main()
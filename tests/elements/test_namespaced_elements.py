@@ -229,6 +229,30 @@ class TestNamespacedElements(RssTestCase):
         for comp_name, comp in chain(item.attrs.items(), item.children.items()):
             self.assertNotIn('__', comp_name.name)
 
+    def test_class_namespace_requirements(self):
+        class Element0(Element):
+            attr00 = ElementAttribute(is_content=True)
+
+        class Element1(Element):
+            attr10 = ElementAttribute(ns_prefix="prefix10", ns_uri="id10")
+            attr11 = ElementAttribute()
+
+        class Item0(RssItem):
+            attr0 = ElementAttribute(ns_prefix="prefix0", ns_uri="id0")
+            elem1 = Element1(ns_prefix="el_prefix1", ns_uri="el_id1")
+            el_prefix2__elem2 = MultipleElements(Element0, ns_uri="el_id2")
+            el_prefix3__elem3 = MultipleElements(Element1, ns_prefix="el_prefix3", ns_uri="el_id3")
+
+        self.assertEqual(frozenset(), Element0._attrs_namespaces)
+        self.assertEqual(frozenset(), Element0._components_namespaces)
+        self.assertEqual({("prefix10", "id10")}, Element1._attrs_namespaces)
+        self.assertEqual({("prefix10", "id10")}, Element1._components_namespaces)
+        self.assertEqual({("prefix0", "id0")}, Item0._attrs_namespaces)
+        self.assertEqual({("prefix0", "id0"), ("prefix10", "id10"), ("el_prefix1", "el_id1"),
+                          ("el_prefix2", "el_id2"), ("el_prefix3", "el_id3")},
+                         Item0._components_namespaces)
+        self.assertEqual(Item0._components_namespaces, Item0().get_namespaces(False) | {("prefix10", "id10")})
+
     def test_namespace_inheritance(self):
         class Element0(Element):
             attr00 = ElementAttribute(is_content=True)
@@ -287,6 +287,205 @@ class TestNestedElements(RssTestCase):
         with self.assertRaises(InvalidElementValueError):
             setattr(element, elem_name, UnusedElement(value))
 
+    def test_predefined_children_isolation(self):
+        class PredefinedElement(meta.Element):
+            attr = meta.ElementAttribute(value=[1, 2])
+            elem = ElementFourthLevel0('content')
+            elems = meta.MultipleElements(ElementFourthLevel0)
+
+        class PredefinedParent(meta.Element):
+            child = PredefinedElement(elems=['first', 'second'])
+
+        first = PredefinedParent()
+        second = PredefinedParent()
+        for first_comp, second_comp in ((first.child, second.child),
+                                        (first.child.elem, second.child.elem),
+                                        (first.child.elems, second.child.elems),
+                                        (first.child.attr, second.child.attr)):
+            self.assertIsNot(first_comp, second_comp)
+            self.assertEqual(repr(first_comp), repr(second_comp))
+        for comp_name, comp in first.child.attrs.items():
+            self.assertIs(comp, getattr(first.child, comp_name.priv_name))
+        for comp_name, comp in first.child.children.items():
+            self.assertIs(comp, getattr(first.child, comp_name.priv_name))
+
+        first.child.attr.append(3)
+        first.child.elem = 'new content'
+        first.child.elems.append('third')
+        self.assertEqual([1, 2], second.child.attr)
+        self.assertEqual('content', second.child.elem.attr400)
+        self.assertEqual(['first', 'second'], [elem.attr400 for elem in second.child.elems])
+        self.assertTrue(second.child.assigned)
+
+    def test_lazy_children(self):
+        root = ElementSecondLevel0(attr202='value')
+        self.assertTrue(root.assigned)
+        self.assertEqual([], root.assigned_children)
+        self.assertEqual(set(), root.get_namespaces())
+        root.validate()
+        self.assertEqual({}, root._children)
+
+        third_level = root.elem200
+        self.assertIs(third_level, root.elem200)
+        self.assertIs(third_level, root.children[next(iter(root.children))])
+        self.assertEqual(['elem300'], [str(child_name) for child_name in third_level.children
+                                       if child_name.name == 'elem300'])
+        self.assertFalse(third_level.assigned)
+        self.assertEqual({}, third_level._children)
+
+        root.elem200.elem300 = 'content'
+        self.assertTrue(root.assigned)
+        self.assertEqual([('elem200', third_level)],
+                         [(str(child_name), child) for child_name, child in root.assigned_children])
+        self.assertEqual(['elem300'], [str(child_name) for child_name, _ in third_level.assigned_children])
+        with six.assertRaisesRegex(self, InvalidComponentError, 'elem200'):
+            root.validate()
+        self.assertEqual({'elem300'}, {str(child_name) for child_name in third_level._children})
+
+    def test_lazy_required_children_validation(self):
+        class RequiredChildElement(meta.Element):
+            attr = meta.ElementAttribute()
+            child = ElementFourthLevel0(required=True)
+            other_child = ElementFourthLevel0()
+
+        elem = RequiredChildElement(attr='value')
+        with six.assertRaisesRegex(self, InvalidComponentError, 'missing required element'):
+            elem.validate()
+        elem.child = 'content'
+        elem.validate()
+        self.assertEqual(['child'], [str(child_name) for child_name in elem._children])
+
+    def test_cached_state_invalidation(self):
+        class NamespacedElement(meta.Element):
+            attr = meta.ElementAttribute(required=True, is_content=True)
+            ns_attr = meta.ElementAttribute(ns_prefix='prefix', ns_uri='id')
+
+        class ParentElement(meta.Element):
+            child = ElementFourthLevel0()
+            elems = meta.MultipleElements(NamespacedElement)
+
+        root = ElementSecondLevel1()
+        parent = root.elem210
+        self.assertFalse(root.assigned)
+        self.assertTrue(root.is_valid())
+
+        parent.elem300.attr401 = 'value'
+        self.assertTrue(root.assigned)
+        self.assertFalse(root.is_valid())
+        parent.elem300.attr400 = 'content'
+        self.assertFalse(root.is_valid())
+        parent.attr303 = parent.attr304 = 'value'
+        self.assertTrue(root.is_valid())
+        parent.elem300 = None
+        self.assertFalse(root.assigned)
+        parent.elem300.attr400 = 'content'
+        self.assertTrue(root.assigned)
+        root.clear()
+        self.assertFalse(root.assigned)
+
+        elem = ParentElement(child='content')
+        self.assertEqual(set(), elem.get_namespaces())
+        elem.elems.append({'attr': 'first', 'ns_attr': 'value'})
+        self.assertEqual({('prefix', 'id')}, elem.get_namespaces())
+        elem.elems.pop()
+        self.assertEqual(set(), elem.get_namespaces())
+        elem.elems.append('second')
+        self.assertTrue(elem.is_valid())
+        elem.elems[0].attr = None
+        elem.elems[0].ns_attr = 'value'
+        self.assertFalse(elem.is_valid())
+        elem.elems.clear()
+        self.assertTrue(elem.is_valid())
+        elem.child.attr400 = None
+        elem.child.attr401 = 'value'
+        self.assertFalse(elem.is_valid())
+
+    def test_cached_state_of_separate_trees(self):
+        class NamespacedElement(meta.Element):
+            attr = meta.ElementAttribute(is_content=True)
+            ns_attr = meta.ElementAttribute()
+
+        class ParentElement(meta.Element):
+            child = NamespacedElement()
+            elems = meta.MultipleElements(NamespacedElement)
+
+        first, second = ElementSecondLevel1(), ElementSecondLevel1()
+        self.assertTrue(first.is_valid())
+        self.assertTrue(second.is_valid())
+        second.elem210.elem300.attr401 = 'value'
+        self.assertIsNotNone(first._cache)
+        self.assertIsNone(second._cache)
+        self.assertTrue(second.assigned)
+        self.assertFalse(second.is_valid())
+        self.assertFalse(first.assigned)
+
+        # shared child invalidates all its parents
+        first_parent, second_parent = ParentElement(), ParentElement()
+        shared = NamespacedElement()
+        first_parent.child = shared
+        second_parent.elems.append(shared)
+        self.assertEqual(set(), first_parent.get_namespaces(False))
+        self.assertEqual(set(), second_parent.get_namespaces(False))
+        shared.ns_attr = 'value'
+        first_parent.child.attrs[meta.NSComponentName('ns_attr')].ns_uri = 'id'
+        self.assertEqual({('', 'id')}, first_parent.get_namespaces())
+        self.assertEqual({('', 'id')}, second_parent.get_namespaces())
+        shared.ns_uri = 'uri'
+        self.assertEqual({('', 'id'), ('', 'uri')}, first_parent.get_namespaces())
+        self.assertEqual({('', 'id'), ('', 'uri')}, second_parent.get_namespaces())
+
+        # copied children invalidate the copied parents
+        copied = second_parent._clone()
+        self.assertTrue(copied.assigned)
+        copied.elems[0].attr = 'content'
+        self.assertIsNone(copied._cache)
+        self.assertIsNotNone(second_parent._cache)
+        copied.elems.pop()
+        self.assertFalse(copied.assigned)
+        self.assertTrue(second_parent.assigned)
+
+    def test_cached_state_of_direct_changes(self):
+        class NamespacedElement(meta.Element):
+            attr = meta.ElementAttribute(required=True, is_content=True)
+            ns_attr = meta.ElementAttribute(ns_prefix='prefix', ns_uri='id')
+
+        class ParentElement(meta.Element):
+            child = NamespacedElement()
+            elems = meta.MultipleElements(NamespacedElement)
+
+        elem = ParentElement(child={'attr': 'content', 'ns_attr': 'value'})
+        attrs = {str(attr_name): attr for attr_name, attr in elem.child.attrs.items()}
+        self.assertTrue(elem.is_valid())
+        self.assertEqual({('prefix', 'id')}, elem.get_namespaces())
+        attrs['attr'].value = None
+        self.assertFalse(elem.is_valid())
+        attrs['attr'].value = 'content'
+        self.assertTrue(elem.is_valid())
+        attrs['ns_attr'].clear()
+        self.assertEqual(set(), elem.get_namespaces())
+        attrs['attr'].clear()
+        self.assertFalse(elem.is_valid())
+        attrs['attr'].value = 'content'
+
+        first, second = NamespacedElement(attr='first'), NamespacedElement(ns_attr='value')
+        elem.elems.elements.append(first)
+        self.assertTrue(elem.is_valid())
+        elem.elems.elements.insert(0, second)
+        self.assertFalse(elem.is_valid())
+        self.assertEqual({('prefix', 'id')}, elem.get_namespaces())
+        del elem.elems.elements[0]
+        self.assertTrue(elem.is_valid())
+        elem.elems.elements[:] = [second]
+        self.assertFalse(elem.is_valid())
+        elem.elems.elements = [first]
+        self.assertTrue(elem.is_valid())
+        self.assertEqual(set(), elem.get_namespaces())
+        first.ns_attr = 'value'
+        self.assertEqual({('prefix', 'id')}, elem.get_namespaces())
+        copied = elem._clone()
+        copied.elems.elements.remove(copied.elems[0])
+        self.assertEqual(set(), copied.get_namespaces())
+        self.assertEqual({('prefix', 'id')}, elem.get_namespaces())
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ import unittest
 from parameterized import parameterized
 from itertools import chain, product, combinations, combinations_with_replacement
 from functools import partial
+from datetime import datetime
 import pytest
 import six
 
@@ -417,6 +418,22 @@ class TestSimpleElements(RssTestCase):
             with six.assertRaisesRegex(self, InvalidElementValueError, msg):
                 setattr(item, str(elem_name), elem2)
 
+    def test_non_mapping_object_assignment(self):
+        item = RssItem()
+        date = datetime(2000, 1, 2, 3, 4, 5)
+        item.pubDate = date
+        self.assertIs(date, item.pubDate.value)
+        self.assertTrue(item.pubDate.assigned)
+        item.guid = 'Unique ID'
+        self.assertEqual('Unique ID', item.guid.value)
+        self.assertTrue(item.assigned)
+        for elem_name in ('enclosure', 'source'):
+            with six.assertRaisesRegex(self, InvalidElementValueError, 'Could not assign value'):
+                setattr(item, elem_name, date)
+        item.pubDate = None
+        self.assertIsNone(item.pubDate.value)
+        self.assertFalse(item.pubDate.assigned)
+
 
 if __name__ == "__main__":
     unittest.main()
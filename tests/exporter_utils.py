@@ -16,6 +16,7 @@ try:
     from scrapy.item import BaseItem
 except ImportError:
     from scrapy.item import Item as BaseItem
+from scrapy.exceptions import DropItem
 from scrapy.utils.misc import load_object
 from scrapy.utils.test import get_crawler
 from scrapy.pipelines import ItemPipelineManager
@@ -161,4 +162,46 @@ class FeedSettings(TemporaryDirectory):
         return feed_settings
 
 
-
+def process_items(context, items):
+    """
+    Pass items through the pipelines of the crawler context one by one, dropped items are skipped.
+    Pipelines are called directly, so it doesn't depend on the item processing API of the Scrapy version
+    """
+    for item in items:
+        try:
+            for pipeline in context.ipm.middlewares:
+                item = pipeline.process_item(item, context.spider)
+        except DropItem:
+            pass
+
+
+def export_feed(feed_settings, items, **settings):
+    """
+    Export items by the feed pipeline with :class:`FullRssItemExporter`
+
+    Returns
+    -------
+    CrawlerContext
+        Closed context of the crawler with its stats
+    """
+    crawler_settings = dict(CrawlerContext.default_settings)
+    crawler_settings['FEED_EXPORTER'] = FullRssItemExporter
+    crawler_settings.update(settings)
+    with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+        process_items(context, items)
+    return context
+
+
+def export_baseline_feed(items):
+    """
+    Export items with the default settings to a temporary file
+
+    Returns
+    -------
+    bytes
+        The feed that's expected for other settings
+    """
+    with FeedSettings() as feed_settings:
+        export_feed(feed_settings, items)
+        with open(feed_settings['feed_file'], 'rb') as data:
+            return data.read()
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime, timedelta
+import gzip
+from io import BytesIO
+import os
+
+from lxml import etree
+from parameterized import parameterized
+import six
+
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.appending import ExistingFeed, FeedMerger
+from scrapy_rss.utils import get_tzlocal, get_timestamp
+
+import pytest
+from tests import predefined_items
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory
+
+
+LAST_BUILD_DATE = datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal())
+
+
+def _export(items, item_cls=None, append_to=None, last_build_date=LAST_BUILD_DATE, merger=None, namespaces=None):
+    output = BytesIO()
+    exporter = FeedItemExporter(output, 'Title', 'http://example.com/feed', 'Description', namespaces=namespaces,
+                                item_cls=item_cls, last_build_date=last_build_date, merger=merger)
+    if append_to is None:
+        exporter.start_exporting()
+        undeclared_namespaces = None
+    else:
+        undeclared_namespaces = exporter.resume_exporting(append_to)
+    for item in items:
+        exporter.export_item(item)
+    exporter.finish_exporting()
+    return output.getvalue(), undeclared_namespaces
+
+
+def _item_trees(feed):
+    return [[(element.tag, sorted(element.attrib.items()), element.text) for element in item.iter()]
+            for item in etree.fromstring(feed).iterfind('channel/item')]
+
+
+class TestExistingFeed(RssTestCase):
+    def _write(self, directory, data):
+        path = os.path.join(directory, 'feed.rss')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_scan(self):
+        items = [RssItem(title='Item {}'.format(number)) for number in range(3)]
+        feed, _ = _export(items, item_cls=predefined_items.NSItem0)
+        with TemporaryDirectory() as directory:
+            path = self._write(directory, feed + b'\n')
+            existing_feed = ExistingFeed.scan(path, chunk_size=7)
+            self.assertEqual(sorted(predefined_items.NSItem0().get_namespaces(False, attrs_only=False)),
+                             sorted(existing_feed.namespaces))
+            start, end = existing_feed.last_build_date_span
+            self.assertEqual(b'<lastBuildDate>', feed[start - 15:start])
+            self.assertEqual(b'</lastBuildDate>', feed[end:end + 16])
+            self.assertEqual(b'</channel></rss>\n', existing_feed.tail)
+            self.assertEqual(feed.rindex(b'</channel>'), existing_feed.tail_offset)
+
+    def test_scan_without_items(self):
+        feed = (b'<?xml version="1.0"?>\n<rss version="2.0" xmlns:a="http://a"><channel xmlns:b="http://b">'
+                b'<title>Title</title></channel>\n</rss>')
+        with TemporaryDirectory() as directory:
+            existing_feed = ExistingFeed.scan(self._write(directory, feed))
+            self.assertEqual([('a', 'http://a'), ('b', 'http://b')], existing_feed.namespaces)
+            self.assertIsNone(existing_feed.last_build_date_span)
+            self.assertEqual(b'</channel>\n</rss>', existing_feed.tail)
+
+    @parameterized.expand([
+        (b'', 'cannot be parsed'),
+        (b'<rss version="2.0"><channel><title>Title</title>', 'cannot be parsed'),
+        (b'<feed xmlns="http://www.w3.org/2005/Atom"><title>Title</title></feed>', 'no <rss> root'),
+        (b'<rss version="2.0"></rss>', 'no <rss> root'),
+        (b'<rss version="2.0"><channel><item><title>Title</title></item>', 'closing tags'),
+        (b'<rss version="2.0"><channel><item/></channel></rss><!-- comment -->', 'closing tags'),
+    ])
+    def test_bad_feed(self, data, exc_msg_match):
+        with TemporaryDirectory() as directory:
+            with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+                ExistingFeed.scan(self._write(directory, data))
+
+    def test_update_and_restore(self):
+        feed, _ = _export([RssItem(title='Item')])
+        with TemporaryDirectory() as directory:
+            path = self._write(directory, feed)
+            existing_feed = ExistingFeed.scan(path)
+            self.assertFalse(existing_feed.update_last_build_date(b'Wed, 01 Jan 2020'))
+            self.assertTrue(existing_feed.update_last_build_date(b'Wed, 01 Jan 2020 00:00:00 +0000'))
+            with open(path, 'r+b') as f:
+                f.seek(existing_feed.tail_offset)
+                f.write(b'<item><title>Unfinished')
+            existing_feed.restore()
+            with open(path, 'rb') as f:
+                updated_feed = f.read()
+            self.assertEqual(len(feed), len(updated_feed))
+            self.assertEqual('Wed, 01 Jan 2020 00:00:00 +0000',
+                             etree.fromstring(updated_feed).findtext('channel/lastBuildDate'))
+
+    def test_copy(self):
+        feed, _ = _export([RssItem(title='Item')])
+        with TemporaryDirectory() as directory:
+            path = self._write(directory, feed)
+            existing_feed = ExistingFeed.scan(path)
+            for last_build_date in (None, b'Wed, 1 Jan 2020 00:00:00 GMT'):
+                copy = BytesIO()
+                existing_feed.copy(copy, last_build_date, chunk_size=7)
+                copied_feed = etree.fromstring(copy.getvalue() + existing_feed.tail)
+                self.assertEqual(last_build_date.decode('ascii') if last_build_date
+                                 else etree.fromstring(feed).findtext('channel/lastBuildDate'),
+                                 copied_feed.findtext('channel/lastBuildDate'))
+                self.assertEqual(['Item'], copied_feed.xpath('channel/item/title/text()'))
+            with open(path, 'rb') as f:
+                self.assertEqual(feed, f.read())
+
+
+class TestFeedMerger(RssTestCase):
+    @staticmethod
+    def _item(number, guid=True, hours=0):
+        item = RssItem(title='Item {}'.format(number), link='http://example.com/{}'.format(number))
+        if guid:
+            item.guid = 'id{}'.format(number)
+        if hours is not None:
+            item.pubDate = datetime(2020, 1, 10, tzinfo=get_tzlocal()) - timedelta(hours=hours)
+        return item
+
+    def _merge(self, previous_feed, items, namespaces=None, **kwargs):
+        stats = get_crawler().stats
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.rss')
+            if previous_feed is not None:
+                with open(path, 'wb') as f:
+                    f.write(previous_feed)
+            feed, _ = _export(items, merger=FeedMerger(path, stats=stats, **kwargs), namespaces=namespaces)
+        return etree.fromstring(feed), stats
+
+    @staticmethod
+    def _titles(feed):
+        return feed.xpath('channel/item/title/text()')
+
+    def _assert_texts(self, expected, texts):
+        # sequences with a common beginning aren't distinguished by the sequence assertion of the test case
+        self.assertEqual(len(expected), len(texts))
+        self.assertEqual(expected, texts)
+
+    @parameterized.expand([(7,), (13,), (1 << 16,)])
+    def test_merge(self, chunk_size):
+        ns_item = predefined_items.NSItem0(title='Namespaced item')
+        ns_item.elem1.attr01 = 'value'
+        previous_items = [self._item(1), self._item(2), ns_item, self._item(3, guid=False)]
+        previous_feed, _ = _export(previous_items, item_cls=predefined_items.NSItem0)
+        feed, stats = self._merge(previous_feed, [self._item(2), self._item(4)], chunk_size=chunk_size)
+        self.assertEqual(['Item 2', 'Item 4', 'Item 1', 'Namespaced item', 'Item 3'], self._titles(feed))
+        self.assertEqual(_item_trees(previous_feed)[2], _item_trees(etree.tostring(feed))[3])
+        self.assertEqual(1, stats.get_value('feed/merge/duplicates'))
+        self.assertEqual(3, stats.get_value('feed/merge/previous_items'))
+        self.assertIsNone(stats.get_value('feed/merge/errors'))
+
+    @parameterized.expand([
+        ('guid', ['Item 2', 'Item 1', 'Item 3']),
+        ('link', ['Item 2', 'Item 3']),
+    ])
+    def test_merge_key(self, key, titles):
+        previous_feed, _ = _export([self._item(1), self._item(3, guid=False)])
+        new_item = self._item(2)
+        new_item.link = 'http://example.com/1'
+        feed, stats = self._merge(previous_feed, [new_item], key=key)
+        self.assertEqual(titles, self._titles(feed))
+
+    def test_max_age(self):
+        previous_feed, _ = _export([self._item(1, hours=1), self._item(2, hours=3), self._item(3, hours=2),
+                                    self._item(4, hours=None)])
+        clock = lambda: get_timestamp(self._item(0).pubDate.value)
+        feed, stats = self._merge(previous_feed, [self._item(0)], max_age=1.5 * 3600, clock=clock)
+        # items without pubDate are kept
+        self.assertEqual(['Item 0', 'Item 1', 'Item 4'], self._titles(feed))
+        self.assertEqual(2, stats.get_value('feed/merge/expired'))
+
+    def test_max_items(self):
+        previous_feed, _ = _export([self._item(number) for number in range(1, 5)])
+        feed, stats = self._merge(previous_feed, [self._item(0), self._item(5)], max_items=3)
+        self.assertEqual(['Item 0', 'Item 5', 'Item 1'], self._titles(feed))
+        feed, _ = self._merge(previous_feed, [self._item(number) for number in range(5)], max_items=3)
+        self.assertEqual(['Item {}'.format(number) for number in range(5)], self._titles(feed))
+
+    def test_failed_items(self):
+        class BadValue(object):
+            def __str__(self):
+                raise ValueError('Bad value')
+
+        previous_feed, _ = _export([self._item(1), self._item(2)])
+        failed_item = self._item(2)
+        failed_item.description = BadValue()
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.rss')
+            with open(path, 'wb') as f:
+                f.write(previous_feed)
+            output = BytesIO()
+            exporter = FeedItemExporter(output, 'Title', 'http://example.com/feed', 'Description',
+                                        merger=FeedMerger(path))
+            exporter.start_exporting()
+            exporter.export_item(self._item(3))
+            # the item is dropped like by serialization pools, so the previous item is kept
+            with six.assertRaisesRegex(self, ValueError, 'Bad value'):
+                exporter.serialize_item(exporter.prepare_item(failed_item))
+            exporter.finish_exporting()
+        self._assert_texts(['Item 3', 'Item 1', 'Item 2'], self._titles(etree.fromstring(output.getvalue())))
+
+    def test_without_previous_feed(self):
+        feed, stats = self._merge(None, [self._item(1)])
+        self.assertEqual(['Item 1'], self._titles(feed))
+        self.assertIsNone(stats.get_value('feed/merge/previous_items'))
+
+    def test_broken_previous_feed(self):
+        previous_feed, _ = _export([self._item(1), self._item(2)])
+        previous_feed = previous_feed[:previous_feed.rindex(b'<item>')] + b'<item><title>Item 3</item>'
+        feed, stats = self._merge(previous_feed, [self._item(0)], chunk_size=7)
+        # items before the error are kept
+        self.assertEqual(['Item 0', 'Item 1'], self._titles(feed))
+        self.assertEqual(1, stats.get_value('feed/merge/errors'))
+
+    def test_default_namespace(self):
+        previous_feed = (b'<?xml version="1.0" encoding="utf-8"?>\n'
+                         b'<rss xmlns="http://backend.userland.com/rss2" version="2.0"><channel><title>Title</title>'
+                         b'<item><title>Item 1</title><guid>id1</guid></item>'
+                         b'<item><title>Item 2</title><guid>id2</guid></item></channel></rss>')
+        namespaces = {'d': 'http://backend.userland.com/rss2'}
+        feed, stats = self._merge(previous_feed, [self._item(2)], chunk_size=7)
+        self._assert_texts(['Item 2'], self._titles(feed))
+        # previous items keep the default namespace
+        self._assert_texts(['Item 1'], feed.xpath('channel/d:item/d:title/text()', namespaces=namespaces))
+        self.assertEqual(1, stats.get_value('feed/merge/duplicates'))
+
+        previous_feed, _ = _export([self._item(1)])
+        feed, _ = self._merge(previous_feed, [self._item(2)], namespaces={None: 'urn:new'})
+        namespaces = {'n': 'urn:new'}
+        self._assert_texts(['Item 2'], feed.xpath('n:channel/n:item/n:title/text()', namespaces=namespaces))
+        # previous items don't get the default namespace of the new feed
+        self._assert_texts(['Item 1'], feed.xpath('n:channel/item/title/text()', namespaces=namespaces))
+
+    def test_compressed_previous_feed(self):
+        previous_feed, _ = _export([self._item(1), self._item(2)])
+        compressed = BytesIO()
+        with gzip.GzipFile(fileobj=compressed, mode='wb') as f:
+            f.write(previous_feed)
+        feed, _ = self._merge(compressed.getvalue(), [self._item(2)], compression='gzip')
+        self.assertEqual(['Item 2', 'Item 1'], self._titles(feed))
+
+    @parameterized.expand([
+        ({'key': 'title'}, 'Merge key'),
+        ({'max_age': -1}, 'non-negative'),
+        ({'max_items': -1}, 'non-negative'),
+    ])
+    def test_bad_arguments(self, kwargs, exc_msg_match):
+        with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+            FeedMerger('feed.rss', **kwargs)
+
+
+class TestResumeExporting(RssTestCase):
+    def test_same_namespaces(self):
+        items = list(predefined_items.PredefinedItems().items.values())
+        expected, _ = _export(items)
+        feed, _ = _export(items[:3])
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.rss')
+            with open(path, 'wb') as f:
+                f.write(feed)
+            existing_feed = ExistingFeed.scan(path)
+        appended, undeclared_namespaces = _export(items[3:], append_to=existing_feed.namespaces)
+        self.assertEqual([], undeclared_namespaces)
+        self.assertEqual(expected, feed[:existing_feed.tail_offset] + appended[appended.index(b'<item>'):])
+
+    def test_undeclared_namespaces(self):
+        ns_item = predefined_items.NSItem0(title='Namespaced item')
+        ns_item.elem1.attr01 = 'value'
+        ns_item.el_prefix3__elem3.attr21 = 'content'
+        items = [RssItem(title='Item'), ns_item]
+        expected, _ = _export(items, item_cls=predefined_items.NSItem0)
+        feed, _ = _export(items[:1])
+        appended, undeclared_namespaces = _export(items[1:], item_cls=predefined_items.NSItem0, append_to=[])
+        self.assertEqual(sorted(ns_item.get_namespaces(False, attrs_only=False)), sorted(undeclared_namespaces))
+        appended = feed[:feed.rindex(b'</channel>')] + appended[appended.index(b'<item'):]
+        self.assertEqual(_item_trees(expected), _item_trees(appended))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import os
+
+from parameterized import parameterized
+import six
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import NotConfigured, DropItem
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem, RssedItem
+from scrapy_rss.dedup import get_item_key, MemoryFilter, BloomFilter, PersistentFilter
+from scrapy_rss.pipelines import DuplicateFilterPipeline
+
+import pytest
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory
+
+
+class TestGetItemKey(RssTestCase):
+    @parameterized.expand([
+        ({'guid': 'id', 'link': 'http://example.com/'}, 'guid', b'guid:id'),
+        ({'guid': ' id ', 'link': 'http://example.com/'}, 'guid', b'guid:id'),
+        ({'link': 'http://example.com/'}, 'guid', b'link:http://example.com/'),
+        ({'guid': 'id', 'link': 'http://example.com/'}, 'link', b'link:http://example.com/'),
+        ({'guid': 'id'}, 'link', None),
+        ({'title': 'Title'}, 'guid', None),
+    ])
+    def test_identifier(self, fields, key, expected):
+        self.assertEqual(expected, get_item_key(RssItem(**fields), key))
+
+    def test_content(self):
+        item = RssItem(title='Title', link='http://example.com/', guid='id1')
+        item.category = ['first', 'second']
+        item.enclosure.url = 'http://example.com/file.mp3'
+        item.enclosure.length = 100
+        item.enclosure.type = 'audio/mpeg'
+        same_item = RssItem(title='Title', link='http://example.com/', guid='id2')
+        same_item.category = ['first', 'second']
+        same_item.enclosure = {'url': 'http://example.com/file.mp3', 'length': 100, 'type': 'audio/mpeg'}
+        fields = ['title', 'category', 'enclosure']
+        key = get_item_key(item, 'content', fields)
+        self.assertTrue(key.startswith(b'content:'))
+        self.assertEqual(key, get_item_key(same_item, 'content', fields))
+        self.assertNotEqual(key, get_item_key(same_item, 'content', fields + ['guid']))
+        same_item.category = ['second', 'first']
+        self.assertNotEqual(key, get_item_key(same_item, 'content', fields))
+        # values of different elements aren't mixed
+        self.assertNotEqual(get_item_key(RssItem(title='Title'), 'content', ['title', 'description']),
+                            get_item_key(RssItem(description='Title'), 'content', ['title', 'description']))
+
+
+class TestFilters(RssTestCase):
+    def _check_filter(self, item_filter, number=1000):
+        self.assertEqual([False] * number, [item_filter.add(str(key).encode('ascii')) for key in range(number)])
+        self.assertEqual([True] * number, [item_filter.add(str(key).encode('ascii')) for key in range(number)])
+
+    def test_memory_filter(self):
+        item_filter = MemoryFilter()
+        self._check_filter(item_filter)
+        item_filter.close()
+
+    def test_bloom_filter(self):
+        item_filter = BloomFilter(capacity=10000, error_rate=0.01)
+        self.assertEqual(95851, item_filter.size)
+        self.assertEqual(7, item_filter.hashes)
+        self._check_filter(item_filter)
+        false_positives = sum(item_filter.add(str(key).encode('ascii')) for key in range(1000, 10000))
+        self.assertLess(false_positives, 200)
+
+    @parameterized.expand([
+        ({'capacity': 0}, 'Capacity'),
+        ({'error_rate': 0}, 'Error rate'),
+        ({'error_rate': 1}, 'Error rate'),
+    ])
+    def test_bloom_filter_bad_arguments(self, kwargs, exc_msg_match):
+        with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+            BloomFilter(**kwargs)
+
+    def test_persistent_filter(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'keys.db')
+            item_filter = PersistentFilter(path, commit_interval=300)
+            self._check_filter(item_filter)
+            item_filter.close()
+            item_filter = PersistentFilter(path)
+            self.assertTrue(item_filter.add(b'999'))
+            self.assertFalse(item_filter.add(b'1000'))
+            item_filter.close()
+
+    def test_persistent_filter_reservations(self):
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'keys.db')
+            item_filter = PersistentFilter(path)
+            self.assertFalse(item_filter.add(b'stored'))
+            self.assertTrue(item_filter.reserve(b'stored'))
+            self.assertEqual([False, True], [item_filter.reserve(b'first'), item_filter.reserve(b'first')])
+            item_filter.release(b'first')
+            self.assertFalse(item_filter.reserve(b'first'))
+            self.assertFalse(item_filter.reserve(b'second'))
+            self.assertFalse(item_filter.add(b'second'))
+            item_filter.close()
+            # reserved keys aren't stored
+            item_filter = PersistentFilter(path)
+            self.assertEqual([True, False, True], [item_filter.reserve(key) for key in (b'stored', b'first', b'second')])
+            item_filter.close()
+
+
+class TestDuplicateFilterPipeline(RssTestCase):
+    def _open_pipeline(self, **settings):
+        crawler = get_crawler(settings_dict=settings)
+        spider = scrapy.Spider.from_crawler(crawler, 'example.com')
+        pipeline = DuplicateFilterPipeline.from_crawler(crawler)
+        pipeline.spider_opened(spider)
+        return pipeline, spider, crawler.stats
+
+    def _process_items(self, pipeline, spider, items, exported=True):
+        results = []
+        for item in items:
+            try:
+                results.append(pipeline.process_item(item, spider))
+            except DropItem as e:
+                spider.crawler.signals.send_catch_log(signals.item_dropped, item=item, response=None,
+                                                      exception=e, spider=spider)
+                results.append(None)
+            else:
+                if exported:
+                    spider.crawler.signals.send_catch_log(signals.item_scraped, item=item, response=None,
+                                                          spider=spider)
+                else:
+                    # the item is dropped by the next pipelines
+                    spider.crawler.signals.send_catch_log(signals.item_dropped, item=item, response=None,
+                                                          exception=DropItem('Export failed'), spider=spider)
+        return results
+
+    @parameterized.expand([
+        ({}, [True, True, False, True, False]),
+        ({'FEED_DEDUP_KEY': 'link'}, [True, False, False, True, True]),
+        ({'FEED_DEDUP_KEY': 'content', 'FEED_DEDUP_FIELDS': 'title'}, [True, False, True, True, False]),
+        ({'FEED_DEDUP_MODE': 'bloom', 'FEED_DEDUP_BLOOM_CAPACITY': 100}, [True, True, False, True, False]),
+    ])
+    def test_drop_duplicates(self, settings, passed):
+        items = [
+            RssItem(title='Item', link='http://example.com/1', guid='id1'),
+            RssItem(title='Item', link='http://example.com/1', guid='id2'),
+            RssItem(title='Other item', link='http://example.com/1', guid='id1'),
+            RssedItem(),
+            RssItem(title='Item', link='http://example.com/2', guid='id2'),
+        ]
+        items[3].rss.title = 'Rssed item'
+        items[3].rss.link = 'http://example.com/3'
+        pipeline, spider, stats = self._open_pipeline(**settings)
+        results = self._process_items(pipeline, spider, items)
+        pipeline.spider_closed(spider)
+        self.assertEqual([item if item_passed else None for item, item_passed in zip(items, passed)], results)
+        self.assertEqual(passed.count(False) or None, stats.get_value('feed/dedup/hits'))
+        self.assertEqual(passed.count(True), stats.get_value('feed/dedup/misses'))
+
+    def test_auto_guid(self):
+        items = [RssItem(title='Item', link='http://example.com/1'), RssItem(title='Item without link'),
+                 RssItem(title='Item', guid='id1', link='http://example.com/1')]
+        pipeline, spider, stats = self._open_pipeline(FEED_DEDUP_AUTO_GUID=True)
+        self._process_items(pipeline, spider, items)
+        self.assertEqual('http://example.com/1', items[0].guid.value)
+        self.assertTrue(items[0].guid.isPermaLink)
+        self.assertFalse(items[1].guid.assigned)
+        self.assertEqual('id1', items[2].guid.value)
+        self.assertEqual(1, stats.get_value('feed/dedup/missing_key'))
+        self.assertEqual(2, stats.get_value('feed/dedup/misses'))
+
+        pipeline, spider, stats = self._open_pipeline()
+        item = RssItem(title='Item', link='http://example.com/1')
+        self._process_items(pipeline, spider, [item])
+        self.assertFalse(item.guid.assigned)
+
+    def test_persistent_mode(self):
+        with TemporaryDirectory() as directory:
+            settings = {'FEED_DEDUP_MODE': 'persistent', 'FEED_DEDUP_PATH': os.path.join(directory, 'keys.db')}
+            for items, passed in [([RssItem(guid='id1'), RssItem(guid='id2')], [True, True]),
+                                  ([RssItem(guid='id2'), RssItem(guid='id3')], [False, True])]:
+                pipeline, spider, _ = self._open_pipeline(**settings)
+                results = self._process_items(pipeline, spider, items)
+                pipeline.spider_closed(spider)
+                self.assertEqual(passed, [result is not None for result in results])
+
+    def test_persistent_mode_failed_items(self):
+        with TemporaryDirectory() as directory:
+            settings = {'FEED_DEDUP_MODE': 'persistent', 'FEED_DEDUP_PATH': os.path.join(directory, 'keys.db')}
+            pipeline, spider, _ = self._open_pipeline(**settings)
+            # the key of the item that isn't exported is released
+            failed_item = RssItem(guid='id1')
+            self.assertEqual([failed_item], self._process_items(pipeline, spider, [failed_item], exported=False))
+            item = RssItem(guid='id1')
+            self.assertIs(item, pipeline.process_item(item, spider))
+            # duplicates of the item that's being processed are dropped and don't release its key
+            self.assertEqual([None], self._process_items(pipeline, spider, [RssItem(guid='id1')]))
+            spider.crawler.signals.send_catch_log(signals.item_scraped, item=item, response=None, spider=spider)
+            pipeline.spider_closed(spider)
+
+            pipeline, spider, _ = self._open_pipeline(**settings)
+            items = [RssItem(guid='id1'), RssItem(guid='id2')]
+            self.assertEqual([None, items[1]], self._process_items(pipeline, spider, items))
+            pipeline.spider_closed(spider)
+
+    @parameterized.expand([
+        ({'FEED_DEDUP_KEY': 'title'}, 'FEED_DEDUP_KEY'),
+        ({'FEED_DEDUP_MODE': 'disk'}, 'FEED_DEDUP_MODE'),
+        ({'FEED_DEDUP_MODE': 'persistent'}, 'FEED_DEDUP_PATH'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with six.assertRaisesRegex(self, NotConfigured, exc_msg_match):
+            self._open_pipeline(**settings)
+
+
+if __name__ == '__main__':
+    pytest.main()
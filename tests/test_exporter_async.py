@@ -21,12 +21,20 @@ from scrapy_rss.exporters import FeedItemExporter, RssItemExporter
 import pytest
 from tests import predefined_items
 from tests.utils import RssTestCase, full_name_func
-from tests.exporter_utils import CrawlerContext, default_feed_settings, FeedSettings, FullRssItemExporter
+from tests.exporter_utils import (CrawlerContext, default_feed_settings, FeedSettings, FullRssItemExporter,
+                                  export_baseline_feed)
 
 
 if Version(scrapy.__version__) >= Version('2.14'):
     from twisted.internet import reactor # not used but it's required
     from unittest import IsolatedAsyncioTestCase
+    import asyncio
+    from io import BytesIO
+    import threading
+    from scrapy import signals
+    from scrapy.utils.test import get_crawler
+
+    from scrapy_rss.aio import AsyncFeedItemExporter
 
     initialized_items = predefined_items.PredefinedItems()
     NSItem0 = predefined_items.NSItem0
@@ -35,6 +43,30 @@ if Version(scrapy.__version__) >= Version('2.14'):
     NSItem3 = predefined_items.NSItem3
 
 
+    class AsyncFullRssItemExporter(AsyncFeedItemExporter, FullRssItemExporter):
+        pass
+
+
+    class AsyncCrawlerContext(CrawlerContext):
+        async def __aenter__(self):
+            return self.__enter__()
+
+        async def __aexit__(self, exc_type, exc_val, exc_tb):
+            responses = await self.crawler.signals.send_catch_log_async(signal=signals.spider_closed,
+                                                                        spider=self.spider, reason=None)
+            for _, failure in responses:
+                if isinstance(failure, Exception):
+                    raise failure
+
+
+    def _async_pipeline_settings(**settings):
+        crawler_settings = dict(CrawlerContext.default_settings)
+        crawler_settings['ITEM_PIPELINES'] = {'scrapy_rss.aio.AsyncFeedExportPipeline': 900}
+        crawler_settings['FEED_EXPORTER'] = AsyncFullRssItemExporter
+        crawler_settings.update(settings)
+        return crawler_settings
+
+
     class TestExporting(IsolatedAsyncioTestCase, RssTestCase):
         @parameterized.expand(zip(chain.from_iterable(
             combinations(default_feed_settings.items(), r)
@@ -268,6 +300,37 @@ if Version(scrapy.__version__) >= Version('2.14'):
                     with CrawlerContext(**feed_settings) as context:
                         await context.ipm.process_item_async(item)
 
+        async def test_validation_settings(self):
+            class DuplicatedNamesElement(Element):
+                attr = ElementAttribute()
+                attr_ = ElementAttribute()
+
+            class BadSchemaItem(RssItem):
+                elem = DuplicatedNamesElement()
+
+            item = RssItem(link='http://example.com/item')
+            with FeedSettings() as feed_settings:
+                crawler_settings = dict(CrawlerContext.default_settings)
+                crawler_settings['FEED_VALIDATION'] = 'trusted'
+                with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    await context.ipm.process_item_async(item)
+                with open(feed_settings['feed_file']) as data:
+                    self.assertIn('<item><link>http://example.com/item</link></item>', data.read())
+
+                crawler_settings['FEED_VALIDATION'] = 'sampled'
+                crawler_settings['FEED_VALIDATION_SAMPLE_RATE'] = 0.5
+                with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    with self.assertRaises(InvalidFeedItemComponentsError):
+                        await context.ipm.process_item_async(item)
+                    await context.ipm.process_item_async(item)
+                    self.assertEqual(1, context.crawler.stats.get_value('feed/validation/failed'))
+
+                crawler_settings['FEED_VALIDATE_SCHEMA'] = True
+                crawler_settings['FEED_ITEM_CLS'] = BadSchemaItem
+                with six.assertRaisesRegex(self, InvalidComponentError, 'XML name is the same'):
+                    with CrawlerContext(crawler_settings=crawler_settings, **feed_settings):
+                        pass
+
         async def test_item_validation3(self):
             class InvalidSuperItem1(FeedItem):
                 pass
@@ -562,6 +625,80 @@ if Version(scrapy.__version__) >= Version('2.14'):
                                        'expected_rss', '{}.rss'.format(item_name))) as expected:
                     self.assertUnorderedXmlEquivalentOutputs(data=data.read(), expected=expected.read())
 
+        async def test_template_engine_setting(self):
+            with FeedSettings() as feed_settings:
+                crawler_settings = dict(CrawlerContext.default_settings)
+                crawler_settings['FEED_EXPORT_ENGINE'] = 'template'
+                for item_name in ('full_rss_item', 'item_with_unique_ns'):
+                    item = initialized_items.items[item_name]
+                    with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                        await context.ipm.process_item_async(item)
+                    with open(feed_settings['feed_file']) as data, \
+                         open(os.path.join(os.path.dirname(__file__),
+                                           'expected_rss', '{}.rss'.format(item_name))) as expected:
+                        self.assertUnorderedXmlEquivalentOutputs(data=data.read(), expected=expected.read())
+
+        @parameterized.expand([('process',), ('thread',)])
+        async def test_serialization_pool_backpressure(self, pool):
+            # the pipeline waits for serialized items without blocking the event loop
+            items = list(initialized_items.items.values())
+            crawler_settings = dict(CrawlerContext.default_settings, FEED_EXPORTER=FullRssItemExporter,
+                                    FEED_SERIALIZATION_WORKERS=2, FEED_SERIALIZATION_POOL=pool,
+                                    FEED_SERIALIZATION_MAX_IN_FLIGHT=3)
+            with FeedSettings() as feed_settings:
+                with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    for item in items:
+                        await context.ipm.process_item_async(item)
+                with open(feed_settings['feed_file'], 'rb') as data:
+                    self.assertEqual(export_baseline_feed(items), data.read())
+
+        async def test_async_pipeline(self):
+            items = list(initialized_items.items.values())
+            with FeedSettings() as feed_settings:
+                async with AsyncCrawlerContext(crawler_settings=_async_pipeline_settings(),
+                                               **feed_settings) as context:
+                    for item in items:
+                        await context.ipm.process_item_async(item)
+                with open(feed_settings['feed_file'], 'rb') as data:
+                    self.assertEqual(export_baseline_feed(items), data.read())
+            self.assertLessEqual(1, context.crawler.stats.get_value('feed/async/writes'))
+            self.assertGreaterEqual(len(items) + 1, context.crawler.stats.get_value('feed/async/writes'))
+
+        async def test_async_pipeline_concurrent_items(self):
+            items = list(initialized_items.items.values())
+            crawler_settings = _async_pipeline_settings(FEED_FLUSH_ITEMS=5, FEED_ASYNC_BUFFER_SIZE=1,
+                                                        FEED_SERIALIZATION_WORKERS=2,
+                                                        FEED_SERIALIZATION_POOL='thread')
+            with FeedSettings() as feed_settings:
+                async with AsyncCrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    await asyncio.gather(*(context.ipm.process_item_async(item) for item in items))
+                with open(feed_settings['feed_file'], 'rb') as data:
+                    self.assertEqual(export_baseline_feed(items), data.read())
+            self.assertEqual(len(items) // 5 + 1, context.crawler.stats.get_value('feed/buffer/flushes'))
+
+        async def test_async_pipeline_append(self):
+            items = list(initialized_items.items.values())
+            with FeedSettings() as feed_settings:
+                for crawl_items in [items[:3], items[3:]]:
+                    async with AsyncCrawlerContext(crawler_settings=_async_pipeline_settings(FEED_APPEND=True),
+                                                   **feed_settings) as context:
+                        for item in crawl_items:
+                            await context.ipm.process_item_async(item)
+                with open(feed_settings['feed_file'], 'rb') as data:
+                    self.assertEqual(export_baseline_feed(items), data.read())
+
+        @parameterized.expand([
+            ({'FEED_WRITER_THREAD': True}, NotConfigured, 'FEED_WRITER_THREAD'),
+            ({'FEED_FORMATS': {'json': 'f.json'}}, NotConfigured, 'FEED_FORMATS'),
+            ({'FEED_EXPORTER': FullRssItemExporter}, TypeError, 'AsyncFeedItemExporter'),
+        ])
+        def test_async_pipeline_bad_settings(self, settings, exc_cls, exc_msg_match):
+            with FeedSettings() as feed_settings:
+                with six.assertRaisesRegex(self, exc_cls, exc_msg_match):
+                    with AsyncCrawlerContext(crawler_settings=_async_pipeline_settings(**settings),
+                                             **feed_settings):
+                        pass
+
         async def test_all_items_in_the_single_feed(self):
             copy_raw_text_for_items = {'full_nested_item'}
             raw_items_text = ''
@@ -610,6 +747,86 @@ if Version(scrapy.__version__) >= Version('2.14'):
                         self.assertUnorderedXmlEquivalentOutputs(data.read(), feed_tree)
 
 
+    class SlowFile(BytesIO):
+        def __init__(self):
+            super(SlowFile, self).__init__()
+            self.writes = 0
+            self.unblocked = threading.Event()
+            self.writer_threads = set()
+
+        def write(self, data):
+            self.unblocked.wait()
+            self.writes += 1
+            self.writer_threads.add(threading.current_thread())
+            return super(SlowFile, self).write(data)
+
+
+    class TestAsyncExporter(IsolatedAsyncioTestCase, RssTestCase):
+        def test_bad_buffer_size(self):
+            with self.assertRaises(ValueError):
+                AsyncFeedItemExporter(BytesIO(), 'Title', 'http://example.com/feed', 'Description',
+                                      max_buffer_size=0)
+
+        async def test_export(self):
+            items = list(initialized_items.items.values())
+            output = BytesIO()
+            exporter = FullRssItemExporter(output, 'Title', 'http://example.com/feed', 'Description')
+            exporter.start_exporting()
+            for item in items:
+                exporter.export_item(item)
+            exporter.finish_exporting()
+            expected = output.getvalue()
+
+            stats = get_crawler().stats
+            file = SlowFile()
+            exporter = AsyncFullRssItemExporter(file, 'Title', 'http://example.com/feed', 'Description',
+                                                max_buffer_size=1, stats=stats)
+            self.addCleanup(file.unblocked.set)
+            exporter.start_exporting()
+            await exporter.export_item(items[0])
+            # the event loop isn't blocked while the file is blocked, the next item waits for the write
+            exporting = asyncio.ensure_future(exporter.export_item(items[1]))
+            await asyncio.sleep(0.01)
+            self.assertFalse(exporting.done())
+            self.assertEqual(b'', file.getvalue())
+            file.unblocked.set()
+            await exporting
+            for item in items[2:]:
+                await exporter.export_item(item)
+            await exporter.finish_exporting()
+            self.assertEqual(expected, file.getvalue())
+            self.assertNotIn(threading.current_thread(), file.writer_threads)
+            self.assertLessEqual(1, stats.get_value('feed/async/stalls'))
+
+        async def test_coalesced_writes(self):
+            file = SlowFile()
+            exporter = AsyncFeedItemExporter(file, 'Title', 'http://example.com/feed', 'Description')
+            self.addCleanup(file.unblocked.set)
+            exporter.start_exporting()
+            await exporter.export_item(RssItem(title='First'))
+            # items are collected while the first write is blocked
+            await asyncio.gather(*(exporter.export_item(RssItem(title='Item {}'.format(i))) for i in range(20)))
+            file.unblocked.set()
+            await exporter.flush()
+            self.assertEqual(2, file.writes)
+            self.assertIn(b'<title>Item 19</title>', file.getvalue())
+            await exporter.finish_exporting()
+            self.assertTrue(file.getvalue().endswith(b'</rss>'))
+
+        async def test_write_error(self):
+            class FailingFile(BytesIO):
+                def write(self, data):
+                    raise IOError('No space left on device')
+
+            exporter = AsyncFeedItemExporter(FailingFile(), 'Title', 'http://example.com/feed', 'Description')
+            exporter.start_exporting()
+            with six.assertRaisesRegex(self, IOError, 'No space left'):
+                for _ in range(100):
+                    await exporter.export_item(RssItem(title='Title'))
+                    await asyncio.sleep(0.01)
+            with six.assertRaisesRegex(self, IOError, 'No space left'):
+                await exporter.finish_exporting()
+
 if __name__ == '__main__':
     pytest.main()
 
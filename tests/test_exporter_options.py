@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from io import BytesIO
+import os
+
+from lxml import etree
+from parameterized import parameterized
+import six
+from scrapy.utils.misc import load_object
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem
+from scrapy_rss.meta import Element, ElementAttribute
+from scrapy_rss.exceptions import *
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.utils import get_tzlocal
+
+import pytest
+from tests import predefined_items
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory
+
+
+initialized_items = predefined_items.PredefinedItems()
+
+
+def _exporter(file=None, **kwargs):
+    return FeedItemExporter(file or BytesIO(), 'Title', 'http://example.com/feed', 'Description', **kwargs)
+
+
+class TestPositionalArguments(RssTestCase):
+    def test_channel_arguments(self):
+        last_build_date = datetime(2020, 1, 1, tzinfo=get_tzlocal())
+        exporter = FeedItemExporter(BytesIO(), 'Title', 'http://example.com/feed', 'Description',
+                                    {'prefix': 'id'}, RssItem, 'en-us', 'Copyright', 'editor@example.com',
+                                    'webmaster@example.com', None, last_build_date, None, 'Generator',
+                                    None, None, 60, None, None, None, None, ['Sunday'])
+        self.assertEqual('en-us', exporter.channel.language.value)
+        self.assertEqual('Copyright', exporter.channel.copyright.value)
+        self.assertEqual(last_build_date, exporter.channel.lastBuildDate.value)
+        self.assertEqual('Generator', exporter.channel.generator.value)
+        self.assertEqual(60, exporter.channel.ttl.value)
+        self.assertEqual('strict', exporter.validation)
+        self.assertEqual('sax', exporter.engine)
+
+
+class TestValidationPolicy(RssTestCase):
+    @parameterized.expand([
+        ({'validation': 'lazy'}, 'Validation mode'),
+        ({'validation': 'sampled', 'validation_sample_rate': 0}, 'sample rate'),
+        ({'validation': 'sampled', 'validation_sample_rate': 1.5}, 'sample rate'),
+    ])
+    def test_bad_arguments(self, kwargs, exc_msg_match):
+        with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+            _exporter(**kwargs)
+
+    def test_strict(self):
+        stats = get_crawler().stats
+        exporter = _exporter(stats=stats)
+        exporter.start_exporting()
+        exporter.export_item(RssItem(title='Title'))
+        with six.assertRaisesRegex(self, InvalidFeedItemComponentsError, 'Missing or invalid'):
+            exporter.export_item(RssItem(link='http://example.com/item'))
+        exporter.finish_exporting()
+        self.assertEqual(2, stats.get_value('feed/validation/validated'))
+        self.assertEqual(1, stats.get_value('feed/validation/failed'))
+
+    def test_trusted(self):
+        stats = get_crawler().stats
+        output = BytesIO()
+        exporter = _exporter(output, validation='trusted', stats=stats)
+        exporter.start_exporting()
+        exporter.export_item(RssItem(link='http://example.com/item'))
+        exporter.finish_exporting()
+        self.assertIn(b'<item><link>http://example.com/item</link></item>', output.getvalue())
+        self.assertIsNone(stats.get_value('feed/validation/validated'))
+
+    def test_sampled(self):
+        stats = get_crawler().stats
+        exporter = _exporter(validation='sampled', validation_sample_rate=0.25, stats=stats)
+        exporter.start_exporting()
+        failed = 0
+        for _ in range(10):
+            try:
+                exporter.export_item(RssItem(link='http://example.com/item'))
+            except InvalidFeedItemComponentsError:
+                failed += 1
+        exporter.finish_exporting()
+        self.assertEqual(3, failed)  # the first, the fifth and the ninth items
+        self.assertEqual(3, stats.get_value('feed/validation/validated'))
+        self.assertEqual(3, stats.get_value('feed/validation/failed'))
+
+    def test_schema_validation(self):
+        class DuplicatedNamesElement(Element):
+            attr = ElementAttribute()
+            attr_ = ElementAttribute()
+
+        class BadSchemaItem(RssItem):
+            elem = DuplicatedNamesElement()
+
+        _exporter(item_cls=RssItem).validate_schema()
+        with six.assertRaisesRegex(self, InvalidComponentError, r"'item\.elem\.attr_'.*? the same as .*?'attr'"):
+            _exporter(item_cls=BadSchemaItem).validate_schema()
+
+
+class TestTemplateEngine(RssTestCase):
+    def _export(self, items, engine, **kwargs):
+        output = BytesIO()
+        exporter = _exporter(output, engine=engine,
+                             last_build_date=datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal()),
+                             **kwargs)
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_item(item)
+        exporter.finish_exporting()
+        return output.getvalue()
+
+    def test_bad_engine(self):
+        with six.assertRaisesRegex(self, ValueError, 'Serialization engine'):
+            _exporter(engine='dom')
+
+    @parameterized.expand(initialized_items.items.items())
+    def test_single_item(self, item_name, item):
+        self.assertEqual(self._export([item], 'sax'), self._export([item], 'template'))
+
+    @parameterized.expand(initialized_items.ns_items)
+    def test_single_ns_item(self, item_name, namespaces, item_cls, item):
+        kwargs = {'namespaces': namespaces,
+                  'item_cls': load_object(item_cls) if isinstance(item_cls, six.string_types) else item_cls}
+        self.assertEqual(self._export([item], 'sax', **kwargs), self._export([item], 'template', **kwargs))
+
+    def test_all_items(self):
+        items = list(initialized_items.items.values())
+        self.assertEqual(self._export(items, 'sax'), self._export(items, 'template'))
+
+    def test_instance_namespaces(self):
+        item = RssItem(title='Title')
+        item.category.append({'value': 'first', 'ns_prefix': 'p', 'ns_uri': 'urn:p'})
+        item.category.append('second')
+        sax_output = self._export([item], 'sax')
+        self.assertIn(b'<item xmlns:p="urn:p"><title>Title</title><category>first</category>', sax_output)
+        self.assertEqual(sax_output, self._export([item], 'template'))
+        self.assertIsNone(_exporter(engine='template')._template_serializer.serialize(item, (None, 'item')))
+
+        item = RssItem(title='Title', enclosure={'url': 'http://example.com/1', 'length': 1, 'type': 'audio/mpeg'})
+        url = next(attr for attr_name, attr in item.enclosure.attrs.items() if str(attr_name) == 'url')
+        url.ns_uri = 'urn:e'
+        url.ns_prefix = 'e'
+        self.assertEqual(self._export([item], 'sax'), self._export([item], 'template'))
+        self.assertIsNone(_exporter(engine='template')._template_serializer.serialize(item, (None, 'item')))
+
+    def test_templates(self):
+        exporter = _exporter(engine='template', item_cls=predefined_items.NSItem0)
+        serializer = exporter._template_serializer
+        self.assertIsNotNone(serializer.get_template(RssItem))
+        self.assertIsNotNone(serializer.get_template(predefined_items.NSItem0))
+        # namespaces with the same prefix are declared by children elements
+        self.assertIsNone(serializer.get_template(predefined_items.NSItem1))
+        self.assertEqual('<item><title>Title &amp; &lt;more&gt;</title>'
+                         '<enclosure url=\'http://example.com/a"b\' length="1" type="audio/mpeg"></enclosure>'
+                         '</item>',
+                         serializer.serialize(RssItem(title='Title & <more>',
+                                                      enclosure={'url': 'http://example.com/a"b',
+                                                                 'length': 1, 'type': 'audio/mpeg'}),
+                                              (None, 'item')))
+
+
+
+class TestNamespaceScopes(RssTestCase):
+    @parameterized.expand(initialized_items.ns_items)
+    def test_scopes_are_ended(self, item_name, namespaces, item_cls, item):
+        if isinstance(item_cls, six.string_types):
+            item_cls = load_object(item_cls)
+        exporter = _exporter(namespaces=namespaces, item_cls=item_cls)
+        exporter.start_exporting()
+        root_namespaces = dict(exporter._started_namespaces)
+        for _ in range(2):
+            exporter.export_item(item)
+            self.assertEqual(root_namespaces, exporter._started_namespaces)
+            self.assertEqual([], exporter._ns_scopes)
+        exporter.finish_exporting()
+        self.assertEqual({}, exporter._started_namespaces)
+
+    def test_scopes_of_failed_items(self):
+        class BadValue(object):
+            def __str__(self):
+                raise ValueError('Bad value')
+
+        class AttributedItem(RssItem):
+            attr = ElementAttribute(ns_prefix='a', ns_uri='urn:a')
+
+        enclosure = {'url': 'http://example.com/1', 'length': 1, 'type': 'audio/mpeg'}
+        bad_items = [AttributedItem(title='Bad', enclosure=dict(enclosure, length=BadValue())),
+                     AttributedItem(title='Bad')]
+        bad_items[1].attr = BadValue()
+        item = AttributedItem(title='Good', enclosure=enclosure)
+        for element in (bad_items[0].enclosure, item.enclosure):
+            element.ns_uri = 'urn:e'
+            element.ns_prefix = 'e'
+        exporter = _exporter(validation='trusted')
+        exporter.start_exporting()
+        root_namespaces = dict(exporter._started_namespaces)
+        expected = exporter.serialize_item(item)
+        self.assertIn('<item xmlns:e="urn:e">', expected)
+        for bad_item in bad_items:
+            with six.assertRaisesRegex(self, InvalidFeedItemComponentsError, 'Bad value'):
+                exporter.serialize_item(bad_item)
+            self.assertEqual(root_namespaces, exporter._started_namespaces)
+            self.assertEqual([], exporter._ns_scopes)
+            self.assertEqual(expected, exporter.serialize_item(item))
+
+    def test_instance_namespaces_are_declared_by_item(self):
+        item = RssItem(title='Title')
+        item.category.append({'value': 'first', 'ns_prefix': 'p', 'ns_uri': 'urn:p'})
+        item.category.append({'value': 'second', 'ns_prefix': 'q', 'ns_uri': 'urn:q'})
+        output = BytesIO()
+        exporter = _exporter(output, namespaces={'q': 'urn:q'})
+        exporter.start_exporting()
+        exporter.export_item(item)
+        self.assertEqual([], exporter._ns_scopes)
+        exporter.finish_exporting()
+        self.assertIn(b'<item xmlns:p="urn:p"><title>Title</title><category>first</category>'
+                      b'<category>second</category></item>', output.getvalue())
+
+        item = RssItem(title='Title', enclosure={'url': 'http://example.com/1', 'length': 1, 'type': 'audio/mpeg'})
+        url = next(attr for attr_name, attr in item.enclosure.attrs.items() if str(attr_name) == 'url')
+        url.ns_uri = 'urn:e'
+        url.ns_prefix = 'e'
+        output = BytesIO()
+        exporter = _exporter(output)
+        exporter.start_exporting()
+        exporter.export_item(item)
+        exporter.finish_exporting()
+        self.assertIn(b'<item xmlns:e="urn:e"><title>Title</title><enclosure ', output.getvalue())
+
+
+
+class TestFeedFragments(RssTestCase):
+    @parameterized.expand([('sax',), ('template',)])
+    def test_header_and_footer(self, engine):
+        last_build_date = datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal())
+        items = list(initialized_items.items.values())
+        output = BytesIO()
+        exporter = _exporter(output, engine=engine, last_build_date=last_build_date)
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_item(item)
+        exporter.finish_exporting()
+        expected = output.getvalue()
+
+        output = BytesIO()
+        exporter = _exporter(output, engine=engine, last_build_date=last_build_date)
+        header = exporter.serialize_header()
+        self.assertEqual(b'', output.getvalue())
+        exporter.export_fragment(header)
+        footer = exporter.serialize_footer()
+        self.assertEqual(footer, exporter.serialize_footer())
+        for item in items:
+            exporter.export_item(item)
+        exporter.finish_exporting()
+        self.assertEqual(expected, output.getvalue())
+        self.assertTrue(expected.endswith(footer.encode('utf-8')))
+
+    def test_links(self):
+        links = [('prev-archive', 'http://example.com/feed.1.rss'), ('next', 'http://example.com/feed?page=3&x="1"')]
+        fragment = FeedItemExporter.serialize_links(links)
+        channel = etree.fromstring('<channel>{}</channel>'.format(fragment))
+        self.assertEqual(links, [(link.get('rel'), link.get('href'))
+                                 for link in channel.iterfind('{http://www.w3.org/2005/Atom}link')])
+        self.assertEqual('', FeedItemExporter.serialize_links([]))
+
+
+def _dated_items():
+    dates = [datetime(2020, 1, 3), None, 'Sat, 04 Jan 2020 00:00:00 +0000', datetime(2020, 1, 1),
+             datetime(2020, 1, 5, tzinfo=get_tzlocal()), datetime(2020, 1, 3), None, datetime(2019, 12, 31)]
+    items = []
+    for number, pub_date in enumerate(dates):
+        item = RssItem(title='Item {}'.format(number))
+        if pub_date is not None:
+            item.pubDate = pub_date
+        items.append(item)
+    return items
+
+
+def _export_items(items, **kwargs):
+    output = BytesIO()
+    exporter = _exporter(output, last_build_date=datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal()), **kwargs)
+    exporter.start_exporting()
+    for item in items:
+        exporter.export_item(item)
+    exporter.finish_exporting()
+    return output.getvalue()
+
+
+class TestMaxItems(RssTestCase):
+    def test_bad_max_items(self):
+        with six.assertRaisesRegex(self, ValueError, 'Maximum number of items'):
+            _exporter(max_items=-1)
+        with six.assertRaisesRegex(self, ValueError, 'both limited and sorted'):
+            _exporter(max_items=1, sort_items=True)
+
+    @parameterized.expand([
+        (1, [4]),
+        (3, [4, 2, 0]),
+        (5, [4, 2, 0, 5, 3]),
+        (7, [4, 2, 0, 5, 3, 7, 1]),
+        (10, [4, 2, 0, 5, 3, 7, 1, 6]),
+    ])
+    def test_latest_items(self, max_items, expected_numbers):
+        items = _dated_items()
+        stats = get_crawler().stats
+        self.assertEqual(_export_items([items[number] for number in expected_numbers]),
+                         _export_items(items, max_items=max_items, stats=stats))
+        self.assertEqual(max(0, len(items) - max_items) or None, stats.get_value('feed/max_items/dropped'))
+
+    @parameterized.expand([('sax',), ('template',)])
+    def test_fragments(self, engine):
+        items = _dated_items()
+        output = BytesIO()
+        exporter = _exporter(output, last_build_date=datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal()),
+                             engine=engine, max_items=2)
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_fragment(exporter.serialize_item(item), item)
+        written = []
+        exporter.export_retained_items(lambda: written.append(output.tell()))
+        self.assertEqual(2, len(written))
+        exporter.finish_exporting()
+        self.assertEqual(_export_items([items[4], items[2]], engine=engine), output.getvalue())
+
+
+class TestSortedItems(RssTestCase):
+    @parameterized.expand([(1, 8, 4), (200, 2, 1), (1 << 20, 0, 0)])
+    def test_latest_first(self, sort_buffer_size, runs, merges):
+        items = _dated_items()
+        with TemporaryDirectory() as temp_dir:
+            stats = get_crawler().stats
+            self.assertEqual(_export_items([items[number] for number in [4, 2, 0, 5, 3, 7, 1, 6]]),
+                             _export_items(items, sort_items=True, sort_buffer_size=sort_buffer_size,
+                                           sort_max_fan_in=3, sort_temp_dir=temp_dir, stats=stats))
+            self.assertEqual([], os.listdir(temp_dir))
+        self.assertEqual(runs or None, stats.get_value('feed/sort/runs'))
+        self.assertEqual(merges or None, stats.get_value('feed/sort/merges'))
+
+    def test_sort_key(self):
+        items = _dated_items()
+        self.assertEqual(_export_items(items[::-1]),
+                         _export_items(items, sort_items=True, sort_buffer_size=1,
+                                       sort_key=lambda item: -int(item.title.value.split()[1])))
+
+    def test_discard(self):
+        with TemporaryDirectory() as temp_dir:
+            exporter = _exporter(sort_items=True, sort_buffer_size=1, sort_temp_dir=temp_dir)
+            exporter.start_exporting()
+            for item in _dated_items():
+                exporter.export_item(item)
+            self.assertNotEqual([], os.listdir(temp_dir))
+            exporter.discard_retained_items()
+            self.assertEqual([], os.listdir(temp_dir))
+
+
+class TestContentDigest(RssTestCase):
+    @staticmethod
+    def _digest(items, last_build_date=None, **kwargs):
+        exporter = _exporter(last_build_date=last_build_date, digest=True, **kwargs)
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_item(item)
+        exporter.finish_exporting()
+        return exporter.content_digest
+
+    def test_disabled(self):
+        exporter = _exporter()
+        exporter.start_exporting()
+        exporter.finish_exporting()
+        self.assertIsNone(exporter.content_digest)
+        self.assertIsNone(exporter.etag)
+
+    def test_etag(self):
+        exporter = _exporter(digest=True)
+        exporter.start_exporting()
+        exporter.finish_exporting()
+        six.assertRegex(self, exporter.content_digest, r'^[0-9a-f]{64}$')
+        self.assertEqual('"{}"'.format(exporter.content_digest), exporter.etag)
+
+    def test_last_build_date_is_ignored(self):
+        items = _dated_items()
+        self.assertEqual(self._digest(items, datetime(2000, 2, 1)), self._digest(items, datetime(2020, 2, 1)))
+        self.assertEqual(self._digest(items), self._digest(items, engine='template'))
+        self.assertEqual(self._digest([items[number] for number in [4, 2, 0, 5]]), self._digest(items, max_items=4))
+
+    @parameterized.expand([
+        ({'items': _dated_items()[:-1]},),
+        ({'items': _dated_items()[::-1]},),
+        ({'language': 'en'},),
+        ({'item_cls': predefined_items.NSItem0},),
+    ])
+    def test_changes(self, kwargs):
+        kwargs.setdefault('items', _dated_items())
+        self.assertNotEqual(self._digest(_dated_items()), self._digest(**kwargs))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -275,6 +275,37 @@ if Version(scrapy.__version__) < Version('2.14'):
                     with CrawlerContext(**feed_settings) as context:
                         context.ipm.process_item(item, context.spider)
 
+        def test_validation_settings(self):
+            class DuplicatedNamesElement(Element):
+                attr = ElementAttribute()
+                attr_ = ElementAttribute()
+
+            class BadSchemaItem(RssItem):
+                elem = DuplicatedNamesElement()
+
+            item = RssItem(link='http://example.com/item')
+            with FeedSettings() as feed_settings:
+                crawler_settings = dict(CrawlerContext.default_settings)
+                crawler_settings['FEED_VALIDATION'] = 'trusted'
+                with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    context.ipm.process_item(item, context.spider)
+                with open(feed_settings['feed_file']) as data:
+                    self.assertIn('<item><link>http://example.com/item</link></item>', data.read())
+
+                crawler_settings['FEED_VALIDATION'] = 'sampled'
+                crawler_settings['FEED_VALIDATION_SAMPLE_RATE'] = 0.5
+                with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                    with self.assertRaises(InvalidFeedItemComponentsError):
+                        context.ipm.process_item(item, context.spider)
+                    context.ipm.process_item(item, context.spider)
+                    self.assertEqual(1, context.crawler.stats.get_value('feed/validation/failed'))
+
+                crawler_settings['FEED_VALIDATE_SCHEMA'] = True
+                crawler_settings['FEED_ITEM_CLS'] = BadSchemaItem
+                with six.assertRaisesRegex(self, InvalidComponentError, 'XML name is the same'):
+                    with CrawlerContext(crawler_settings=crawler_settings, **feed_settings):
+                        pass
+
         def test_item_validation3(self):
             class InvalidSuperItem1(FeedItem):
                 pass
@@ -569,6 +600,19 @@ if Version(scrapy.__version__) < Version('2.14'):
                                        'expected_rss', '{}.rss'.format(item_name))) as expected:
                     self.assertUnorderedXmlEquivalentOutputs(data=data.read(), expected=expected.read())
 
+        def test_template_engine_setting(self):
+            with FeedSettings() as feed_settings:
+                crawler_settings = dict(CrawlerContext.default_settings)
+                crawler_settings['FEED_EXPORT_ENGINE'] = 'template'
+                for item_name in ('full_rss_item', 'item_with_unique_ns'):
+                    item = initialized_items.items[item_name]
+                    with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                        context.ipm.process_item(item, context.spider)
+                    with open(feed_settings['feed_file']) as data, \
+                         open(os.path.join(os.path.dirname(__file__),
+                                           'expected_rss', '{}.rss'.format(item_name))) as expected:
+                        self.assertUnorderedXmlEquivalentOutputs(data=data.read(), expected=expected.read())
+
         def test_all_items_in_the_single_feed(self):
             copy_raw_text_for_items = {'full_nested_item'}
             raw_items_text = ''
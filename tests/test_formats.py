@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from io import BytesIO
+import json
+
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.formats import JsonFeedExporter, JSON_FEED_VERSION
+
+import pytest
+from tests import predefined_items
+from tests.utils import RssTestCase
+from tests.exporter_utils import FullRssItemExporter
+
+
+initialized_items = predefined_items.PredefinedItems()
+
+
+class TestJsonFeedExporter(RssTestCase):
+    def test_channel(self):
+        channel = FullRssItemExporter(BytesIO(), 'Title', 'http://example.com/feed', 'Description').channel
+        exporter = JsonFeedExporter(BytesIO(), channel, feed_url='http://example.com/feed.json')
+        self.assertEqual({
+            'version': JSON_FEED_VERSION,
+            'title': 'Title',
+            'home_page_url': 'http://example.com/feed',
+            'feed_url': 'http://example.com/feed.json',
+            'description': 'Description',
+            'icon': 'http://example.com/img.jpg',
+            'authors': [{'name': 'm@dot.com (Manager Name)'}],
+            'language': 'en-US',
+        }, dict(exporter.serialize_channel()))
+
+        channel = FeedItemExporter(BytesIO(), 'Title', 'http://example.com/feed', '').channel
+        self.assertEqual({'version': JSON_FEED_VERSION, 'title': 'Title', 'home_page_url': 'http://example.com/feed'},
+                         dict(JsonFeedExporter(BytesIO(), channel).serialize_channel()))
+
+    def test_item(self):
+        item = RssItem(title='Title', link='http://example.com/1', description='<b>Text</b>',
+                       author='author@example.com', guid='id1',
+                       pubDate='Tue, 01 Feb 2000 00:10:30 +0300')
+        item.category = ['first', 'second']
+        item.enclosure = {'url': 'http://example.com/file.mp3', 'length': '100', 'type': 'audio/mpeg'}
+        item.comments = 'http://example.com/1#comments'
+        exporter = JsonFeedExporter(BytesIO(), FeedItemExporter(BytesIO(), 'Title', 'Link', '').channel)
+        self.assertEqual({
+            'id': 'id1',
+            'url': 'http://example.com/1',
+            'title': 'Title',
+            'content_html': '<b>Text</b>',
+            'date_published': '2000-02-01T00:10:30+03:00',
+            'authors': [{'name': 'author@example.com'}],
+            'tags': ['first', 'second'],
+            'attachments': [{'url': 'http://example.com/file.mp3', 'mime_type': 'audio/mpeg', 'size_in_bytes': 100}],
+        }, json.loads(json.dumps(exporter.serialize_item(item))))
+
+    def test_item_id(self):
+        exporter = JsonFeedExporter(BytesIO(), FeedItemExporter(BytesIO(), 'Title', 'Link', '').channel)
+        self.assertEqual({'id': 'http://example.com/1', 'url': 'http://example.com/1', 'title': 'Title',
+                          'content_html': ''},
+                         dict(exporter.serialize_item(RssItem(title='Title', link='http://example.com/1'))))
+        item_id = exporter.serialize_item(RssItem(title='Title'))['id']
+        self.assertTrue(item_id.startswith('urn:sha1:'))
+        self.assertEqual(item_id, exporter.serialize_item(RssItem(title='Title'))['id'])
+        self.assertNotEqual(item_id, exporter.serialize_item(RssItem(title='Other title'))['id'])
+
+    def test_export(self):
+        stats = get_crawler().stats
+        output = BytesIO()
+        feed_exporter = FeedItemExporter(BytesIO(), u'Заголовок', 'http://example.com/feed', 'Description')
+        exporter = JsonFeedExporter(output, feed_exporter.channel, stats=stats)
+        items = list(initialized_items.items.values())
+        exporter.start_exporting()
+        for item in items:
+            exporter.export_item(feed_exporter.prepare_item(item))
+        exporter.finish_exporting()
+        feed = json.loads(output.getvalue().decode('utf-8'))
+        self.assertEqual(u'Заголовок', feed['title'])
+        self.assertEqual(len(items), len(feed['items']))
+        self.assertEqual([dict(exporter.serialize_item(feed_exporter.prepare_item(item))) for item in items],
+                         feed['items'])
+        self.assertEqual(len(items), stats.get_value('feed/formats/json/items'))
+
+        output = BytesIO()
+        exporter = JsonFeedExporter(output, feed_exporter.channel)
+        exporter.start_exporting()
+        exporter.finish_exporting()
+        self.assertEqual([], json.loads(output.getvalue().decode('utf-8'))['items'])
+
+
+if __name__ == '__main__':
+    pytest.main()
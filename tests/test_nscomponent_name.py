@@ -386,5 +386,28 @@ def test_get_namespaces_with_compound_name_v2(name, ns_prefix, sec_ns_prefix, ns
     assert n.get_namespaces() == {(ns_prefix, ns_uri)}
 
 
+@pytest.mark.parametrize("name,ns_uri", product(names, ns_uris))
+def test_hash_after_ns_uri_assignment(name, ns_uri):
+    n = NSComponentName(name)
+    n.ns_uri = ns_uri
+    assert hash(n) == hash(NSComponentName(name, ns_uri=ns_uri))
+    assert n == NSComponentName(name, ns_uri=ns_uri)
+    assert n.xml_name == (ns_uri, name)
+
+
+@pytest.mark.parametrize("name", names)
+def test_interned_names(name):
+    compound_name = 'prefix__' + name
+    assert NSComponentName(name).name is NSComponentName(name).name
+    assert (NSComponentName(compound_name, ns_uri='id').pub_name
+            is NSComponentName(compound_name, ns_uri='id').pub_name)
+    assert (NSComponentName(compound_name, ns_uri='id').priv_name
+            is NSComponentName(compound_name, ns_uri='id').priv_name)
+
+
+def test_no_instance_dict():
+    assert not hasattr(NSComponentName('name'), '__dict__')
+
+
 if __name__ == '__main__':
     pytest.main()
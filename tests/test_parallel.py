@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+from datetime import datetime
+from io import BytesIO
+import logging
+import pickle
+import threading
+
+from parameterized import parameterized
+import six
+from scrapy.utils.misc import load_object
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem
+from scrapy_rss.meta import Element, ElementAttribute
+from scrapy_rss.exceptions import *
+from scrapy_rss.exporters import FeedItemExporter
+from scrapy_rss.parallel import dump_element, load_element, ProcessSerializationPool, ThreadSerializationPool
+from scrapy_rss.utils import get_tzlocal
+
+import pytest
+from tests import predefined_items
+from tests.utils import RssTestCase
+
+
+initialized_items = predefined_items.PredefinedItems()
+exporter_args = ('Title', 'http://example.com/feed', 'Description')
+
+
+def _exporter_kwargs(**kwargs):
+    kwargs['last_build_date'] = datetime(2000, 2, 1, 5, 10, 30, tzinfo=get_tzlocal())
+    return kwargs
+
+
+def _export(items, workers=0, pool_cls=ProcessSerializationPool, **kwargs):
+    output = BytesIO()
+    kwargs = _exporter_kwargs(**kwargs)
+    exporter = FeedItemExporter(output, *exporter_args, **kwargs)
+    exporter.start_exporting()
+    if workers:
+        pool = pool_cls(exporter, workers, max_in_flight=3,
+                        exporter_args=exporter_args, exporter_kwargs=kwargs)
+        try:
+            for item in items:
+                pool.submit(item)
+            pool.drain()
+        finally:
+            pool.close()
+    else:
+        for item in items:
+            exporter.export_item(item)
+    exporter.finish_exporting()
+    return output.getvalue()
+
+
+class BadValue(object):
+    def __str__(self):
+        raise ValueError('Bad value')
+
+
+class TestElementDump(RssTestCase):
+    @parameterized.expand(initialized_items.items.items())
+    def test_item(self, item_name, item):
+        restored = load_element(item.__class__, dump_element(item))
+        self.assertEqual(_export([item]), _export([restored]))
+
+    @parameterized.expand(initialized_items.ns_items)
+    def test_ns_item(self, item_name, namespaces, item_cls, item):
+        if isinstance(item_cls, six.string_types):
+            item_cls = load_object(item_cls)
+        state = pickle.loads(pickle.dumps(dump_element(item), pickle.HIGHEST_PROTOCOL))
+        restored = load_element(item.__class__, state)
+        self.assertEqual(_export([item], namespaces=namespaces, item_cls=item_cls),
+                         _export([restored], namespaces=namespaces, item_cls=item_cls))
+
+    def test_components_state(self):
+        item = RssItem(title='Title', category=['first', 'second'])
+        item.guid = {'value': 'id', 'isPermaLink': False}
+        item.guid.ns_uri = 'http://example.com/ns'
+        item.guid.ns_prefix = 'ex'
+        restored = load_element(RssItem, dump_element(item))
+        self.assertEqual('Title', restored.title.value)
+        self.assertEqual(['first', 'second'], [category.value for category in restored.category])
+        self.assertEqual(('ex', 'http://example.com/ns'), (restored.guid.ns_prefix, restored.guid.ns_uri))
+        self.assertFalse(restored.guid.isPermaLink)
+        self.assertFalse(restored.description.assigned)
+        self.assertEqual(item.get_namespaces(), restored.get_namespaces())
+
+
+pools = [(ProcessSerializationPool.__name__, ProcessSerializationPool),
+         (ThreadSerializationPool.__name__, ThreadSerializationPool)]
+
+
+class TestSerializationPools(RssTestCase):
+    @parameterized.expand(pools)
+    def test_bad_arguments(self, pool_name, pool_cls):
+        exporter = FeedItemExporter(BytesIO(), *exporter_args)
+        with six.assertRaisesRegex(self, ValueError, 'workers'):
+            pool_cls(exporter, 0)
+        with six.assertRaisesRegex(self, ValueError, 'in flight'):
+            pool_cls(exporter, 1, max_in_flight=0)
+        with six.assertRaisesRegex(self, ValueError, 'Batch size'):
+            pool_cls(exporter, 1, max_in_flight=2, batch_size=3)
+
+    @parameterized.expand(pools)
+    def test_ordered_output(self, pool_name, pool_cls):
+        items = list(initialized_items.items.values()) * 3
+        self.assertEqual(_export(items), _export(items, workers=2, pool_cls=pool_cls))
+        self.assertEqual(_export(items, engine='template'),
+                         _export(items, workers=2, pool_cls=pool_cls, engine='template'))
+
+    @parameterized.expand(pools)
+    def test_ns_items(self, pool_name, pool_cls):
+        for item_name, namespaces, item_cls, item in initialized_items.ns_items:
+            if isinstance(item_cls, six.string_types):
+                item_cls = load_object(item_cls)
+            self.assertEqual(_export([item, item], namespaces=namespaces, item_cls=item_cls),
+                             _export([item, item], workers=1, pool_cls=pool_cls,
+                                     namespaces=namespaces, item_cls=item_cls))
+
+    @parameterized.expand(pools)
+    def test_fallback(self, pool_name, pool_cls):
+        class LocalElement(Element):
+            attr = ElementAttribute(is_content=True)
+
+        class LocalItem(RssItem):
+            local = LocalElement()
+
+        # classes of the item cannot be pickled, so it's serialized by the writer in the process pool
+        local_item = LocalItem(title='Local', local='value')
+        items = [RssItem(title='First'), local_item, RssItem(title='Last')]
+        self.assertEqual(_export(items, item_cls=LocalItem),
+                         _export(items, workers=1, pool_cls=pool_cls, item_cls=LocalItem))
+
+        output = BytesIO()
+        exporter = FeedItemExporter(output, *exporter_args)
+        exporter.start_exporting()
+        pool = pool_cls(exporter, 1, exporter_args=exporter_args)
+        try:
+            # items are validated before submission
+            with six.assertRaisesRegex(self, InvalidFeedItemComponentsError, 'Missing or invalid'):
+                pool.submit(RssItem(link='http://example.com/item'))
+        finally:
+            pool.close()
+
+    @parameterized.expand(pools)
+    def test_serialization_errors(self, pool_name, pool_cls):
+        bad_items = [RssItem(title=BadValue()), RssItem(title='Bad', enclosure={
+            'url': 'http://example.com/1', 'length': BadValue(), 'type': 'audio/mpeg'})]
+        good_items = [RssItem(title='First'), RssItem(title='Second'), RssItem(title='Last', enclosure={
+            'url': 'http://example.com/2', 'length': 1, 'type': 'audio/mpeg'})]
+        # namespaces of the failed item are declared by the next item again
+        for item in (bad_items[1], good_items[2]):
+            item.enclosure.ns_uri = 'urn:enclosure'
+            item.enclosure.ns_prefix = 'e'
+        items = [good_items[0], bad_items[0], good_items[1], bad_items[1], good_items[2]]
+        for engine in ('sax', 'template'):
+            stats = get_crawler().stats
+            output = BytesIO()
+            kwargs = _exporter_kwargs(engine=engine, validation='trusted')
+            exporter = FeedItemExporter(output, *exporter_args, stats=stats, **kwargs)
+            exporter.start_exporting()
+            pool = pool_cls(exporter, 1, batch_size=1, exporter_args=exporter_args, exporter_kwargs=kwargs)
+            records = []
+            handler = logging.Handler()
+            handler.emit = records.append
+            logger = logging.getLogger('scrapy_rss.parallel')
+            logger.addHandler(handler)
+            try:
+                # failed items are reported and skipped, the next items are written
+                for item in items:
+                    pool.submit(item)
+                pool.drain()
+            finally:
+                logger.removeHandler(handler)
+                pool.close()
+            exporter.finish_exporting()
+            self.assertEqual(_export(good_items, engine=engine), output.getvalue())
+            self.assertEqual(2, stats.get_value('feed/serialization/failed'))
+            self.assertEqual(bad_items, [record.args[0] for record in records])
+
+    def test_waiter(self):
+        released = threading.Event()
+
+        def blocking_str(value):
+            released.wait()
+            return str(value)
+
+        class SlowElement(Element):
+            attr = ElementAttribute(is_content=True, serializer=blocking_str)
+
+        class SlowItem(RssItem):
+            slow = SlowElement()
+
+        items = [SlowItem(title=str(number), slow='value') for number in range(3)]
+        output = BytesIO()
+        kwargs = _exporter_kwargs(item_cls=SlowItem)
+        exporter = FeedItemExporter(output, *exporter_args, **kwargs)
+        exporter.start_exporting()
+        pool = ThreadSerializationPool(exporter, 1, max_in_flight=2, batch_size=1,
+                                       exporter_args=exporter_args, exporter_kwargs=kwargs)
+        try:
+            pool.submit(items[0])
+            pool.submit(items[1])
+            self.assertIsNone(pool.get_waiter())
+            # submission doesn't wait for workers when the limit is exceeded
+            pool.submit(items[2])
+            waiter = pool.get_waiter()
+            self.assertIsNotNone(waiter)
+            released.set()
+            waiter()
+            pool.merge_ready()
+            self.assertIsNone(pool.get_waiter())
+            pool.drain()
+        finally:
+            released.set()
+            pool.close()
+        exporter.finish_exporting()
+        self.assertEqual(_export(items, item_cls=SlowItem), output.getvalue())
+
+
+
+class TestConcurrentReading(RssTestCase):
+    @staticmethod
+    def _read_concurrently(read, threads_number=8):
+        results = []
+        started = threading.Event()
+
+        def target():
+            started.wait()
+            results.append(read())
+
+        threads = [threading.Thread(target=target) for _ in range(threads_number)]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_derived_state(self):
+        def read():
+            return [(item.assigned, item.get_namespaces(), item.get_namespaces(False, True),
+                     item.is_valid(), repr(item))
+                    for item in items]
+
+        items = [item for _, _, _, item in initialized_items.ns_items]
+        items.extend(initialized_items.items.values())
+        expected = read()
+        self.assertEqual([expected] * 8, self._read_concurrently(read))
+
+    def test_lazy_children(self):
+        item = RssItem(title='Title')
+        children = self._read_concurrently(lambda: (item.description, item.guid, item.category))
+        for child in children:
+            self.assertIs(item.description, child[0])
+            self.assertIs(item.guid, child[1])
+            self.assertIs(item.category, child[2])
+
+
+if __name__ == '__main__':
+    pytest.main()
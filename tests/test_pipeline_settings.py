@@ -0,0 +1,487 @@
+# -*- coding: utf-8 -*-
+import bz2
+from datetime import datetime, timedelta
+import gzip
+import json
+import os
+import re
+
+from parameterized import parameterized
+import six
+from lxml import etree
+
+from scrapy.exceptions import NotConfigured, CloseSpider
+
+from scrapy_rss.items import RssItem
+from scrapy_rss.utils import get_tzlocal
+
+import pytest
+from tests import predefined_items
+from tests.utils import RssTestCase
+from tests.exporter_utils import (CrawlerContext, FeedSettings, FullRssItemExporter,
+                                  process_items, export_feed, export_baseline_feed)
+
+
+initialized_items = predefined_items.PredefinedItems()
+ATOM_LINK = '{http://www.w3.org/2005/Atom}link'
+# items aren't waited for, Deferreds of exceeded limits are fired by the running reactor only
+POOL_SETTINGS = {'FEED_SERIALIZATION_WORKERS': 2, 'FEED_SERIALIZATION_POOL': 'thread',
+                 'FEED_SERIALIZATION_MAX_IN_FLIGHT': 100}
+
+
+def _read(path):
+    with open(path, 'rb') as data:
+        return data.read()
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _dated_items(number, step=7):
+    items = []
+    for index in range(number):
+        item = RssItem(title='Item {}'.format(index))
+        item.pubDate = datetime(2020, 1, 1, tzinfo=get_tzlocal()) + timedelta(hours=index * step % number)
+        items.append(item)
+    return items
+
+
+def _latest(items, number=None):
+    return sorted(items, key=lambda item: item.pubDate.value, reverse=True)[:number]
+
+
+def _page_names(directory):
+    return sorted(os.listdir(directory), key=lambda name: (len(name), name))
+
+
+class FailingExporter(FullRssItemExporter):
+    def finish_exporting(self):
+        raise IOError('No space left on device')
+
+
+class LaterExporter(FullRssItemExporter):
+    def __init__(self, *args, **kwargs):
+        kwargs['last_build_date'] = datetime(2000, 2, 2, 5, 10, 30, tzinfo=get_tzlocal())
+        super(LaterExporter, self).__init__(*args, **kwargs)
+
+
+class TestBufferingSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    def test_flush_items(self):
+        expected = export_baseline_feed(self.items)
+        crawler_settings = dict(CrawlerContext.default_settings, FEED_EXPORTER=FullRssItemExporter,
+                                FEED_BUFFER_SIZE=1 << 20, FEED_FLUSH_ITEMS=3)
+        with FeedSettings() as feed_settings:
+            with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                process_items(context, self.items)
+                self.assertEqual(len(self.items) // 3, context.crawler.stats.get_value('feed/buffer/flushes'))
+            self.assertEqual(expected, _read(feed_settings['feed_file']))
+        self.assertEqual(len(self.items) // 3 + 1, context.crawler.stats.get_value('feed/buffer/flushes'))
+        self.assertEqual(len(expected), context.crawler.stats.get_value('feed/buffer/flushed_bytes'))
+
+    def test_writer_thread(self):
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self.items, FEED_FLUSH_ITEMS=3, FEED_WRITER_THREAD=True)
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+        self.assertEqual(len(self.items) // 3 + 1, context.crawler.stats.get_value('feed/buffer/flushes'))
+        self.assertLessEqual(1, context.crawler.stats.get_value('feed/writer/max_queue_depth'))
+
+
+class TestSerializationPoolSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    @parameterized.expand([('process',), ('thread',)])
+    def test_pool(self, pool):
+        settings = dict(POOL_SETTINGS, FEED_SERIALIZATION_POOL=pool, FEED_FLUSH_ITEMS=5)
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self.items, **settings)
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+        self.assertEqual(len(self.items) // 5 + 1, context.crawler.stats.get_value('feed/buffer/flushes'))
+
+    def test_bad_pool(self):
+        with FeedSettings() as feed_settings:
+            with six.assertRaisesRegex(self, ValueError, 'Serialization pool'):
+                export_feed(feed_settings, [], FEED_SERIALIZATION_WORKERS=2, FEED_SERIALIZATION_POOL='greenlet')
+
+
+class TestCompressionSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    def test_compression_by_extension(self):
+        expected = export_baseline_feed(self.items)
+        with FeedSettings() as feed_settings:
+            feed_settings = dict(feed_settings, feed_file=feed_settings['feed_file'] + '.gz')
+            context = export_feed(feed_settings, self.items)
+            with gzip.open(feed_settings['feed_file'], 'rb') as data:
+                self.assertEqual(expected, data.read())
+            self.assertEqual(len(expected), context.crawler.stats.get_value('feed/compression/input_bytes'))
+            self.assertEqual(os.path.getsize(feed_settings['feed_file']),
+                             context.crawler.stats.get_value('feed/compression/output_bytes'))
+
+    def test_compression_setting(self):
+        with FeedSettings() as feed_settings:
+            export_feed(feed_settings, self.items, FEED_COMPRESSION='bz2', FEED_COMPRESSION_LEVEL=1,
+                        FEED_FLUSH_ITEMS=3)
+            self.assertEqual(export_baseline_feed(self.items), bz2.decompress(_read(feed_settings['feed_file'])))
+
+    def test_disabled_compression(self):
+        with FeedSettings() as feed_settings:
+            feed_settings = dict(feed_settings, feed_file=feed_settings['feed_file'] + '.gz')
+            export_feed(feed_settings, self.items, FEED_COMPRESSION='none')
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+
+    @parameterized.expand([
+        ({'FEED_COMPRESSION': 'zip'}, 'Compression must be one of'),
+        ({'FEED_COMPRESSION': 'gzip', 'FEED_COMPRESSION_LEVEL': 12}, 'Level'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with FeedSettings() as feed_settings:
+            with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+                export_feed(feed_settings, [], **settings)
+
+
+class TestAtomicSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    def test_publish(self):
+        crawler_settings = dict(CrawlerContext.default_settings, FEED_EXPORTER=FullRssItemExporter,
+                                FEED_ATOMIC=True, FEED_FSYNC='periodic', FEED_FSYNC_INTERVAL=60)
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            _write(feed_settings['feed_file'], b'previous feed')
+            with CrawlerContext(crawler_settings=crawler_settings, **feed_settings) as context:
+                process_items(context, self.items)
+                # the previous feed is replaced when the new one is complete
+                self.assertEqual(b'previous feed', _read(feed_settings['feed_file']))
+                self.assertEqual(2, len(os.listdir(directory)))
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+            self.assertEqual(['feed.rss'], os.listdir(directory))
+        self.assertEqual(1, context.crawler.stats.get_value('feed/atomic/fsyncs'))
+        self.assertEqual(1, context.crawler.stats.get_value('feed/atomic/published'))
+
+    @parameterized.expand([
+        (FailingExporter, {'FEED_FLUSH_ITEMS': 3}, IOError, 'No space left'),
+        (FullRssItemExporter, {'FEED_FSYNC': 'always'}, ValueError, 'Fsync policy'),
+    ])
+    def test_failure(self, exporter_cls, settings, exc_cls, exc_msg_match):
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], b'previous feed')
+            with six.assertRaisesRegex(self, exc_cls, exc_msg_match):
+                export_feed(feed_settings, self.items, FEED_EXPORTER=exporter_cls, FEED_ATOMIC=True, **settings)
+            self.assertEqual(b'previous feed', _read(feed_settings['feed_file']))
+            self.assertEqual(['feed.rss'], os.listdir(os.path.dirname(feed_settings['feed_file'])))
+
+
+class TestRotationSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    @staticmethod
+    def _channel_elements(channel):
+        return [(element.tag, element.text, dict(element.attrib)) for element in channel
+                if element.tag not in ('item', ATOM_LINK)]
+
+    def test_rotate_items(self):
+        expected = etree.fromstring(export_baseline_feed(self.items)).find('channel')
+        pages_number = (len(self.items) + 3) // 4
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            context = export_feed(feed_settings, self.items, FEED_ROTATE_ITEMS=4)
+            self.assertEqual(['feed.rss'] + ['feed.{}.rss'.format(page) for page in range(2, pages_number + 1)],
+                             _page_names(directory))
+            channels = [etree.fromstring(_read(os.path.join(directory, filename))).find('channel')
+                        for filename in _page_names(directory)]
+        self.assertEqual(pages_number - 1, context.crawler.stats.get_value('feed/rotation/pages'))
+        for page, channel in enumerate(channels, 1):
+            self.assertEqual(self._channel_elements(expected), self._channel_elements(channel))
+            self.assertLessEqual(len(channel.findall('item')), 4)
+            expected_links = []
+            if page > 1:
+                expected_links.append(('prev-archive', 'feed.rss' if page == 2 else 'feed.{}.rss'.format(page - 1)))
+            if page < pages_number:
+                expected_links.append(('next', 'feed.{}.rss'.format(page + 1)))
+            self.assertEqual(expected_links, [(link.get('rel'), link.get('href'))
+                                              for link in channel.iterfind(ATOM_LINK)])
+        self.assertEqual([etree.tostring(item) for item in expected.findall('item')],
+                         [etree.tostring(item) for channel in channels for item in channel.findall('item')])
+
+    def test_rotate_bytes(self):
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            export_feed(feed_settings, self.items[:3], FEED_ROTATE_BYTES=1, FEED_ATOMIC=True, FEED_FLUSH_ITEMS=2,
+                        FEED_ROTATE_NAME='{stem}-page{page}{ext}.gz',
+                        FEED_ROTATE_URL='http://example.com/archive/{page}/{filename}')
+            self.assertEqual(['feed.rss', 'feed-page2.rss.gz', 'feed-page3.rss.gz'], _page_names(directory))
+            with gzip.open(os.path.join(directory, 'feed-page2.rss.gz'), 'rb') as data:
+                channel = etree.fromstring(data.read()).find('channel')
+        self.assertEqual(1, len(channel.findall('item')))
+        self.assertEqual([('prev-archive', 'http://example.com/archive/1/feed.rss'),
+                          ('next', 'http://example.com/archive/3/feed-page3.rss.gz')],
+                         [(link.get('rel'), link.get('href')) for link in channel.iterfind(ATOM_LINK)])
+
+
+class TestMaxItemsSettings(RssTestCase):
+    items = _dated_items(20)
+
+    @parameterized.expand([({},), (POOL_SETTINGS,), ({'FEED_FLUSH_ITEMS': 2},)])
+    def test_latest_items(self, settings):
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self.items, FEED_MAX_ITEMS=5, **settings)
+            self.assertEqual(export_baseline_feed(_latest(self.items, 5)), _read(feed_settings['feed_file']))
+        self.assertEqual(15, context.crawler.stats.get_value('feed/max_items/dropped'))
+
+    def test_rotation(self):
+        expected = etree.fromstring(export_baseline_feed(_latest(self.items, 5))).find('channel')
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            export_feed(feed_settings, self.items, FEED_MAX_ITEMS=5, FEED_ROTATE_ITEMS=2)
+            self.assertEqual(['feed.rss', 'feed.2.rss', 'feed.3.rss'], _page_names(directory))
+            page_items = [etree.tostring(item) for filename in _page_names(directory)
+                          for item in etree.fromstring(_read(os.path.join(directory, filename))).iterfind('channel/item')]
+        self.assertEqual([etree.tostring(item) for item in expected.findall('item')], page_items)
+
+
+class TestSortSettings(RssTestCase):
+    items = _dated_items(20)
+
+    def _export_sorted(self, feed_settings, **settings):
+        temp_dir = os.path.join(os.path.dirname(feed_settings['feed_file']), 'sort')
+        os.mkdir(temp_dir)
+        context = export_feed(feed_settings, self.items, FEED_SORT_ITEMS=True, FEED_SORT_BUFFER_SIZE=1,
+                              FEED_SORT_MAX_FAN_IN=4, FEED_SORT_TEMP_DIR=temp_dir, **settings)
+        # runs are removed when the feed is written
+        self.assertEqual([], os.listdir(temp_dir))
+        return context
+
+    @parameterized.expand([({},), (POOL_SETTINGS,), ({'FEED_ROTATE_ITEMS': 50},)])
+    def test_sort(self, settings):
+        with FeedSettings() as feed_settings:
+            context = self._export_sorted(feed_settings, **settings)
+            self.assertEqual(export_baseline_feed(_latest(self.items)), _read(feed_settings['feed_file']))
+        self.assertEqual(20, context.crawler.stats.get_value('feed/sort/runs'))
+
+    def test_sort_key(self):
+        with FeedSettings() as feed_settings:
+            self._export_sorted(feed_settings, FEED_SORT_KEY=lambda item: item.title.value)
+            feed = etree.fromstring(_read(feed_settings['feed_file']))
+        self.assertEqual(sorted(item.title.value for item in self.items), feed.xpath('channel/item/title/text()'))
+
+
+class TestAppendSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    @parameterized.expand([({},), ({'FEED_FLUSH_ITEMS': 2},), (POOL_SETTINGS,), ({'FEED_ATOMIC': True},)])
+    def test_append(self, settings):
+        with FeedSettings() as feed_settings:
+            # the first feed is written as usual
+            export_feed(feed_settings, self.items[:5], FEED_APPEND=True)
+            context = export_feed(feed_settings, self.items[5:], FEED_APPEND=True, **settings)
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+        self.assertIsNone(context.crawler.stats.get_value('feed/append/undeclared_namespaces'))
+        self.assertIsNone(context.crawler.stats.get_value('feed/append/last_build_date_kept'))
+
+    @parameterized.expand([({'FEED_FLUSH_ITEMS': 1},), ({'FEED_ATOMIC': True},)])
+    def test_failed_export(self, settings):
+        expected = export_baseline_feed(self.items)
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], expected)
+            with six.assertRaisesRegex(self, IOError, 'No space left'):
+                export_feed(feed_settings, self.items[:2], FEED_APPEND=True, FEED_EXPORTER=FailingExporter,
+                            **settings)
+            # the previous feed is restored
+            self.assertEqual(expected, _read(feed_settings['feed_file']))
+
+    @parameterized.expand([(False,), (True,)])
+    def test_last_build_date_of_another_length(self, atomic):
+        expected = export_baseline_feed(self.items)
+        previous = re.sub(b'<lastBuildDate>.*?</lastBuildDate>',
+                          b'<lastBuildDate>Tue, 1 Feb 2000 02:10:30 GMT</lastBuildDate>', expected)
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], previous)
+            context = export_feed(feed_settings, [], FEED_APPEND=True, FEED_ATOMIC=atomic)
+            # the build date is replaced in the copy of the feed only
+            self.assertEqual(expected if atomic else previous, _read(feed_settings['feed_file']))
+        self.assertEqual(None if atomic else 1, context.crawler.stats.get_value('feed/append/last_build_date_kept'))
+
+    @parameterized.expand([({'FEED_COMPRESSION': 'gzip'},), ({'FEED_ROTATE_ITEMS': 2},)])
+    def test_bad_settings(self, settings):
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], export_baseline_feed(self.items))
+            with six.assertRaisesRegex(self, NotConfigured, 'FEED_APPEND cannot'):
+                export_feed(feed_settings, [], FEED_APPEND=True, **settings)
+
+    def test_bad_previous_feed(self):
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], b'previous feed')
+            with self.assertRaises(CloseSpider) as cm:
+                export_feed(feed_settings, [], FEED_APPEND=True)
+        self.assertIn('Cannot append', cm.exception.reason)
+
+
+class TestMergeSettings(RssTestCase):
+    items = [RssItem(title='Item {}'.format(number), link='http://example.com/{}'.format(number),
+                     guid='id{}'.format(number),
+                     pubDate=datetime(2020, 1, 1, tzinfo=get_tzlocal()) + timedelta(hours=number))
+             for number in range(6)]
+
+    def test_first_feed(self):
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self.items[:4], FEED_MERGE=True)
+            self.assertEqual(export_baseline_feed(self.items[:4]), _read(feed_settings['feed_file']))
+        self.assertIsNone(context.crawler.stats.get_value('feed/merge/previous_items'))
+
+    @parameterized.expand([
+        ({}, [3, 4, 5, 0, 1, 2], 1, 3),
+        ({'FEED_FLUSH_ITEMS': 2}, [3, 4, 5, 0, 1, 2], 1, 3),
+        (POOL_SETTINGS, [3, 4, 5, 0, 1, 2], 1, 3),
+        # the rest of the previous feed isn't parsed after the limit is reached
+        ({'FEED_MERGE_MAX_ITEMS': 4}, [3, 4, 5, 0], None, 1),
+    ])
+    def test_merge(self, settings, merged_numbers, duplicates, previous_items):
+        with FeedSettings() as feed_settings:
+            _write(feed_settings['feed_file'], export_baseline_feed(self.items[:4]))
+            context = export_feed(feed_settings, self.items[3:], FEED_MERGE=True, **settings)
+            self.assertEqual(export_baseline_feed([self.items[number] for number in merged_numbers]),
+                             _read(feed_settings['feed_file']))
+        self.assertEqual(duplicates, context.crawler.stats.get_value('feed/merge/duplicates'))
+        self.assertEqual(previous_items, context.crawler.stats.get_value('feed/merge/previous_items'))
+
+    @parameterized.expand([
+        ({'FEED_APPEND': True}, 'FEED_APPEND cannot'),
+        ({'FEED_ROTATE_ITEMS': 2}, 'FEED_MERGE cannot'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with FeedSettings() as feed_settings:
+            with six.assertRaisesRegex(self, NotConfigured, exc_msg_match):
+                export_feed(feed_settings, [], FEED_MERGE=True, **settings)
+
+
+class TestDedupSettings(RssTestCase):
+    @staticmethod
+    def _items(numbers):
+        return [RssItem(title='Item {}'.format(number), link='http://example.com/{}'.format(number))
+                for number in numbers]
+
+    def test_dedup(self):
+        expected_items = self._items(range(3))
+        for item in expected_items:
+            item.guid = item.link.value
+        item_pipelines = dict(CrawlerContext.default_settings['ITEM_PIPELINES'])
+        item_pipelines['scrapy_rss.pipelines.DuplicateFilterPipeline'] = 800
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self._items([0, 1, 0, 2, 1]),
+                                  ITEM_PIPELINES=item_pipelines, FEED_DEDUP_AUTO_GUID=True)
+            self.assertEqual(export_baseline_feed(expected_items), _read(feed_settings['feed_file']))
+        self.assertEqual(2, context.crawler.stats.get_value('feed/dedup/hits'))
+        self.assertEqual(3, context.crawler.stats.get_value('feed/dedup/misses'))
+
+
+class TestSkipUnchangedSettings(RssTestCase):
+    items = list(initialized_items.items.values())
+
+    @staticmethod
+    def _read_etag(feed_settings):
+        return '"{}"'.format(_read(feed_settings['feed_file'] + '.digest').strip().decode('ascii'))
+
+    def test_first_feed(self):
+        with FeedSettings() as feed_settings:
+            context = export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True)
+            self.assertEqual(export_baseline_feed(self.items), _read(feed_settings['feed_file']))
+            self.assertEqual(self._read_etag(feed_settings), context.crawler.stats.get_value('feed/etag'))
+        self.assertIsNone(context.crawler.stats.get_value('feed/unchanged'))
+
+    @parameterized.expand([({},), (POOL_SETTINGS,)])
+    def test_unchanged_feed(self, settings):
+        expected = export_baseline_feed(self.items)
+        with FeedSettings() as feed_settings:
+            export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True)
+            etag = self._read_etag(feed_settings)
+            context = export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True,
+                                  FEED_EXPORTER=LaterExporter, **settings)
+            # the previous feed with its lastBuildDate is kept
+            self.assertEqual(expected, _read(feed_settings['feed_file']))
+            self.assertEqual(['feed.rss', 'feed.rss.digest'], sorted(os.listdir(os.path.dirname(feed_settings['feed_file']))))
+        self.assertEqual(1, context.crawler.stats.get_value('feed/unchanged'))
+        self.assertEqual(etag, context.crawler.stats.get_value('feed/etag'))
+
+    def test_missing_feed(self):
+        expected = export_baseline_feed(self.items)
+        with FeedSettings() as feed_settings:
+            export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True)
+            os.remove(feed_settings['feed_file'])
+            context = export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True, FEED_EXPORTER=LaterExporter)
+            self.assertEqual(expected.replace(b'<lastBuildDate>Tue, 01 Feb', b'<lastBuildDate>Wed, 02 Feb'),
+                             _read(feed_settings['feed_file']))
+        self.assertIsNone(context.crawler.stats.get_value('feed/unchanged'))
+
+    def test_changed_feed(self):
+        with FeedSettings() as feed_settings:
+            export_feed(feed_settings, self.items, FEED_SKIP_UNCHANGED=True)
+            etag = self._read_etag(feed_settings)
+            context = export_feed(feed_settings, self.items[1:], FEED_SKIP_UNCHANGED=True)
+            self.assertEqual(export_baseline_feed(self.items[1:]), _read(feed_settings['feed_file']))
+            self.assertEqual(self._read_etag(feed_settings), context.crawler.stats.get_value('feed/etag'))
+        self.assertIsNone(context.crawler.stats.get_value('feed/unchanged'))
+        self.assertNotEqual(etag, context.crawler.stats.get_value('feed/etag'))
+
+    @parameterized.expand([
+        ({'FEED_APPEND': True}, 'FEED_APPEND cannot'),
+        ({'FEED_ROTATE_ITEMS': 2}, 'FEED_SKIP_UNCHANGED cannot'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with FeedSettings() as feed_settings:
+            with six.assertRaisesRegex(self, NotConfigured, exc_msg_match):
+                export_feed(feed_settings, [], FEED_SKIP_UNCHANGED=True, **settings)
+
+
+class TestRouteSettings(RssTestCase):
+    def test_route(self):
+        items = list(initialized_items.items.values())
+        feed_items = set(map(id, items[::2]))
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            route_settings = dict(feed_settings, feed_file=os.path.join(directory, '{key}.rss'))
+            context = export_feed(route_settings, items,
+                                  ITEM_PIPELINES={'scrapy_rss.routing.FeedRouterPipeline': 900},
+                                  FEED_ROUTE_KEY=lambda item: 'feed' if id(item) in feed_items else 'other',
+                                  FEED_ROUTE_MAX_OPEN=1)
+            self.assertEqual(export_baseline_feed(items[::2]), _read(os.path.join(directory, 'feed.rss')))
+            self.assertEqual(export_baseline_feed(items[1::2]), _read(os.path.join(directory, 'other.rss')))
+        self.assertEqual(2, context.crawler.stats.get_value('feed/route/feeds'))
+
+
+class TestFormatsSettings(RssTestCase):
+    def test_json(self):
+        items = list(initialized_items.items.values())
+        with FeedSettings() as feed_settings:
+            directory = os.path.dirname(feed_settings['feed_file'])
+            json_file = os.path.join(directory, 'feed.json.gz')
+            context = export_feed(feed_settings, items, FEED_FORMATS={'json': json_file},
+                                  FEED_FORMAT_URLS={'json': 'http://example.com/feed.json'}, FEED_ATOMIC=True)
+            self.assertEqual(export_baseline_feed(items), _read(feed_settings['feed_file']))
+            with gzip.open(json_file, 'rb') as data:
+                feed = json.loads(data.read().decode('utf-8'))
+            self.assertEqual(['feed.json.gz', 'feed.rss'], sorted(os.listdir(directory)))
+        self.assertEqual('http://example.com/feed.json', feed['feed_url'])
+        self.assertEqual(feed_settings['feed_title'], feed['title'])
+        self.assertEqual(len(items), len(feed['items']))
+        # items are validated once for all formats
+        self.assertEqual(len(items), context.crawler.stats.get_value('feed/validation/validated'))
+        self.assertEqual(len(items), context.crawler.stats.get_value('feed/formats/json/items'))
+
+    @parameterized.expand([
+        ({'FEED_FORMATS': {'atom': 'feed.atom'}}, 'Feed format'),
+        ({'FEED_FORMATS': {'json': 'feed.json'}, 'FEED_MAX_ITEMS': 2}, 'FEED_MAX_ITEMS'),
+        ({'FEED_FORMATS': {'json': 'feed.json'}, 'FEED_ROTATE_ITEMS': 2}, 'FEED_ROTATE_ITEMS'),
+        ({'FEED_FORMATS': {'json': 'feed.json'}, 'FEED_SERIALIZATION_WORKERS': 2}, 'FEED_SERIALIZATION_WORKERS'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with FeedSettings() as feed_settings:
+            with six.assertRaisesRegex(self, NotConfigured, exc_msg_match):
+                export_feed(feed_settings, [], **settings)
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+import gzip
+import os
+
+from parameterized import parameterized
+import six
+import scrapy
+from scrapy.exceptions import NotConfigured, DropItem
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.items import RssItem, RssedItem
+from scrapy_rss.pipelines import FeedExportPipeline
+from scrapy_rss.routing import FeedRouterPipeline
+
+import pytest
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory, FullRssItemExporter
+
+
+class CategorizedItem(RssedItem):
+    section = scrapy.Field()
+
+
+def get_category(item):
+    return item.category[0].value if item.category else None
+
+
+class TestFeedRouterPipeline(RssTestCase):
+    def _get_settings(self, directory, **settings):
+        feed_settings = {
+            'FEED_FILE': os.path.join(directory, '{key}.rss'),
+            'FEED_TITLE': 'Feed {key}',
+            'FEED_LINK': 'http://example.com/{key}',
+            'FEED_DESCRIPTION': 'Description',
+            'FEED_EXPORTER': FullRssItemExporter,
+        }
+        feed_settings.update(settings)
+        return feed_settings
+
+    def _run_pipeline(self, pipeline_cls, items, **settings):
+        crawler = get_crawler(settings_dict=settings)
+        spider = scrapy.Spider.from_crawler(crawler, 'example.com')
+        pipeline = pipeline_cls.from_crawler(crawler)
+        pipeline.spider_opened(spider)
+        results = []
+        try:
+            for item in items:
+                try:
+                    results.append(pipeline.process_item(item, spider))
+                except DropItem:
+                    results.append(None)
+        finally:
+            pipeline.spider_closed(spider)
+        return results, crawler.stats
+
+    def _export_feed(self, directory, key, items, **settings):
+        settings = self._get_settings(directory, **settings)
+        for name in ('FEED_FILE', 'FEED_TITLE', 'FEED_LINK'):
+            settings[name] = settings[name].format(key=key)
+        settings['FEED_FILE'] = os.path.join(directory, 'expected', os.path.basename(settings['FEED_FILE']))
+        self._run_pipeline(FeedExportPipeline, items, **settings)
+        with open(settings['FEED_FILE'], 'rb') as f:
+            return f.read()
+
+    def _create_items(self, categories):
+        items = []
+        for number, category in enumerate(categories):
+            item = RssItem(title='Item {}'.format(number), link='http://example.com/{}'.format(number))
+            if category is not None:
+                item.category = [category, 'other']
+            items.append(item)
+        return items
+
+    @parameterized.expand([
+        (max_open, resume)
+        for max_open in (0, 1, 2)
+        for resume in ('append', 'spool')
+    ])
+    def test_route_by_field(self, max_open, resume):
+        categories = ['a', 'b', 'c', 'a', 'a', 'c', 'b', 'a']
+        items = self._create_items(categories)
+        with TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'expected'))
+            results, stats = self._run_pipeline(
+                FeedRouterPipeline, items,
+                **self._get_settings(directory, FEED_ROUTE_FIELD='category',
+                                     FEED_ROUTE_MAX_OPEN=max_open, FEED_ROUTE_RESUME=resume))
+            self.assertEqual(items, results)
+            for key in 'abc':
+                key_items = [item for item, category in zip(items, categories) if category == key]
+                with open(os.path.join(directory, '{}.rss'.format(key)), 'rb') as f:
+                    self.assertEqual(self._export_feed(directory, key, key_items), f.read())
+            self.assertEqual(['a.rss', 'b.rss', 'c.rss', 'expected'], sorted(os.listdir(directory)))
+        self.assertEqual(3, stats.get_value('feed/route/feeds'))
+        evictions, resumes = {0: (None, None), 1: (6, 4), 2: (4, 3)}[max_open]
+        self.assertEqual(evictions, stats.get_value('feed/route/evictions'))
+        self.assertEqual(resumes, stats.get_value('feed/route/resumes'))
+
+    def test_route_by_key_function(self):
+        items = self._create_items(['a', 'b', None, 'a'])
+        with TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'expected'))
+            feed_routes = {'b': {'FEED_TITLE': 'Special feed', 'FEED_FILE': os.path.join(directory, 'special.rss')}}
+            results, stats = self._run_pipeline(
+                FeedRouterPipeline, items,
+                **self._get_settings(directory, FEED_ROUTE_KEY='tests.test_routing.get_category',
+                                     FEED_ROUTES=feed_routes))
+            self.assertEqual([items[0], items[1], None, items[3]], results)
+            with open(os.path.join(directory, 'a.rss'), 'rb') as f:
+                self.assertEqual(self._export_feed(directory, 'a', [items[0], items[3]]), f.read())
+            with open(os.path.join(directory, 'special.rss'), 'rb') as f:
+                self.assertEqual(self._export_feed(directory, 'b', [items[1]], FEED_TITLE='Special feed',
+                                                   FEED_FILE=os.path.join(directory, 'special.rss')),
+                                 f.read())
+            self.assertEqual(['a.rss', 'expected', 'special.rss'], sorted(os.listdir(directory)))
+        self.assertEqual(2, stats.get_value('feed/route/feeds'))
+        self.assertEqual(1, stats.get_value('feed/route/unrouted'))
+
+    def test_spool_compressed_feeds(self):
+        items = self._create_items(['a', 'b', 'a', 'b', 'a'])
+        with TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'expected'))
+            spool_dir = os.path.join(directory, 'spool')
+            os.mkdir(spool_dir)
+            settings = self._get_settings(directory, FEED_FILE=os.path.join(directory, '{key}.rss.gz'),
+                                          FEED_ATOMIC=True, FEED_ROUTE_FIELD='category',
+                                          FEED_ROUTE_MAX_OPEN=1, FEED_ROUTE_RESUME='spool',
+                                          FEED_ROUTE_SPOOL_DIR=spool_dir)
+            _, stats = self._run_pipeline(FeedRouterPipeline, items, **settings)
+            for key, key_items in [('a', items[::2]), ('b', items[1::2])]:
+                with gzip.open(os.path.join(directory, '{}.rss.gz'.format(key)), 'rb') as f:
+                    self.assertEqual(self._export_feed(directory, key, key_items, FEED_FILE='{key}.rss'),
+                                     f.read())
+            self.assertEqual([], os.listdir(spool_dir))
+        self.assertEqual(3, stats.get_value('feed/route/resumes'))
+
+    def test_get_feed_key(self):
+        with TemporaryDirectory() as directory:
+            crawler = get_crawler(settings_dict=self._get_settings(directory, FEED_ROUTE_FIELD='section'))
+            spider = scrapy.Spider.from_crawler(crawler, 'example.com')
+            pipeline = FeedRouterPipeline.from_crawler(crawler)
+            pipeline.spider_opened(spider)
+            item = CategorizedItem(section='books')
+            self.assertEqual('books', pipeline.get_feed_key(item, spider))
+            self.assertIsNone(pipeline.get_feed_key(CategorizedItem(), spider))
+            pipeline.spider_closed(spider)
+
+            for field, expected in [('title', 'Title'), ('category', 'first'), ('guid', 'id'), ('link', None)]:
+                crawler = get_crawler(settings_dict=self._get_settings(directory, FEED_ROUTE_FIELD=field))
+                spider = scrapy.Spider.from_crawler(crawler, 'example.com')
+                pipeline = FeedRouterPipeline.from_crawler(crawler)
+                pipeline.spider_opened(spider)
+                item = RssItem(title='Title', guid='id')
+                item.category = ['first', 'second']
+                self.assertEqual(expected, pipeline.get_feed_key(item, spider))
+                rssed_item = RssedItem()
+                rssed_item.rss = item
+                self.assertEqual(expected, pipeline.get_feed_key(rssed_item, spider))
+                pipeline.spider_closed(spider)
+
+    @parameterized.expand([
+        ({}, 'FEED_ROUTE_KEY or FEED_ROUTE_FIELD'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ROUTE_RESUME': 'reopen'}, 'FEED_ROUTE_RESUME'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ROUTE_MAX_OPEN': -1}, 'FEED_ROUTE_MAX_OPEN'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ROUTE_RESUME': 'spool', 'FEED_APPEND': True}, 'FEED_APPEND'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_MAX_ITEMS': 2}, 'FEED_MAX_ITEMS'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ROTATE_ITEMS': 2}, 'FEED_ROTATE_ITEMS'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_MERGE': True}, 'FEED_MERGE'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_FORMATS': {'json': 'feed.json'}}, 'FEED_FORMATS'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ROUTES': {'a': {'FEED_SORT_ITEMS': True}}}, 'FEED_SORT_ITEMS'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_ATOMIC': True}, 'FEED_ROUTE_RESUME'),
+        ({'FEED_ROUTE_FIELD': 'category', 'FEED_FILE': '{key}.rss.gz'}, 'FEED_ROUTE_RESUME'),
+    ])
+    def test_bad_settings(self, settings, exc_msg_match):
+        with TemporaryDirectory() as directory:
+            with six.assertRaisesRegex(self, NotConfigured, exc_msg_match):
+                self._run_pipeline(FeedRouterPipeline, self._create_items(['a']),
+                                   **self._get_settings(directory, **settings))
+
+
+if __name__ == '__main__':
+    pytest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+import os
+import random
+
+from parameterized import parameterized
+import six
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.sorting import ExternalSorter
+
+import pytest
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory
+
+
+class TestExternalSorter(RssTestCase):
+    @parameterized.expand([
+        ({'max_buffer_size': 0}, 'buffer size'),
+        ({'max_fan_in': 1}, 'fan-in'),
+    ])
+    def test_bad_arguments(self, kwargs, exc_msg_match):
+        with six.assertRaisesRegex(self, ValueError, exc_msg_match):
+            ExternalSorter(**kwargs)
+
+    @parameterized.expand([
+        (5000, 3, 0, 0),
+        (1000, 3, 1, 1),
+        (100, 100, 10, 1),
+        (100, 3, 10, 5),
+        (10, 2, 100, 100),
+    ])
+    def test_sorting(self, max_buffer_size, max_fan_in, runs, merges):
+        rnd = random.Random(1)
+        entries = [(rnd.randint(0, 20), 'fragment {}'.format(number)) for number in range(100)]
+        stats = get_crawler().stats
+        with TemporaryDirectory() as temp_dir:
+            sorter = ExternalSorter(max_buffer_size=max_buffer_size, max_fan_in=max_fan_in,
+                                    temp_dir=temp_dir, stats=stats)
+            for key, fragment in entries:
+                sorter.add(key, fragment)
+            self.assertEqual(100, len(sorter))
+            self.assertEqual(runs or None, stats.get_value('feed/sort/runs'))
+            # the sort is stable
+            self.assertEqual([fragment for _, fragment in sorted(entries, key=lambda entry: entry[0])],
+                             list(sorter))
+            self.assertEqual(merges or None, stats.get_value('feed/sort/merges'))
+            self.assertEqual(bool(runs), bool(os.listdir(temp_dir)))
+            sorter.close()
+            self.assertEqual([], os.listdir(temp_dir))
+
+    def test_empty(self):
+        sorter = ExternalSorter(max_buffer_size=1)
+        self.assertEqual([], list(sorter))
+        sorter.close()
+
+
+if __name__ == '__main__':
+    pytest.main()
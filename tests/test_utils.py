@@ -7,8 +7,8 @@ from itertools import chain, product
 import pytest
 import six
 
-from scrapy_rss.utils import (format_rfc822, is_strict_subclass, get_full_class_name,
-                              deprecated_module, deprecated_class, deprecated_func)
+from scrapy_rss.utils import (format_rfc822, format_rfc3339, get_timestamp, get_tzlocal, is_strict_subclass,
+                              get_full_class_name, deprecated_module, deprecated_class, deprecated_func)
 
 
 class A0:
@@ -24,6 +24,16 @@ class C0(A0):
 class D0(C0):
     pass
 
+class FixedOffset(tzinfo):
+    def __init__(self, hours):
+        self._offset = timedelta(hours=hours)
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return timedelta(0)
+
 
 @pytest.mark.parametrize("dt,timezone_offset,valid", chain(
     product([
@@ -116,6 +126,41 @@ def test_format_rfc822(dt, timezone_offset, valid):
             return
     assert actual == expected
 
+
+@pytest.mark.parametrize("dt,expected", [
+    (datetime(2000, 12, 1, 23, 59, 59, tzinfo=FixedOffset(0)), 975715199.0),
+    (datetime(2000, 12, 1, 23, 59, 59, 500000, tzinfo=FixedOffset(-5)), 975733199.5),
+    ('Fri, 01 Dec 2000 23:59:59 +0000', 975715199.0),
+    ('Fri, 01 Dec 2000 23:59:59 -0500', 975733199.0),
+])
+def test_get_timestamp(dt, expected):
+    assert get_timestamp(dt) == expected
+
+
+def test_get_timestamp_of_local_date():
+    assert get_timestamp(datetime(2000, 12, 1, 5)) == time.mktime((2000, 12, 1, 5, 0, 0, 0, 0, -1))
+    assert get_timestamp(date(2000, 12, 1)) == time.mktime((2000, 12, 1, 0, 0, 0, 0, 0, -1))
+    assert get_timestamp('Fri, 01 Dec 2000 05:00:00') == time.mktime((2000, 12, 1, 5, 0, 0, 0, 0, -1))
+    with pytest.raises(ValueError):
+        get_timestamp('invalid date')
+
+@pytest.mark.parametrize("dt,expected", [
+    (datetime(2000, 12, 1, 23, 59, 59, tzinfo=FixedOffset(0)), '2000-12-01T23:59:59+00:00'),
+    (datetime(2000, 12, 1, 23, 59, 59, 500000, tzinfo=FixedOffset(-5)), '2000-12-01T23:59:59-05:00'),
+    ('Fri, 01 Dec 2000 23:59:59 +0000', '2000-12-01T23:59:59+00:00'),
+    ('Fri, 01 Dec 2000 23:59:59 -0530', '2000-12-01T23:59:59-05:30'),
+])
+def test_format_rfc3339(dt, expected):
+    assert format_rfc3339(dt) == expected
+
+
+def test_format_rfc3339_of_local_date():
+    assert format_rfc3339(date(2000, 12, 1)) == format_rfc3339(datetime(2000, 12, 1, tzinfo=get_tzlocal()))
+    assert (format_rfc3339('Fri, 01 Dec 2000 23:59:59')
+            == format_rfc3339(datetime(2000, 12, 1, 23, 59, 59, tzinfo=get_tzlocal())))
+    with pytest.raises(ValueError):
+        format_rfc3339('invalid date')
+
 @pytest.mark.parametrize("tz_offset,tz_name",
                          ((n, 'Etc/GMT{:+}'.format(-n) if abs(n) >= 10 or n == 0
                               else {-1: 'Atlantic/Cape_Verde', 2: 'Europe/Kaliningrad'}[n])
@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+import bz2
+import gzip
+from io import BytesIO
+import os
+import stat
+import threading
+import time
+
+from parameterized import parameterized
+import six
+from scrapy.utils.test import get_crawler
+
+from scrapy_rss.writers import (CoalescingWriter, CompressingWriter, RotatingWriter, AtomicFile,
+                                BackgroundWriter, infer_compression)
+
+try:
+    import lzma
+except ImportError:
+    try:
+        from backports import lzma
+    except ImportError:
+        lzma = None
+
+import pytest
+from tests.utils import RssTestCase
+from tests.exporter_utils import TemporaryDirectory
+
+
+class CountingFile(BytesIO):
+    def __init__(self):
+        super(CountingFile, self).__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super(CountingFile, self).write(data)
+
+    def close(self):
+        self.final_value = self.getvalue()
+        super(CountingFile, self).close()
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.time = 0
+
+    def __call__(self):
+        return self.time
+
+
+class TestCoalescingWriter(RssTestCase):
+    @parameterized.expand([
+        ({'buffer_size': -1},),
+        ({'flush_items': -1},),
+        ({'flush_interval': -0.5},),
+    ])
+    def test_bad_thresholds(self, kwargs):
+        with self.assertRaises(ValueError):
+            CoalescingWriter(CountingFile(), **kwargs)
+
+    def test_buffer_size(self):
+        file = CountingFile()
+        writer = CoalescingWriter(file, buffer_size=10)
+        for _ in range(4):
+            writer.write(b'<a>')
+        # the buffer is flushed at the end of the item only
+        self.assertEqual(0, file.writes)
+        writer.end_item()
+        self.assertEqual(1, file.writes)
+        self.assertEqual(b'<a>' * 4, file.getvalue())
+        writer.write(b'</a>')
+        writer.end_item()
+        self.assertEqual(1, file.writes)
+        writer.close()
+        self.assertEqual(2, file.writes)
+        self.assertEqual(b'<a>' * 4 + b'</a>', file.final_value)
+        self.assertTrue(file.closed)
+
+    def test_flush_items(self):
+        file = CountingFile()
+        writer = CoalescingWriter(file, flush_items=3)
+        for i in range(7):
+            writer.write(b'<item></item>')
+            writer.end_item()
+            self.assertEqual((i + 1) // 3, file.writes)
+        writer.close()
+        self.assertEqual(3, file.writes)
+        self.assertEqual(b'<item></item>' * 7, file.final_value)
+
+    def test_flush_interval(self):
+        file = CountingFile()
+        clock = FakeClock()
+        writer = CoalescingWriter(file, flush_interval=5, clock=clock)
+        writer.write(b'<item></item>')
+        writer.end_item()
+        clock.time = 4
+        writer.write(b'<item></item>')
+        writer.end_item()
+        self.assertEqual(0, file.writes)
+        clock.time = 5
+        writer.write(b'<item></item>')
+        writer.end_item()
+        self.assertEqual(1, file.writes)
+        clock.time = 9
+        writer.write(b'<item></item>')
+        writer.end_item()
+        self.assertEqual(1, file.writes)
+        writer.close()
+        self.assertEqual(b'<item></item>' * 4, file.final_value)
+
+    def test_stats(self):
+        stats = get_crawler().stats
+        file = CountingFile()
+        writer = CoalescingWriter(file, flush_items=2, stats=stats)
+        for _ in range(5):
+            writer.write(b'<item/>')
+            writer.end_item()
+        writer.close()
+        writer.close()
+        self.assertEqual(3, stats.get_value('feed/buffer/flushes'))
+        self.assertEqual(35, stats.get_value('feed/buffer/flushed_bytes'))
+
+
+def _decompress_gzip(data):
+    return gzip.GzipFile(fileobj=BytesIO(data)).read()
+
+
+compressions = [('gzip', _decompress_gzip), ('bz2', bz2.decompress)]
+if lzma is not None:
+    compressions.append(('xz', lzma.decompress))
+
+
+class TestCompressingWriter(RssTestCase):
+    @parameterized.expand(compressions)
+    def test_compression(self, compression, decompress):
+        stats = get_crawler().stats
+        file = CountingFile()
+        writer = CompressingWriter(file, compression, stats=stats)
+        data = b''.join(b'<item><title>Item ' + str(i).encode() + b'</title></item>' for i in range(1000))
+        for i in range(0, len(data), 100):
+            writer.write(data[i:i + 100])
+            writer.flush()
+        writer.close()
+        writer.close()
+        self.assertTrue(file.closed)
+        self.assertEqual(data, decompress(file.final_value))
+        self.assertLess(len(file.final_value), len(data) // 5)
+        self.assertLess(file.writes, 100)
+        self.assertEqual(len(data), stats.get_value('feed/compression/input_bytes'))
+        self.assertEqual(len(file.final_value), stats.get_value('feed/compression/output_bytes'))
+
+    @parameterized.expand(compressions)
+    def test_level(self, compression, decompress):
+        data = b'<item><title>Item</title><description>Description</description></item>' * 1000
+        sizes = []
+        for level in (1, 9):
+            file = CountingFile()
+            writer = CompressingWriter(file, compression, level=level)
+            writer.write(data)
+            writer.close()
+            self.assertEqual(data, decompress(file.final_value))
+            sizes.append(len(file.final_value))
+        self.assertGreaterEqual(sizes[0], sizes[1])
+        with six.assertRaisesRegex(self, ValueError, 'Level'):
+            CompressingWriter(CountingFile(), compression, level=10)
+
+    def test_bad_compression(self):
+        with six.assertRaisesRegex(self, ValueError, 'Compression must be one of'):
+            CompressingWriter(CountingFile(), 'zip')
+
+    @parameterized.expand([
+        ('feed.rss', 'none'),
+        ('feed.rss.gz', 'gzip'),
+        ('/var/www/feed.GZIP', 'gzip'),
+        ('feed.xml.bz2', 'bz2'),
+        ('feed.xz', 'xz'),
+        ('feed.gz/feed.rss', 'none'),
+    ])
+    def test_infer_compression(self, path, compression):
+        self.assertEqual(compression, infer_compression(path))
+
+
+class TestAtomicFile(RssTestCase):
+    def setUp(self):
+        self.directory = TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'feed.rss')
+        with open(self.path, 'wb') as f:
+            f.write(b'<rss>previous</rss>')
+        os.chmod(self.path, 0o644)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    @parameterized.expand([
+        ({'fsync': 'always'},),
+        ({'fsync': 'periodic'},),
+        ({'fsync': 'periodic', 'fsync_interval': -1},),
+    ])
+    def test_bad_arguments(self, kwargs):
+        with self.assertRaises(ValueError):
+            AtomicFile(self.path, **kwargs)
+        self.assertEqual(['feed.rss'], os.listdir(self.directory.name))
+
+    @parameterized.expand([('none', 0), ('close', 1)])
+    def test_publish(self, fsync, fsyncs):
+        stats = get_crawler().stats
+        file = AtomicFile(self.path, fsync=fsync, stats=stats)
+        file.write(b'<rss>')
+        file.write(b'</rss>')
+        file.close()
+        # the target file isn't touched until the temporary file is published
+        self.assertEqual(b'<rss>previous</rss>', self._read())
+        self.assertEqual(2, len(os.listdir(self.directory.name)))
+        file.publish()
+        self.assertEqual(b'<rss></rss>', self._read())
+        self.assertEqual(['feed.rss'], os.listdir(self.directory.name))
+        self.assertEqual(0o644, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.assertEqual(fsyncs, stats.get_value('feed/atomic/fsyncs', 0))
+        self.assertEqual(1, stats.get_value('feed/atomic/published'))
+
+    def test_new_file(self):
+        path = os.path.join(self.directory.name, 'new.rss')
+        file = AtomicFile(path)
+        file.write(b'<rss></rss>')
+        file.publish()
+        with open(path, 'rb') as f:
+            self.assertEqual(b'<rss></rss>', f.read())
+        umask = os.umask(0)
+        os.umask(umask)
+        self.assertEqual(0o666 & ~umask, stat.S_IMODE(os.stat(path).st_mode))
+
+    def test_discard(self):
+        file = AtomicFile(self.path)
+        file.write(b'<rss>')
+        file.discard()
+        file.discard()
+        self.assertTrue(file.closed)
+        self.assertEqual(b'<rss>previous</rss>', self._read())
+        self.assertEqual(['feed.rss'], os.listdir(self.directory.name))
+
+    def test_periodic_fsync(self):
+        stats = get_crawler().stats
+        clock = FakeClock()
+        file = AtomicFile(self.path, fsync='periodic', fsync_interval=10, stats=stats, clock=clock)
+        for i in range(30):
+            clock.time = i
+            file.write(b'<item/>')
+        self.assertEqual(2, stats.get_value('feed/atomic/fsyncs'))
+        file.publish()
+        self.assertEqual(3, stats.get_value('feed/atomic/fsyncs'))
+        self.assertEqual(b'<item/>' * 30, self._read())
+
+    def test_missing_directory(self):
+        with self.assertRaises((IOError, OSError)):
+            AtomicFile(os.path.join(self.directory.name, 'missing', 'feed.rss'))
+
+
+class TestRotatingWriter(RssTestCase):
+    def _writer(self, **kwargs):
+        self.pages = []
+        self.published = []
+
+        def open_page(page):
+            self.assertEqual(len(self.pages) + 1, page)
+            self.pages.append(CountingFile())
+            return self.pages[-1]
+
+        def links(page, last):
+            return '<link page="{}" last="{}"/>'.format(page, last).encode()
+
+        return RotatingWriter(open_page, header=b'<rss>', footer=b'</rss>', links=links,
+                              publish_page=self.published.append, **kwargs)
+
+    def _export(self, writer, items):
+        writer.write(b'<rss>')
+        for item in items:
+            writer.write(item)
+            writer.end_item()
+        writer.write(b'</rss>')
+        writer.close()
+        self.assertTrue(all(page.closed for page in self.pages))
+        return [page.final_value for page in self.pages]
+
+    def test_bad_limits(self):
+        with self.assertRaises(ValueError):
+            self._writer(max_items=-1)
+
+    def test_max_items(self):
+        stats = get_crawler().stats
+        writer = self._writer(max_items=2, stats=stats)
+        pages = self._export(writer, [b'<item>1</item>', b'<item>2</item>', b'<item>3</item>'])
+        self.assertEqual([b'<rss><item>1</item><item>2</item><link page="1" last="False"/></rss>',
+                          b'<rss><item>3</item><link page="2" last="True"/></rss>'],
+                         pages)
+        self.assertEqual([1], self.published)
+        self.assertEqual(1, stats.get_value('feed/rotation/pages'))
+
+    def test_max_bytes(self):
+        writer = self._writer(max_bytes=30)
+        pages = self._export(writer, [b'<item>1</item>', b'<item>2</item>', b'<item>' + b'3' * 40 + b'</item>'])
+        self.assertEqual([b'<rss><item>1</item><link page="1" last="False"/></rss>',
+                          b'<rss><item>2</item><link page="2" last="False"/></rss>',
+                          b'<rss><item>' + b'3' * 40 + b'</item><link page="3" last="True"/></rss>'],
+                         pages)
+        self.assertEqual([1, 2], self.published)
+
+    def test_single_page(self):
+        writer = self._writer(max_items=2)
+        pages = self._export(writer, [b'<item>1</item>'])
+        self.assertEqual([b'<rss><item>1</item><link page="1" last="True"/></rss>'], pages)
+        self.assertEqual([], self.published)
+
+    def test_page_writers(self):
+        files = []
+
+        def open_page(page):
+            files.append(CountingFile())
+            return BackgroundWriter(CoalescingWriter(files[-1], flush_items=2), call_from_thread=call_directly)
+
+        writer = RotatingWriter(open_page, header=b'<rss>', footer=b'</rss>', max_items=3)
+        self.assertIsNone(writer.wait_for_space())
+        writer.write(b'<rss>')
+        for _ in range(5):
+            writer.write(b'<item/>')
+            writer.end_item()
+        writer.write(b'</rss>')
+        writer.close()
+        self.assertEqual([b'<rss>' + b'<item/>' * 3 + b'</rss>', b'<rss>' + b'<item/>' * 2 + b'</rss>'],
+                         [file.final_value for file in files])
+        self.assertEqual([2, 2], [file.writes for file in files])
+
+
+class BlockingFile(CountingFile):
+    def __init__(self):
+        super(BlockingFile, self).__init__()
+        self.unblocked = threading.Event()
+
+    def write(self, data):
+        self.unblocked.wait()
+        return super(BlockingFile, self).write(data)
+
+
+class FailingFile(CountingFile):
+    def __init__(self):
+        super(FailingFile, self).__init__()
+        self.failed = threading.Event()
+
+    def write(self, data):
+        self.failed.set()
+        raise IOError('No space left on device')
+
+
+def call_directly(func, *args):
+    func(*args)
+
+
+class TestBackgroundWriter(RssTestCase):
+    def test_bad_queue_size(self):
+        with self.assertRaises(ValueError):
+            BackgroundWriter(CountingFile(), max_queue_size=0, call_from_thread=call_directly)
+
+    def test_order(self):
+        file = CountingFile()
+        writer = BackgroundWriter(file, call_from_thread=call_directly)
+        writer.write(b'<rss>')
+        for i in range(100):
+            writer.write('<item>{}</item>'.format(i).encode())
+            writer.end_item()
+        writer.write(b'</rss>')
+        writer.close()
+        self.assertFalse(writer._thread.is_alive())
+        self.assertTrue(file.closed)
+        self.assertEqual(b'<rss>' + b''.join('<item>{}</item>'.format(i).encode() for i in range(100)) + b'</rss>',
+                         file.final_value)
+        self.assertEqual(101, file.writes)
+
+    def test_backpressure(self):
+        stats = get_crawler().stats
+        file = BlockingFile()
+        writer = BackgroundWriter(file, max_queue_size=2, stats=stats, call_from_thread=call_directly)
+        self.assertIsNone(writer.wait_for_space())
+        for _ in range(3):
+            writer.write(b'<item/>')
+            writer.end_item()
+        waiting = writer.wait_for_space()
+        self.assertIsNotNone(waiting)
+        fired = threading.Event()
+        waiting.addCallback(lambda _: fired.set())
+        self.assertFalse(fired.is_set())
+        file.unblocked.set()
+        self.assertTrue(fired.wait(10))
+        writer.close()
+        self.assertEqual(b'<item/>' * 3, file.final_value)
+        self.assertEqual(3, stats.get_value('feed/writer/max_queue_depth'))
+        self.assertEqual(1, stats.get_value('feed/writer/stalls'))
+        self.assertGreaterEqual(stats.get_value('feed/writer/stall_time'), 0)
+
+    def test_error(self):
+        file = FailingFile()
+        writer = BackgroundWriter(file, call_from_thread=call_directly)
+        writer.write(b'<item/>')
+        writer.end_item()
+        self.assertTrue(file.failed.wait(10))
+        for _ in range(1000):
+            if writer._error is not None:
+                break
+            time.sleep(0.01)
+        # the error of the writer thread is raised in the crawler thread
+        writer.write(b'<item/>')
+        with six.assertRaisesRegex(self, IOError, 'No space left'):
+            writer.end_item()
+        self.assertIsNone(writer.wait_for_space())
+        with six.assertRaisesRegex(self, IOError, 'No space left'):
+            writer.close()
+        self.assertTrue(file.closed)
+
+    def test_end_item_of_file(self):
+        file = CountingFile()
+        writer = BackgroundWriter(CoalescingWriter(file, flush_items=2), call_from_thread=call_directly)
+        for _ in range(5):
+            writer.write(b'<item/>')
+            writer.end_item()
+        writer.close()
+        self.assertEqual(3, file.writes)
+        self.assertEqual(b'<item/>' * 5, file.final_value)
+
+
+if __name__ == '__main__':
+    pytest.main()